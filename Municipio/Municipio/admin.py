@@ -1,14 +1,92 @@
-from django.contrib import admin
+from django.contrib import admin, messages
+from django.http import HttpResponseRedirect
 from .models import *
+from .busqueda import coincidencias
+from .forms import VersionadoForm
 # Register your models here.
 admin.site.register(Region)
 admin.site.register(Municipio)
 admin.site.register(ZonaUrbana)
 admin.site.register(TipoVivienda)
-admin.site.register(Vivienda)
-admin.site.register(Familia)
 admin.site.register(TipoPersona)
-admin.site.register(Persona)
-admin.site.register(Casa)
-admin.site.register(PagoTributario)
-admin.site.register(Propietario)
\ No newline at end of file
+admin.site.register(Propietario)
+
+
+def _accion_transicion(hacia, descripcion):
+    def accion(modeladmin, request, queryset):
+        movidos = 0
+        for desde, destinos in PagoTributario.TRANSICIONES.items():
+            if hacia in destinos:
+                movidos += queryset.transicionar(desde, hacia)
+        modeladmin.message_user(request, f"{movidos} pagos pasaron a '{hacia}'.", messages.SUCCESS)
+    accion.__name__ = f"marcar_{hacia.replace(' ', '_')}"
+    accion.short_description = descripcion
+    return accion
+
+
+class VersionadoAdmin(admin.ModelAdmin):
+    form = VersionadoForm
+
+    def changeform_view(self, request, object_id=None, form_url='', extra_context=None):
+        try:
+            return super().changeform_view(request, object_id, form_url, extra_context)
+        except ConflictoVersion as error:
+            # Otro guardado ganó entre la validación del formulario y el UPDATE: la transacción ya se revirtió
+            self.message_user(request, error.messages[0], messages.ERROR)
+            return HttpResponseRedirect(request.get_full_path())
+
+
+@admin.register(Casa)
+class CasaAdmin(VersionadoAdmin):
+    pass
+
+
+@admin.register(PagoTributario)
+class PagoTributarioAdmin(VersionadoAdmin):
+    list_display = ('PagTriCod', 'CasCod', 'PagTriCat', 'PagTriPag', 'PagTriEstReg')
+    list_filter = ('PagTriEstReg', 'PagTriCat')
+    actions = [
+        _accion_transicion('en proceso', "Marcar como en proceso"),
+        _accion_transicion('pagada', "Marcar como pagada"),
+        _accion_transicion('debe', "Marcar como debe"),
+    ]
+
+
+@admin.register(ContadorEstadoPago)
+class ContadorEstadoPagoAdmin(admin.ModelAdmin):
+    list_display = ('MunCod', 'ConEstEst', 'ConEstCan')
+    list_filter = ('ConEstEst',)
+
+
+@admin.register(HistorialTributario)
+class HistorialTributarioAdmin(admin.ModelAdmin):
+    list_display = ('CasCod', 'HisTriAno', 'HisTriCat', 'HisTriPag')
+    list_filter = ('HisTriAno', 'HisTriCat')
+
+
+class BusquedaIndexadaAdmin(admin.ModelAdmin):
+    # Buscar en Indice_Busqueda en lugar de LIKE '%x%' sobre la tabla, como subconsulta: sin límite de resultados
+    tipo_busqueda = None
+
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term:
+            return queryset, False
+        return queryset.filter(pk__in=coincidencias(search_term, [self.tipo_busqueda]).values('IndBusPk')), False
+
+
+@admin.register(Persona)
+class PersonaAdmin(BusquedaIndexadaAdmin):
+    tipo_busqueda = 'persona'
+    search_fields = ('PerNom',)
+
+
+@admin.register(Familia)
+class FamiliaAdmin(BusquedaIndexadaAdmin):
+    tipo_busqueda = 'familia'
+    search_fields = ('FamNom',)
+
+
+@admin.register(Vivienda)
+class ViviendaAdmin(VersionadoAdmin, BusquedaIndexadaAdmin):
+    tipo_busqueda = 'vivienda'
+    search_fields = ('VivCal', 'VivNum', 'VivCodPos')
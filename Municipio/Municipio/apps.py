@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class MunicipioConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'Municipio'
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,227 @@
+import json
+import os
+import tempfile
+import zlib
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import (Casa, Familia, HistorialTributario, Municipio, PagoTributario, Persona, Propietario, TipoPersona,
+                     TipoVivienda, Vivienda, ZonaUrbana, _actualizar_registrando)
+from .iteracion import recorrer
+from .texto import normalizar
+
+
+def _compactar(texto):
+    # '  ', ' ' y None son el mismo valor vacío; los espacios internos repetidos cuentan como uno
+    return ' '.join((texto or '').split()).casefold()
+
+
+# Tabla -> modelo, campo de estado de registro, campos de la clave de duplicados y cómo normalizarlos,
+# campo cuyo contador hay que corregir y claves foráneas a verificar
+TABLAS = {
+    'persona': {
+        'modelo': Persona,
+        'estado': 'PerEstReg',
+        'clave': ['FamCod_id', 'PerNom'],
+        'normalizar': lambda fam_cod, nombre: [fam_cod, normalizar(nombre)],
+        'padre': 'FamCod_id',
+        'foraneas': {'FamCod_id': Familia, 'TipPerCod_id': TipoPersona},
+    },
+    'vivienda': {
+        'modelo': Vivienda,
+        'estado': 'VivEstReg',
+        'clave': ['VivCal', 'VivNum'],
+        'normalizar': lambda calle, numero: [_compactar(calle), _compactar(numero)],
+        'padre': 'VivMunCod',
+        'foraneas': {'ZonCod_id': ZonaUrbana, 'TipVivCod_id': TipoVivienda},
+    },
+    'casa': {
+        'modelo': Casa,
+        'estado': 'CasEstReg',
+        'clave': ['VivCod_id', 'CasEsc', 'CasCodBlo', 'CasPla', 'CasNumPue'],
+        'normalizar': lambda viv_cod, *ubicacion: [viv_cod, *map(_compactar, ubicacion)],
+        'foraneas': {'VivCod_id': Vivienda, 'FamCod_id': Familia},
+    },
+    'propietario': {
+        'modelo': Propietario,
+        'estado': 'ProEstReg',
+        'foraneas': {'PerCod_id': Persona},
+    },
+    # Sin estado de registro: los huérfanos solo se informan
+    'pago': {
+        'modelo': PagoTributario,
+        'foraneas': {'CasCod_id': Casa},
+    },
+    'historial': {
+        'modelo': HistorialTributario,
+        'foraneas': {'CasCod_id': Casa},
+    },
+}
+
+# Contador -> (modelo, campo del contador, tabla de los registros contados)
+CONTADORES = {
+    'municipio': (Municipio, 'MunNumViv', 'vivienda'),
+    'familia': (Familia, 'FamNumInt', 'persona'),
+}
+
+
+class ConjuntoPks:
+    """Conjunto de claves primarias enteras como bytearray de bits: memoria de max(pk) / 8 bytes."""
+
+    def __init__(self):
+        self.bits = bytearray()
+
+    def agregar(self, pk):
+        byte = pk >> 3
+        if byte >= len(self.bits):
+            self.bits.extend(bytes(max(byte + 1 - len(self.bits), len(self.bits))))
+        self.bits[byte] |= 1 << (pk & 7)
+
+    def __contains__(self, pk):
+        byte = pk >> 3
+        return 0 <= byte < len(self.bits) and bool(self.bits[byte] >> (pk & 7) & 1)
+
+
+def _pks(modelo, tamano_lote):
+    conjunto = ConjuntoPks()
+    for pk in recorrer(modelo.objects.values_list('pk', flat=True), tamano_lote):
+        conjunto.agregar(pk)
+    return conjunto
+
+
+def _particion(clave, particiones):
+    return zlib.crc32(clave.encode()) % particiones
+
+
+def _agrupar_particion(ruta):
+    # Solo una partición en memoria a la vez
+    grupos = {}
+    with open(ruta, encoding='utf-8') as archivo:
+        for linea in archivo:
+            clave, pk, padre = json.loads(linea)
+            grupos.setdefault(clave, []).append((pk, padre))
+    for clave, filas in grupos.items():
+        if len(filas) > 1:
+            filas.sort()
+            yield json.loads(clave), filas
+
+
+def _contadores(nombre, ajustes, tamano_lote):
+    """Compara el contador guardado con la cuenta real, recorriendo ambos en orden de PK (merge join)."""
+    modelo, campo, tabla = CONTADORES[nombre]
+    config = TABLAS[tabla]
+    hijos = config['modelo'].objects.exclude(**{config['estado']: 'I'}).exclude(**{f"{config['padre']}__isnull": True})
+    cuentas = iter(hijos.values_list(config['padre']).order_by(config['padre']).annotate(cantidad=Count('pk')))
+    siguiente = next(cuentas, None)
+    deriva = {}
+    for pk, guardado in recorrer(modelo.objects.values_list('pk', campo), tamano_lote):
+        while siguiente is not None and siguiente[0] < pk:
+            siguiente = next(cuentas, None)
+        real = siguiente[1] if siguiente is not None and siguiente[0] == pk else 0
+        esperado = real - ajustes.get(pk, 0)
+        if guardado != esperado:
+            deriva[pk] = [guardado, esperado]
+    return deriva
+
+
+def auditar(particiones=64, tamano_lote=5000, progreso=None):
+    """
+    Recorre cada tabla una vez y devuelve el plan de corrección.
+
+    Las claves de duplicados se reparten por hash en `particiones` archivos temporales, que luego se
+    agrupan de a uno: la memoria depende del tamaño de una partición, no de la tabla.
+    """
+    plan = {'generado': timezone.now().isoformat(), 'duplicados': {}, 'huerfanos': {}, 'desactivar': {}, 'contadores': {}}
+    existentes = {}
+    ajustes = {tabla: Counter() for _, _, tabla in CONTADORES.values()}
+    with tempfile.TemporaryDirectory(prefix='auditoria_') as directorio:
+        for tabla, config in TABLAS.items():
+            for modelo in config['foraneas'].values():
+                if modelo not in existentes:
+                    existentes[modelo] = _pks(modelo, tamano_lote)
+            consulta = config['modelo'].objects.all()
+            if config.get('estado'):
+                # Lo ya desactivado no se vuelve a informar
+                consulta = consulta.exclude(**{config['estado']: 'I'})
+            clave = config.get('clave', [])
+            foraneas = list(config['foraneas'])
+            padre = [config['padre']] if config.get('padre') else []
+            archivos = [open(os.path.join(directorio, f"{tabla}_{i}.jsonl"), 'w', encoding='utf-8') for i in range(particiones)] if clave else []
+            huerfanos = {campo: [] for campo in foraneas}
+            filas = 0
+            try:
+                for fila in recorrer(consulta.values_list('pk', *clave, *foraneas, *padre), tamano_lote):
+                    filas += 1
+                    pk, valores = fila[0], fila[1:]
+                    valor_padre = valores[-1] if padre else None
+                    huerfana = False
+                    for campo, valor in zip(foraneas, valores[len(clave):]):
+                        if valor is not None and valor not in existentes[config['foraneas'][campo]]:
+                            huerfanos[campo].append(pk)
+                            huerfana = True
+                    if huerfana:
+                        if padre and valor_padre is not None:
+                            ajustes[tabla][valor_padre] += 1
+                        continue
+                    if clave:
+                        texto = json.dumps(config['normalizar'](*valores[:len(clave)]))
+                        archivos[_particion(texto, particiones)].write(json.dumps([texto, pk, valor_padre]) + '\n')
+            finally:
+                for archivo in archivos:
+                    archivo.close()
+
+            desactivar = sorted(pk for pks in huerfanos.values() for pk in pks) if config.get('estado') else []
+            grupos = []
+            for i in range(particiones if clave else 0):
+                for valor_clave, filas_grupo in _agrupar_particion(os.path.join(directorio, f"{tabla}_{i}.jsonl")):
+                    # Se conserva el registro más antiguo del grupo
+                    grupos.append({'clave': valor_clave, 'conservar': filas_grupo[0][0], 'desactivar': [pk for pk, _ in filas_grupo[1:]]})
+                    desactivar.extend(pk for pk, _ in filas_grupo[1:])
+                    for _, valor_padre in filas_grupo[1:]:
+                        if padre and valor_padre is not None:
+                            ajustes[tabla][valor_padre] += 1
+                os.remove(os.path.join(directorio, f"{tabla}_{i}.jsonl"))
+            if grupos:
+                plan['duplicados'][tabla] = sorted(grupos, key=lambda grupo: grupo['conservar'])
+            if any(huerfanos.values()):
+                plan['huerfanos'][tabla] = {campo.removesuffix('_id'): pks for campo, pks in huerfanos.items() if pks}
+            if desactivar:
+                plan['desactivar'][tabla] = sorted(set(desactivar))
+            if progreso:
+                progreso(tabla, filas, len(grupos), sum(map(len, huerfanos.values())))
+
+    for nombre, (_, _, tabla) in CONTADORES.items():
+        deriva = _contadores(nombre, ajustes[tabla], tamano_lote)
+        if deriva:
+            plan['contadores'][nombre] = deriva
+    return plan
+
+
+def aplicar_plan(plan, tamano_lote=1000):
+    """Desactiva (estado 'I') los registros del plan y recalcula los contadores con UPDATE en bloque."""
+    resultado = {}
+    with transaction.atomic():
+        for tabla, pks in plan.get('desactivar', {}).items():
+            config = TABLAS[tabla]
+            resultado[tabla] = 0
+            for inicio in range(0, len(pks), tamano_lote):
+                consulta = config['modelo'].objects.filter(pk__in=pks[inicio:inicio + tamano_lote]).exclude(**{config['estado']: 'I'})
+                resultado[tabla] += _actualizar_registrando(consulta, **{config['estado']: 'I'})
+        for nombre, deriva in plan.get('contadores', {}).items():
+            modelo, campo, tabla = CONTADORES[nombre]
+            config = TABLAS[tabla]
+            # Se recuenta al aplicar, no se copia el valor del plan: puede haber cambiado desde la auditoría
+            cuenta = config['modelo'].objects.filter(**{config['padre']: OuterRef('pk')}).exclude(**{config['estado']: 'I'}) \
+                .order_by().values(config['padre']).annotate(cantidad=Count('pk')).values('cantidad')
+            pks = [int(pk) for pk in deriva]
+            resultado[nombre] = 0
+            for inicio in range(0, len(pks), tamano_lote):
+                resultado[nombre] += _actualizar_registrando(
+                    modelo.objects.filter(pk__in=pks[inicio:inicio + tamano_lote]),
+                    **{campo: Coalesce(Subquery(cuenta, output_field=IntegerField()), 0)},
+                )
+    return resultado
@@ -0,0 +1,96 @@
+import json
+import os
+import zipfile
+
+from django.template.loader import render_to_string
+
+from .iteracion import por_lotes
+from .models import PagoTributario, Propietario, ZonaUrbana
+
+PLANTILLA = 'Municipio/aviso_tributario.html'
+ESTADOS = dict(PagoTributario.ESTADOS)
+CAMPOS = {
+    'PagTriCod': 'PagTriCod',
+    'PagTriFec': 'PagTriFec',
+    'PagTriCat': 'PagTriCat',
+    'PagTriPag': 'PagTriPag',
+    'PagTriEstReg': 'PagTriEstReg',
+    'CasCod': 'CasCod',
+    'FamCod': 'CasCod__FamCod',
+    'calle': 'CasCod__VivCod__VivCal',
+    'numero': 'CasCod__VivCod__VivNum',
+    'codigo_postal': 'CasCod__VivCod__VivCodPos',
+    'zona': 'CasCod__VivCod__ZonCod__ZonNom',
+    'municipio': 'CasCod__VivCod__ZonCod__MunCod__MunNom',
+}
+
+
+# Carpeta de los pagos de casas sin zona (CasZonCod NULL) y archivo con el avance de cada carpeta
+SIN_ZONA = 'sin_zona'
+MANIFIESTO = 'manifiesto.json'
+
+
+def carpeta_zona(zon_cod):
+    return SIN_ZONA if zon_cod is None else f"zona_{zon_cod}"
+
+
+def ruta_lote(directorio, zon_cod, primero, ultimo):
+    return os.path.join(directorio, carpeta_zona(zon_cod), f"avisos_{primero}_{ultimo}.zip")
+
+
+def leer_manifiesto(directorio):
+    """{carpeta: último PagTriCod con su aviso generado}; vacío si todavía no se generó nada."""
+    try:
+        with open(os.path.join(directorio, MANIFIESTO), encoding='utf-8') as archivo:
+            return json.load(archivo)
+    except FileNotFoundError:
+        return {}
+
+
+def escribir_manifiesto(directorio, manifiesto):
+    ruta = os.path.join(directorio, MANIFIESTO)
+    with open(f"{ruta}.tmp", 'w', encoding='utf-8') as archivo:
+        json.dump(manifiesto, archivo, indent=1, sort_keys=True)
+    os.replace(f"{ruta}.tmp", ruta)
+
+
+def lotes_por_zona(tamano_lote, manifiesto=None):
+    """
+    Genera (zona, avisos) con los datos ya unidos, recorriendo cada zona por PagTriCod.
+
+    Cada zona empieza después del PagTriCod que indique `manifiesto` para su carpeta. Los pagos de casas
+    sin zona van al final, con zona None.
+    """
+    manifiesto = manifiesto or {}
+    for zon_cod in [*ZonaUrbana.objects.order_by('ZonCod').values_list('ZonCod', flat=True), None]:
+        filtro = {'CasCod__CasZonCod': zon_cod} if zon_cod is not None else {'CasCod__CasZonCod__isnull': True}
+        pagos = PagoTributario.objects.filter(**filtro).values_list(*CAMPOS.values())
+        for lote in por_lotes(pagos, tamano_lote, desde=manifiesto.get(carpeta_zona(zon_cod))):
+            avisos = [dict(zip(CAMPOS, fila)) for fila in lote]
+            propietarios = dict(Propietario.objects.filter(
+                PerCod__FamCod__in={aviso['FamCod'] for aviso in avisos}
+            ).order_by('-ProCod').values_list('PerCod__FamCod', 'PerCod__PerNom'))
+            for aviso in avisos:
+                aviso['propietario'] = propietarios.get(aviso['FamCod'])
+            yield zon_cod, avisos
+
+
+def renderizar_lote(directorio, zon_cod, avisos, pdf=False):
+    """Escribe los avisos de un lote en su archivo zip; se ejecuta en un proceso del pool."""
+    destino = ruta_lote(directorio, zon_cod, avisos[0]['PagTriCod'], avisos[-1]['PagTriCod'])
+    os.makedirs(os.path.dirname(destino), exist_ok=True)
+    if pdf:
+        from weasyprint import HTML
+    temporal = f"{destino}.tmp"
+    with zipfile.ZipFile(temporal, 'w', compression=zipfile.ZIP_DEFLATED) as archivo:
+        for aviso in avisos:
+            aviso['anio'] = aviso['PagTriFec'].year
+            aviso['estado'] = ESTADOS.get(aviso['PagTriEstReg'], aviso['PagTriEstReg'])
+            html = render_to_string(PLANTILLA, {'aviso': aviso})
+            if pdf:
+                archivo.writestr(f"aviso_{aviso['CasCod']}.pdf", HTML(string=html).write_pdf())
+            else:
+                archivo.writestr(f"aviso_{aviso['CasCod']}.html", html)
+    # El zip solo aparece completo: un lote existente no se vuelve a generar al reanudar
+    os.replace(temporal, destino)
+    return len(avisos)
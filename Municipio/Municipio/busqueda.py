@@ -0,0 +1,147 @@
+from django.apps import apps
+from django.db import connection, transaction
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+from .iteracion import por_lotes
+from .models import IndiceBusqueda
+from .texto import CAMPOS_BUSQUEDA, normalizar, texto_busqueda
+
+TABLA = IndiceBusqueda._meta.db_table
+TABLA_FTS = f"{TABLA}_fts"
+# MySQL no indexa en FULLTEXT palabras más cortas que innodb_ft_min_token_size
+LONGITUD_MINIMA_FULLTEXT = 3
+
+
+def tipo_de(modelo):
+    for tipo, (nombre, _) in CAMPOS_BUSQUEDA.items():
+        if modelo.__name__ == nombre:
+            return tipo
+    return None
+
+
+def indexar(instancia):
+    tipo = tipo_de(type(instancia))
+    _, campos = CAMPOS_BUSQUEDA[tipo]
+    IndiceBusqueda.objects.update_or_create(
+        IndBusTip=tipo, IndBusPk=instancia.pk,
+        defaults={'IndBusTex': texto_busqueda(getattr(instancia, campo) for campo in campos)[:100]},
+    )
+
+
+def desindexar(modelo, pk):
+    IndiceBusqueda.objects.filter(IndBusTip=tipo_de(modelo), IndBusPk=pk).delete()
+
+
+def reindexar(tamano_lote=2000):
+    """Reconstruye el índice completo a partir de Persona, Familia y Vivienda."""
+    total = 0
+    with transaction.atomic():
+        IndiceBusqueda.objects.all().delete()
+        for tipo, (nombre, campos) in CAMPOS_BUSQUEDA.items():
+            modelo = apps.get_model('Municipio', nombre)
+            for lote in por_lotes(modelo.objects.values_list('pk', *campos), tamano_lote):
+                IndiceBusqueda.objects.bulk_create([
+                    IndiceBusqueda(IndBusTip=tipo, IndBusPk=fila[0], IndBusTex=texto_busqueda(fila[1:])[:100])
+                    for fila in lote
+                ])
+                total += len(lote)
+    return total
+
+
+def _fts5_disponible():
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s", [TABLA_FTS])
+        return cursor.fetchone() is not None
+
+
+def _ejecutar(sql_desde, parametros, sql_puntaje, parametros_puntaje, tipos, desplazamiento, limite):
+    if tipos:
+        sql_desde += " AND i.IndBusTip IN (%s)" % ", ".join(["%s"] * len(tipos))
+        parametros = [*parametros, *tipos]
+    with connection.cursor() as cursor:
+        cursor.execute(f"SELECT COUNT(*) {sql_desde}", parametros)
+        total = cursor.fetchone()[0]
+        cursor.execute(
+            f"SELECT i.IndBusTip, i.IndBusPk, i.IndBusTex, {sql_puntaje} AS puntaje {sql_desde} "
+            f"ORDER BY puntaje DESC, i.IndBusCod LIMIT %s OFFSET %s",
+            [*parametros_puntaje, *parametros, limite, desplazamiento],
+        )
+        return total, cursor.fetchall()
+
+
+def _usar_fulltext(palabras):
+    return connection.vendor == 'mysql' and min(map(len, palabras)) >= LONGITUD_MINIMA_FULLTEXT
+
+
+def _booleana(palabras):
+    return " ".join(f"+{palabra}*" for palabra in palabras)
+
+
+def _expresion_fts(palabras):
+    return " ".join(f'"{palabra}"*' for palabra in palabras)
+
+
+def _condicion_like(palabras):
+    # Búsqueda por prefijo de palabra con LIKE. Ninguna palabra usa el índice de IndBusTex: 'x%' podría, pero
+    # unido con OR a '% x%' obliga a recorrer la tabla. Solo se usa sin FULLTEXT ni FTS5, o con palabras más
+    # cortas que LONGITUD_MINIMA_FULLTEXT
+    condicion = Q()
+    for palabra in palabras:
+        condicion &= Q(IndBusTex__startswith=palabra) | Q(IndBusTex__contains=f" {palabra}")
+    return condicion
+
+
+def buscar(consulta, tipos=None, pagina=1, por_pagina=20):
+    """Busca registros cuyo texto contenga palabras que empiecen por cada palabra de la consulta.
+
+    Devuelve {'total', 'pagina', 'resultados': [{'tipo', 'pk', 'texto', 'puntaje'}]} ordenado por relevancia.
+    """
+    palabras = normalizar(consulta).split()
+    if not palabras:
+        return {'total': 0, 'pagina': pagina, 'resultados': []}
+    desplazamiento = (pagina - 1) * por_pagina
+    if _usar_fulltext(palabras):
+        booleana = _booleana(palabras)
+        coincidencia = "MATCH(i.IndBusTex) AGAINST (%s IN BOOLEAN MODE)"
+        total, filas = _ejecutar(
+            f"FROM `{TABLA}` i WHERE {coincidencia}", [booleana],
+            coincidencia, [booleana], tipos, desplazamiento, por_pagina,
+        )
+    elif connection.vendor == 'sqlite' and _fts5_disponible():
+        expresion = _expresion_fts(palabras)
+        # bm25() devuelve valores menores para los documentos más relevantes
+        total, filas = _ejecutar(
+            f"FROM {TABLA_FTS} JOIN {TABLA} i ON i.IndBusCod = {TABLA_FTS}.rowid WHERE {TABLA_FTS} MATCH %s", [expresion],
+            f"-bm25({TABLA_FTS})", [], tipos, desplazamiento, por_pagina,
+        )
+    else:
+        coincidencias = IndiceBusqueda.objects.filter(_condicion_like(palabras))
+        if tipos:
+            coincidencias = coincidencias.filter(IndBusTip__in=tipos)
+        total = coincidencias.count()
+        filas = [
+            (tipo, pk, texto, 1.0 if texto.startswith(palabras[0]) else 0.5)
+            for tipo, pk, texto in coincidencias.order_by('IndBusTex', 'IndBusCod')
+            .values_list('IndBusTip', 'IndBusPk', 'IndBusTex')[desplazamiento:desplazamiento + por_pagina]
+        ]
+    return {
+        'total': total,
+        'pagina': pagina,
+        'resultados': [{'tipo': tipo, 'pk': pk, 'texto': texto, 'puntaje': puntaje} for tipo, pk, texto, puntaje in filas],
+    }
+
+
+def coincidencias(consulta, tipos=None):
+    """Entradas del índice que coinciden con la consulta, sin orden ni límite, para usar como subconsulta."""
+    palabras = normalizar(consulta).split()
+    if not palabras:
+        return IndiceBusqueda.objects.none()
+    if _usar_fulltext(palabras):
+        entradas = IndiceBusqueda.objects.filter(pk__in=RawSQL(
+            f"SELECT IndBusCod FROM `{TABLA}` WHERE MATCH(IndBusTex) AGAINST (%s IN BOOLEAN MODE)", [_booleana(palabras)]))
+    elif connection.vendor == 'sqlite' and _fts5_disponible():
+        entradas = IndiceBusqueda.objects.filter(pk__in=RawSQL(
+            f"SELECT rowid FROM {TABLA_FTS} WHERE {TABLA_FTS} MATCH %s", [_expresion_fts(palabras)]))
+    else:
+        entradas = IndiceBusqueda.objects.filter(_condicion_like(palabras))
+    return entradas.filter(IndBusTip__in=tipos) if tipos else entradas
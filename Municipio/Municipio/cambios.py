@@ -0,0 +1,63 @@
+from datetime import timedelta
+
+from django.apps import apps
+from django.db.models import Max, Min, Q
+from django.utils import timezone
+from .models import CursorCambios, EventoCambio
+
+# EveCod se asigna al insertar, no al confirmar: una transacción que todavía no confirmó puede tener
+# un evento con EveCod menor que otro ya visible. Los eventos más recientes que este retraso no se
+# leen, para no avanzar el cursor por encima de uno que todavía no se ve.
+RETRASO = timedelta(seconds=30)
+
+
+def leer_cambios(consumidor, limite=1000, retraso=RETRASO):
+    """Siguiente lote de eventos posteriores al cursor del consumidor, dejando solo el último por registro.
+
+    El lote se corta en el primer evento con menos de `retraso` de antigüedad, así que una transacción
+    que tarde más que eso en confirmar puede perder sus eventos. Devuelve (eventos, posición); el cursor
+    no avanza hasta llamar a confirmar_cambios con esa posición.
+    """
+    cursor, _ = CursorCambios.objects.get_or_create(CurNom=consumidor)
+    corte = timezone.now() - retraso
+    eventos = []
+    for evento in EventoCambio.objects.filter(EveCod__gt=cursor.CurPos).order_by('EveCod')[:limite]:
+        if evento.EveFec > corte:
+            break
+        eventos.append(evento)
+    vigentes = {}
+    for evento in eventos:
+        clave = (evento.EveMod, evento.EvePk)
+        vigentes.pop(clave, None)  # Reinsertar para conservar el orden del último evento
+        vigentes[clave] = evento
+    posicion = eventos[-1].EveCod if eventos else cursor.CurPos
+    return list(vigentes.values()), posicion
+
+
+def confirmar_cambios(consumidor, posicion):
+    CursorCambios.objects.filter(CurNom=consumidor, CurPos__lt=posicion).update(CurPos=posicion)
+
+
+def cargar_registros(eventos):
+    # Estado actual de los registros guardados: una consulta por modelo
+    pks_por_modelo = {}
+    for evento in eventos:
+        if evento.EveOpe == EventoCambio.GUARDADO:
+            pks_por_modelo.setdefault(evento.EveMod, []).append(evento.EvePk)
+    registros = {}
+    for nombre, pks in pks_por_modelo.items():
+        modelo = apps.get_model('Municipio', nombre)
+        for fila in modelo.objects.filter(pk__in=pks).values():
+            registros[(nombre, fila[modelo._meta.pk.attname])] = fila
+    return registros
+
+
+def purgar_cambios():
+    """Borra los eventos ya leídos por todos los consumidores y los reemplazados por uno más reciente."""
+    # Un solo DELETE: se conserva el último evento de cada registro y, si hay cursores, lo que falta leer
+    ultimos = EventoCambio.objects.order_by().values('EveMod', 'EvePk').annotate(ultimo=Max('EveCod')).values('ultimo')
+    condicion = ~Q(EveCod__in=ultimos)
+    leidos = CursorCambios.objects.aggregate(minimo=Min('CurPos'))['minimo']
+    if leidos:
+        condicion |= Q(EveCod__lte=leidos)
+    return EventoCambio.objects.filter(condicion).delete()[0]
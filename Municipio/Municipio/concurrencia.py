@@ -0,0 +1,33 @@
+import random
+import time
+
+from django.db import transaction
+
+from .models import ConflictoVersion
+
+
+def reintentar(funcion, intentos=5, espera=0.05):
+    """
+    Ejecuta funcion() en su propia transacción y la repite si otra escritura ganó la carrera.
+
+    funcion debe volver a leer los registros que modifica: cada intento parte de la versión vigente.
+    """
+    for intento in range(1, intentos + 1):
+        try:
+            with transaction.atomic():
+                return funcion()
+        except ConflictoVersion:
+            if intento == intentos:
+                raise
+            # Espera exponencial con variación para no chocar de nuevo con el mismo escritor
+            time.sleep(espera * 2 ** (intento - 1) * random.uniform(0.5, 1.5))
+
+
+def modificar(modelo, pk, cambio, intentos=5, espera=0.05):
+    """Carga el registro, le aplica cambio(instancia) y lo guarda, reintentando ante ConflictoVersion."""
+    def aplicar():
+        instancia = modelo.objects.get(pk=pk)
+        cambio(instancia)
+        instancia.save()
+        return instancia
+    return reintentar(aplicar, intentos, espera)
@@ -0,0 +1,165 @@
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Case, Count, IntegerField, Q, Sum, Value, When
+
+from .models import Casa, EstadisticaCasa, EstadisticaVivienda, Vivienda, _incrementar
+
+# Modelo -> campos que determinan su aporte a las estadísticas
+CAMPOS = {
+    Vivienda: ['ZonCod_id', 'VivEstReg', 'TipVivCod_id', 'VivOcu'],
+    Casa: ['CasZonCod', 'CasEstReg', 'CasMet'],
+}
+
+
+def _aporte(modelo, fila):
+    """(clave, (cantidad, valor)) de una fila, o None si no se asigna a ninguna zona."""
+    if modelo is Vivienda:
+        zon_cod, estado, tip_viv_cod, ocupada = fila
+        return (zon_cod, estado, tip_viv_cod), (1, int(ocupada == 'S'))
+    zon_cod, estado, metros = fila
+    if zon_cod is None:
+        return None
+    return (zon_cod, estado, EstadisticaCasa.cubeta(metros)), (1, Decimal(metros))
+
+
+def leer(modelo, pks):
+    """Filas actuales de los registros, para pasarlas luego como `anteriores` a aplicar()."""
+    if modelo not in CAMPOS or not pks:
+        return []
+    return list(modelo.objects.filter(pk__in=pks).values_list(*CAMPOS[modelo]))
+
+
+def fila(instancia):
+    return tuple(getattr(instancia, campo) for campo in CAMPOS[type(instancia)])
+
+
+def _ajustar(modelo, clave, cantidad, valor):
+    # Solo se crea la fila al sumar registros: al borrar una zona, sus filas ya no existen
+    if modelo is Vivienda:
+        zon_cod, estado, tip_viv_cod = clave
+        _incrementar(EstadisticaVivienda, {'ZonCod_id': zon_cod, 'EstVivEstReg': estado, 'TipVivCod_id': tip_viv_cod},
+                     crear=cantidad > 0, EstVivCan=cantidad, EstVivOcu=valor)
+    else:
+        zon_cod, estado, cubeta = clave
+        _incrementar(EstadisticaCasa, {'ZonCod_id': zon_cod, 'EstCasEstReg': estado, 'EstCasCub': cubeta},
+                     crear=cantidad > 0, EstCasCan=cantidad, EstCasMet=valor)
+
+
+def aplicar(modelo, anteriores, actuales):
+    """Resta el aporte de las filas anteriores y suma el de las actuales, con un UPDATE por clave afectada."""
+    if modelo not in CAMPOS:
+        return
+    deltas = {}
+    for filas, signo in ((anteriores, -1), (actuales, 1)):
+        for valores in filas:
+            aporte = _aporte(modelo, valores)
+            if aporte is None:
+                continue
+            clave, (cantidad, valor) = aporte
+            total = deltas.setdefault(clave, [0, 0])
+            total[0] += signo * cantidad
+            total[1] += signo * valor
+    with transaction.atomic():
+        for clave, (cantidad, valor) in deltas.items():
+            if cantidad or valor:
+                _ajustar(modelo, clave, cantidad, valor)
+
+
+def _filtro(prefijo, nivel, codigo, estado):
+    filtro = Q(ZonCod=codigo) if nivel == 'zona' else Q(ZonCod__MunCod=codigo)
+    if estado is not None:
+        filtro &= Q(**{f'{prefijo}EstReg': estado})
+    return filtro
+
+
+def ocupacion(nivel, codigo, estado='A'):
+    """Viviendas, ocupadas, tasa de ocupación y mezcla de tipos de una zona o municipio."""
+    filas = EstadisticaVivienda.objects.filter(_filtro('EstViv', nivel, codigo, estado)) \
+        .values_list('TipVivCod__TipVivDes').annotate(cantidad=Sum('EstVivCan'), ocupadas=Sum('EstVivOcu')).order_by('TipVivCod__TipVivDes')
+    tipos = {tipo: cantidad for tipo, cantidad, _ in filas if cantidad}
+    viviendas = sum(cantidad for _, cantidad, _ in filas)
+    ocupadas = sum(ocupadas for _, _, ocupadas in filas)
+    return {
+        'viviendas': viviendas,
+        'ocupadas': ocupadas,
+        'tasa': (Decimal(ocupadas * 100) / viviendas).quantize(Decimal('0.01')) if viviendas else None,
+        'tipos': tipos,
+    }
+
+
+def superficie(nivel, codigo, estado='A'):
+    """Casas, superficie media y histograma de CasMet de una zona o municipio."""
+    filas = dict((cubeta, (cantidad, metros)) for cubeta, cantidad, metros in EstadisticaCasa.objects.filter(
+        _filtro('EstCas', nivel, codigo, estado)).values_list('EstCasCub').annotate(cantidad=Sum('EstCasCan'), metros=Sum('EstCasMet')).order_by())
+    casas = sum(cantidad for cantidad, _ in filas.values())
+    metros = sum((Decimal(metros) for _, metros in filas.values()), Decimal(0))
+    limites = [None, *EstadisticaCasa.CUBETAS, None]
+    return {
+        'casas': casas,
+        'media': (metros / casas).quantize(Decimal('0.01')) if casas else None,
+        'histograma': [
+            {'desde': limites[cubeta], 'hasta': limites[cubeta + 1], 'casas': filas.get(cubeta, (0, 0))[0]}
+            for cubeta in range(len(EstadisticaCasa.CUBETAS) + 1)
+        ],
+    }
+
+
+def _cubeta_sql():
+    return Case(*[When(CasMet__lt=limite, then=Value(i)) for i, limite in enumerate(EstadisticaCasa.CUBETAS)],
+                default=Value(len(EstadisticaCasa.CUBETAS)), output_field=IntegerField())
+
+
+def calcular():
+    """Estadísticas recalculadas desde cero con GROUP BY, en el formato {clave: (cantidad, valor)}."""
+    viviendas = {
+        (zon_cod, estado, tip_viv_cod): (cantidad, ocupadas)
+        for zon_cod, estado, tip_viv_cod, cantidad, ocupadas in Vivienda.objects.values_list('ZonCod', 'VivEstReg', 'TipVivCod')
+        .annotate(cantidad=Count('pk'), ocupadas=Count('pk', filter=Q(VivOcu='S'))).order_by()
+    }
+    casas = {
+        (zon_cod, estado, cubeta): (cantidad, Decimal(metros))
+        for zon_cod, estado, cubeta, cantidad, metros in Casa.objects.exclude(CasZonCod=None).annotate(cubeta=_cubeta_sql())
+        .values_list('CasZonCod', 'CasEstReg', 'cubeta').annotate(cantidad=Count('pk'), metros=Sum('CasMet')).order_by()
+    }
+    return viviendas, casas
+
+
+def guardadas():
+    viviendas = {
+        (zon_cod, estado, tip_viv_cod): (cantidad, ocupadas)
+        for zon_cod, estado, tip_viv_cod, cantidad, ocupadas in EstadisticaVivienda.objects.values_list(
+            'ZonCod', 'EstVivEstReg', 'TipVivCod', 'EstVivCan', 'EstVivOcu') if cantidad or ocupadas
+    }
+    casas = {
+        (zon_cod, estado, cubeta): (cantidad, Decimal(metros))
+        for zon_cod, estado, cubeta, cantidad, metros in EstadisticaCasa.objects.values_list(
+            'ZonCod', 'EstCasEstReg', 'EstCasCub', 'EstCasCan', 'EstCasMet') if cantidad or metros
+    }
+    return viviendas, casas
+
+
+def verificar():
+    """Diferencias {tabla: {clave: (guardado, calculado)}} entre lo mantenido y un recálculo completo."""
+    diferencias = {}
+    for tabla, guardado, calculado in zip(('vivienda', 'casa'), guardadas(), calcular()):
+        distintas = {clave: (guardado.get(clave), calculado.get(clave)) for clave in guardado.keys() | calculado.keys()
+                     if guardado.get(clave) != calculado.get(clave)}
+        if distintas:
+            diferencias[tabla] = distintas
+    return diferencias
+
+
+def reconstruir():
+    viviendas, casas = calcular()
+    with transaction.atomic():
+        EstadisticaVivienda.objects.all().delete()
+        EstadisticaCasa.objects.all().delete()
+        EstadisticaVivienda.objects.bulk_create([
+            EstadisticaVivienda(ZonCod_id=zon_cod, EstVivEstReg=estado, TipVivCod_id=tip_viv_cod, EstVivCan=cantidad, EstVivOcu=ocupadas)
+            for (zon_cod, estado, tip_viv_cod), (cantidad, ocupadas) in viviendas.items()
+        ])
+        EstadisticaCasa.objects.bulk_create([
+            EstadisticaCasa(ZonCod_id=zon_cod, EstCasEstReg=estado, EstCasCub=cubeta, EstCasCan=cantidad, EstCasMet=metros)
+            for (zon_cod, estado, cubeta), (cantidad, metros) in casas.items()
+        ])
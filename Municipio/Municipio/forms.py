@@ -0,0 +1,28 @@
+from django import forms
+
+from .models import ConflictoVersion
+
+
+class VersionadoForm(forms.ModelForm):
+    """Formulario de modelos con VersionadoMixin: guarda con la versión que se leyó al abrir la edición."""
+    version = forms.IntegerField(widget=forms.HiddenInput, required=False)
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.campo_version = self._meta.model.CAMPO_VERSION
+        self.fields['version'].initial = getattr(self.instance, self.campo_version)
+
+    def clean(self):
+        cleaned_data = super().clean()
+        version = cleaned_data.get('version')
+        if self.instance.pk is None or version is None:
+            return cleaned_data
+        # Aviso temprano; el UPDATE condicionado de save() cubre la carrera restante
+        actual = type(self.instance).objects.filter(pk=self.instance.pk).values_list(self.campo_version, flat=True).first()
+        if actual is not None and actual != version:
+            raise ConflictoVersion(
+                "Otro usuario o proceso modificó este registro mientras lo editaba. Recargue la página para ver los cambios.",
+                code='conflicto_version',
+            )
+        setattr(self.instance, self.campo_version, version)
+        return cleaned_data
@@ -0,0 +1,149 @@
+import math
+import multiprocessing
+import time
+import traceback
+from collections import Counter, namedtuple
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import django
+from django.core.exceptions import ValidationError
+from django.db import connections
+from django.db.models import Count, Sum
+
+from .concurrencia import modificar
+from .iteracion import recorrer
+from .models import Casa, ConflictoVersion, PagoTributario, Vivienda
+
+# Unidad de trabajo: un municipio completo (zonas=None) o un grupo de sus zonas
+Fragmento = namedtuple('Fragmento', ['municipio', 'zonas', 'viviendas'])
+
+
+def _filtrar(queryset, fragmento, campo_municipio, campo_zona):
+    queryset = queryset.filter(**{campo_municipio: fragmento.municipio})
+    if fragmento.zonas is not None:
+        queryset = queryset.filter(**{f'{campo_zona}__in': fragmento.zonas})
+    return queryset
+
+
+def viviendas(fragmento):
+    return _filtrar(Vivienda.objects.all(), fragmento, 'VivMunCod', 'ZonCod')
+
+
+def casas(fragmento):
+    return _filtrar(Casa.objects.all(), fragmento, 'CasMunCod', 'CasZonCod')
+
+
+def pagos(fragmento):
+    return _filtrar(PagoTributario.objects.all(), fragmento, 'CasCod__CasMunCod', 'CasCod__CasZonCod')
+
+
+def planificar(procesos, municipios=None, limite=None):
+    """
+    Fragmentos ordenados de mayor a menor cantidad de viviendas.
+
+    Un municipio con más viviendas que `limite` (por defecto la mitad de lo que le toca a cada proceso)
+    se divide en grupos de zonas, para que no quede un solo proceso trabajando al final.
+    """
+    conteos = Vivienda.objects.exclude(VivMunCod__isnull=True)
+    if municipios:
+        conteos = conteos.filter(VivMunCod__in=municipios)
+    por_zona = {}
+    for mun_cod, zon_cod, cantidad in conteos.values_list('VivMunCod', 'ZonCod').annotate(cantidad=Count('pk')).order_by('VivMunCod', 'ZonCod'):
+        por_zona.setdefault(mun_cod, []).append((zon_cod, cantidad))
+    total = sum(cantidad for zonas in por_zona.values() for _, cantidad in zonas)
+    if limite is None:
+        limite = max(math.ceil(total / (2 * max(procesos, 1))), 1)
+
+    fragmentos = []
+    for mun_cod, zonas in por_zona.items():
+        if sum(cantidad for _, cantidad in zonas) <= limite:
+            fragmentos.append(Fragmento(mun_cod, None, sum(cantidad for _, cantidad in zonas)))
+            continue
+        # Zonas de mayor a menor, cada una al grupo con menos viviendas que todavía tenga lugar
+        grupos = []
+        for zon_cod, cantidad in sorted(zonas, key=lambda zona: -zona[1]):
+            destino = min((grupo for grupo in grupos if grupo[1] + cantidad <= limite), key=lambda grupo: grupo[1], default=None)
+            if destino is None:
+                destino = [[], 0]
+                grupos.append(destino)
+            destino[0].append(zon_cod)
+            destino[1] += cantidad
+        if len(grupos) == 1:
+            # Una sola zona más grande que el límite: no hay nada que dividir
+            fragmentos.append(Fragmento(mun_cod, None, grupos[0][1]))
+        else:
+            fragmentos.extend(Fragmento(mun_cod, tuple(sorted(zonas_grupo)), cantidad) for zonas_grupo, cantidad in grupos)
+    # Longest processing time first: los fragmentos grandes se reparten primero entre los procesos
+    return sorted(fragmentos, key=lambda fragmento: -fragmento.viviendas)
+
+
+def _ejecutar_fragmento(tarea, fragmento, parametros):
+    # Se ejecuta en el proceso trabajador: los errores vuelven como texto para no perder el resto
+    inicio = time.perf_counter()
+    try:
+        return fragmento, tarea(fragmento, **parametros), None, time.perf_counter() - inicio
+    except Exception:
+        return fragmento, None, traceback.format_exc(), time.perf_counter() - inicio
+    finally:
+        connections.close_all()
+
+
+def ejecutar(tarea, fragmentos, procesos, progreso=None, **parametros):
+    """
+    Ejecuta tarea(fragmento, **parametros) para cada fragmento en un pool de procesos.
+
+    `tarea` debe ser una función de nivel de módulo que devuelva un diccionario de conteos. Devuelve
+    (totales por municipio, errores [(fragmento, traza)], segundos de trabajo por fragmento).
+    """
+    totales, errores, tiempos = {}, [], {}
+    # Procesos nuevos ('spawn') que solo cargan Django: cada uno abre su propia conexión a la base
+    contexto = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max(procesos, 1), mp_context=contexto, initializer=django.setup) as pool:
+        futuros = [pool.submit(_ejecutar_fragmento, tarea, fragmento, parametros) for fragmento in fragmentos]
+        for futuro in as_completed(futuros):
+            fragmento, resultado, error, segundos = futuro.result()
+            tiempos[fragmento] = segundos
+            if error:
+                errores.append((fragmento, error))
+            else:
+                totales.setdefault(fragmento.municipio, Counter()).update(resultado)
+            if progreso:
+                progreso(fragmento, resultado, error, segundos)
+    return {mun_cod: dict(conteos) for mun_cod, conteos in sorted(totales.items())}, errores, tiempos
+
+
+# Tareas disponibles para el comando procesar_municipios
+
+def recalcular_pagos(fragmento, tamano_lote=500):
+    """Vuelve a guardar cada pago para recalcular categoría y monto con el ingreso vigente."""
+    resultado = Counter(pagos=0, modificados=0, sin_propietario=0, invalidos=0, conflictos=0)
+    for pk, monto in recorrer(pagos(fragmento).values_list('pk', 'PagTriPag'), tamano_lote):
+        resultado['pagos'] += 1
+        try:
+            # Con reintentos: el admin puede estar editando el mismo pago
+            pago = modificar(PagoTributario, pk, lambda pago: None)
+        except ConflictoVersion:
+            resultado['conflictos'] += 1
+            continue
+        except ValidationError as error:
+            # Solo la falta de propietario; otro error de validación es un dato a revisar
+            resultado['sin_propietario' if getattr(error, 'code', None) == 'sin_propietario' else 'invalidos'] += 1
+            continue
+        resultado['modificados'] += pago.PagTriPag != monto
+    return dict(resultado)
+
+
+def resumir_pagos(fragmento):
+    """Cantidad de pagos y montos por estado."""
+    resultado = {'casas': casas(fragmento).count()}
+    for estado, cantidad, monto in pagos(fragmento).values_list('PagTriEstReg').annotate(cantidad=Count('pk'), monto=Sum('PagTriPag')).order_by():
+        estado = estado.replace(' ', '_')
+        resultado[f'pagos_{estado}'] = cantidad
+        resultado[f'monto_{estado}'] = monto
+    return resultado
+
+
+TAREAS = {
+    'recalcular-pagos': recalcular_pagos,
+    'resumir-pagos': resumir_pagos,
+}
@@ -0,0 +1,57 @@
+from django.db import transaction
+from django.db.models.query import FlatValuesListIterable, ModelIterable, ValuesIterable
+
+
+def _clave(queryset):
+    # Cómo obtener la PK de cada fila según el tipo de queryset
+    if issubclass(queryset._iterable_class, ModelIterable):
+        return lambda fila: fila.pk
+    if issubclass(queryset._iterable_class, ValuesIterable):
+        nombre = 'pk' if 'pk' in queryset._fields else queryset.model._meta.pk.attname
+        if queryset._fields and nombre not in queryset._fields:
+            raise ValueError("values() debe incluir la clave primaria para recorrerlo por lotes.")
+        return lambda fila: fila[nombre]
+    # values_list(): la PK debe ser la primera columna
+    if queryset._fields and queryset._fields[0] not in ('pk', queryset.model._meta.pk.name, queryset.model._meta.pk.attname):
+        raise ValueError("values_list() debe empezar por la clave primaria para recorrerlo por lotes.")
+    if issubclass(queryset._iterable_class, FlatValuesListIterable):
+        return lambda fila: fila
+    return lambda fila: fila[0]
+
+
+def por_lotes(queryset, tamano_lote=1000, select_related=None, desde=None, transaccion=False):
+    """
+    Recorre `queryset` en lotes (listas) por su PK ascendente, con paginación por clave.
+
+    Cada lote es un "WHERE pk > último ORDER BY pk LIMIT n" sobre el índice de la PK: no hay OFFSET
+    ni cursor abierto entre lotes. `desde` indica la PK a partir de la cual empezar (excluida).
+    Con `transaccion`, cada lote se entrega dentro de su propia transacción, que se confirma al
+    pedir el lote siguiente; si el recorrido se interrumpe, el lote en curso se revierte.
+    """
+    if queryset.query.is_sliced:
+        raise ValueError("No se puede recorrer por lotes un queryset con LIMIT/OFFSET.")
+    if select_related:
+        queryset = queryset.select_related(*select_related)
+    queryset = queryset.order_by('pk')
+    clave = _clave(queryset)
+    ultimo = desde
+    while True:
+        consulta = queryset if ultimo is None else queryset.filter(pk__gt=ultimo)
+        if transaccion:
+            with transaction.atomic(using=queryset.db):
+                lote = list(consulta[:tamano_lote])
+                if lote:
+                    yield lote
+        else:
+            lote = list(consulta[:tamano_lote])
+            if lote:
+                yield lote
+        if len(lote) < tamano_lote:
+            return
+        ultimo = clave(lote[-1])
+
+
+def recorrer(queryset, tamano_lote=1000, select_related=None, desde=None):
+    """Las filas de `queryset` una a una, leídas con por_lotes()."""
+    for lote in por_lotes(queryset, tamano_lote, select_related, desde):
+        yield from lote
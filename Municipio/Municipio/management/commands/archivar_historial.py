@@ -0,0 +1,26 @@
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from Municipio.particiones import archivar_anio, preparar_particion, tabla_archivo
+
+
+class Command(BaseCommand):
+    help = "Archiva las tasaciones de un año fiscal cerrado o prepara la partición de un año nuevo."
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument('anio', type=int, help="Año fiscal")
+        parser.add_argument('--preparar', action='store_true', help="Crear la partición del año en lugar de archivarlo")
+
+    def handle(self, *args, **options):
+        anio = options['anio']
+        if options['preparar']:
+            if preparar_particion(anio):
+                self.stdout.write(self.style.SUCCESS(f"Partición p{anio} creada."))
+            else:
+                self.stdout.write(f"No se requiere crear la partición p{anio}.")
+            return
+        try:
+            cantidad = archivar_anio(anio)
+        except ValidationError as exc:
+            raise CommandError(exc.messages[0])
+        self.stdout.write(self.style.SUCCESS(f"{cantidad} tasaciones de {anio} archivadas en {tabla_archivo(anio)}."))
@@ -0,0 +1,43 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.core.serializers.json import DjangoJSONEncoder
+from Municipio.auditoria import aplicar_plan, auditar
+
+
+class Command(BaseCommand):
+    help = "Busca duplicados, huérfanos y contadores desfasados y escribe un plan de corrección en JSON."
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument('--plan', help="Archivo donde escribir el plan (por defecto, la salida estándar)")
+        parser.add_argument('--aplicar', metavar='PLAN', help="Aplicar un plan generado antes en lugar de auditar")
+        parser.add_argument('--particiones', type=int, default=64, help="Archivos temporales por tabla para agrupar por hash")
+        parser.add_argument('--lote', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        if options['aplicar']:
+            try:
+                with open(options['aplicar'], encoding='utf-8') as archivo:
+                    plan = json.load(archivo)
+            except (OSError, ValueError) as exc:
+                raise CommandError(f"No se pudo leer el plan: {exc}")
+            for nombre, cantidad in aplicar_plan(plan).items():
+                self.stderr.write(f"{nombre}: {cantidad} registros actualizados")
+            return
+
+        def progreso(tabla, filas, duplicados, huerfanos):
+            self.stderr.write(f"{tabla}: {filas} filas, {duplicados} grupos duplicados, {huerfanos} huérfanos")
+
+        inicio = time.perf_counter()
+        plan = auditar(options['particiones'], options['lote'], progreso)
+        for nombre, deriva in plan['contadores'].items():
+            self.stderr.write(f"{nombre}: {len(deriva)} contadores desfasados")
+        texto = json.dumps(plan, cls=DjangoJSONEncoder, indent=1)
+        if options['plan']:
+            with open(options['plan'], 'w', encoding='utf-8') as archivo:
+                archivo.write(texto)
+        else:
+            self.stdout.write(texto)
+        self.stderr.write(f"Auditoría en {time.perf_counter() - inicio:.1f} s")
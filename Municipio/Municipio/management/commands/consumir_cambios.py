@@ -0,0 +1,41 @@
+import json
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.core.serializers.json import DjangoJSONEncoder
+from Municipio.cambios import RETRASO, cargar_registros, confirmar_cambios, leer_cambios, purgar_cambios
+
+
+class Command(BaseCommand):
+    help = "Emite como líneas JSON los cambios pendientes para un consumidor y avanza su cursor."
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument('consumidor', nargs='?', help="Nombre del sistema que consume los cambios")
+        parser.add_argument('--lote', type=int, default=1000)
+        parser.add_argument('--retraso', type=float, default=RETRASO.total_seconds(),
+                            help="Segundos de antigüedad mínima de los eventos leídos, para esperar a las transacciones en curso")
+        parser.add_argument('--todo', action='store_true', help="Leer lotes hasta agotar los cambios pendientes")
+        parser.add_argument('--purgar', action='store_true', help="Borrar eventos ya leídos por todos o reemplazados")
+
+    def handle(self, *args, **options):
+        if options['purgar']:
+            self.stderr.write(f"{purgar_cambios()} eventos purgados.")
+        consumidor = options['consumidor']
+        if not consumidor:
+            return
+        while True:
+            eventos, posicion = leer_cambios(consumidor, options['lote'], timedelta(seconds=options['retraso']))
+            registros = cargar_registros(eventos)
+            for evento in eventos:
+                self.stdout.write(json.dumps({
+                    'evento': evento.EveCod,
+                    'modelo': evento.EveMod,
+                    'pk': evento.EvePk,
+                    'operacion': evento.EveOpe,
+                    'datos': registros.get((evento.EveMod, evento.EvePk)),
+                }, cls=DjangoJSONEncoder))
+            # Confirmar después de emitir: entrega al menos una vez
+            confirmar_cambios(consumidor, posicion)
+            if not eventos or not options['todo']:
+                break
@@ -0,0 +1,29 @@
+import time
+
+from django.core.management.base import BaseCommand
+from Municipio.presupuesto import IMPORTES, NIVELES, ejecucion_presupuestaria
+
+
+class Command(BaseCommand):
+    help = "Compara el presupuesto anual de cada municipio con lo recaudado, pendiente y adeudado."
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument('--nivel', choices=NIVELES, default='municipio')
+        parser.add_argument('--anio', type=int, help="Solo pagos emitidos en este año")
+
+    def handle(self, *args, **options):
+        inicio = time.perf_counter()
+        filas = ejecucion_presupuestaria(options['nivel'], options['anio'])
+        duracion = time.perf_counter() - inicio
+
+        claves = {'municipio': ['municipio', 'nombre'], 'zona': ['municipio', 'zona', 'nombre'], 'categoria': ['municipio', 'nombre', 'categoria']}[options['nivel']]
+        importes = ['emitido', *IMPORTES.values()]
+        if options['nivel'] == 'municipio':
+            importes = ['presupuesto', *importes, 'ejecucion']
+        self.stdout.write(" ".join([f"{clave:>10}" for clave in claves] + [f"{importe:>14}" for importe in ['pagos', *importes]]))
+        for fila in filas:
+            valores = [f"{'-' if fila[clave] is None else fila[clave]:>10}" for clave in claves]
+            valores += [f"{'-' if fila[importe] is None else fila[importe]:>14}" for importe in ['pagos', *importes]]
+            self.stdout.write(" ".join(valores))
+        self.stdout.write(f"{len(filas)} filas en {duracion * 1000:.1f} ms")
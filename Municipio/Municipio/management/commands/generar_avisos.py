@@ -0,0 +1,77 @@
+import importlib.util
+import multiprocessing
+import os
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+from Municipio.avisos import (SIN_ZONA, carpeta_zona, escribir_manifiesto, leer_manifiesto, lotes_por_zona,
+                              renderizar_lote, ruta_lote)
+
+
+class Command(BaseCommand):
+    help = "Genera un aviso tributario por casa en archivos zip por zona, renderizando en varios procesos."
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument('directorio', help="Directorio de salida")
+        parser.add_argument('--procesos', type=int, default=os.cpu_count())
+        parser.add_argument('--lote', type=int, default=500, help="Avisos por archivo zip")
+        parser.add_argument('--pdf', action='store_true', help="Generar PDF (requiere weasyprint)")
+
+    def avanzar_manifiesto(self, directorio, manifiesto, enviados):
+        # Los lotes terminan en cualquier orden: cada carpeta avanza hasta su último lote terminado sin huecos
+        avanzo = False
+        for carpeta, cola in enviados.items():
+            while cola and (cola[0][0] is None or cola[0][0].done()):
+                futuro, ultimo = cola.popleft()
+                if futuro is not None:
+                    futuro.result()  # Un lote fallido detiene el avance de su carpeta
+                manifiesto[carpeta] = ultimo
+                avanzo = True
+        if avanzo:
+            escribir_manifiesto(directorio, manifiesto)
+
+    def handle(self, *args, **options):
+        if options['pdf'] and importlib.util.find_spec('weasyprint') is None:
+            raise CommandError("La opción --pdf requiere el paquete weasyprint.")
+        directorio, procesos = options['directorio'], max(options['procesos'] or 1, 1)
+        os.makedirs(directorio, exist_ok=True)
+        manifiesto = leer_manifiesto(directorio)
+        enviados = {}
+        generados = omitidos = sin_zona = 0
+        inicio = time.perf_counter()
+        # Procesos nuevos ('spawn') que solo cargan Django: no heredan conexiones a la base
+        contexto = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(procesos, mp_context=contexto, initializer=django.setup) as pool:
+            pendientes = set()
+            # Las zonas del manifiesto se retoman después de su último PagTriCod, sin volver a leer lo anterior
+            for zon_cod, avisos in lotes_por_zona(options['lote'], manifiesto):
+                cola = enviados.setdefault(carpeta_zona(zon_cod), deque())
+                if zon_cod is None:
+                    sin_zona += len(avisos)
+                if os.path.exists(ruta_lote(directorio, zon_cod, avisos[0]['PagTriCod'], avisos[-1]['PagTriCod'])):
+                    omitidos += len(avisos)  # Terminado en una ejecución anterior después del último punto guardado
+                    cola.append((None, avisos[-1]['PagTriCod']))
+                    continue
+                # Limitar los lotes en vuelo para no acumular en memoria toda la ciudad
+                if len(pendientes) >= 2 * procesos:
+                    listos, pendientes = wait(pendientes, return_when=FIRST_COMPLETED)
+                    generados += sum(futuro.result() for futuro in listos)
+                    self.avanzar_manifiesto(directorio, manifiesto, enviados)
+                futuro = pool.submit(renderizar_lote, directorio, zon_cod, avisos, options['pdf'])
+                pendientes.add(futuro)
+                cola.append((futuro, avisos[-1]['PagTriCod']))
+            generados += sum(futuro.result() for futuro in wait(pendientes).done)
+            self.avanzar_manifiesto(directorio, manifiesto, enviados)
+        segundos = time.perf_counter() - inicio
+        self.stdout.write(self.style.SUCCESS(
+            f"{generados} avisos generados ({omitidos} ya existían) en {segundos:.1f} s: "
+            f"{generados / segundos if segundos else 0:.0f} avisos/s con {procesos} procesos"
+        ))
+        if sin_zona:
+            self.stdout.write(self.style.WARNING(
+                f"{sin_zona} avisos de casas sin zona (CasZonCod vacío) en {os.path.join(directorio, SIN_ZONA)}"
+            ))
@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from Municipio.zonas import reconstruir
+
+
+class Command(BaseCommand):
+    help = "Recalcula la adyacencia zona-código postal y los mapas de ocupación por zona."
+    requires_system_checks = []
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.SUCCESS(f"{reconstruir()} zonas indexadas."))
@@ -0,0 +1,39 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from Municipio.fragmentos import TAREAS, ejecutar, planificar
+
+
+class Command(BaseCommand):
+    help = "Ejecuta una tarea por municipio (o grupo de zonas) en varios procesos y combina los resultados."
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument('tarea', choices=sorted(TAREAS))
+        parser.add_argument('--procesos', type=int, default=os.cpu_count())
+        parser.add_argument('--municipios', nargs='+', type=int, help="Solo estos MunCod")
+        parser.add_argument('--limite', type=int, help="Viviendas a partir de las cuales un municipio se divide por zonas")
+
+    def handle(self, *args, **options):
+        procesos = max(options['procesos'] or 1, 1)
+        fragmentos = planificar(procesos, options['municipios'], options['limite'])
+        self.stderr.write(f"{len(fragmentos)} fragmentos, {sum(f.viviendas for f in fragmentos)} viviendas, {procesos} procesos")
+
+        def progreso(fragmento, resultado, error, segundos):
+            zonas = 'todas' if fragmento.zonas is None else ','.join(map(str, fragmento.zonas))
+            estado = 'ERROR' if error else 'ok'
+            self.stderr.write(f"  municipio {fragmento.municipio} zonas {zonas}: {estado} en {segundos:.1f} s")
+
+        inicio = time.perf_counter()
+        totales, errores, tiempos = ejecutar(TAREAS[options['tarea']], fragmentos, procesos, progreso)
+        segundos = time.perf_counter() - inicio
+
+        for mun_cod, conteos in totales.items():
+            self.stdout.write(f"{mun_cod}\t" + "\t".join(f"{clave}={valor}" for clave, valor in sorted(conteos.items())))
+        for fragmento, traza in errores:
+            self.stderr.write(self.style.ERROR(f"municipio {fragmento.municipio} zonas {fragmento.zonas}:\n{traza}"))
+        trabajo = sum(tiempos.values())
+        self.stderr.write(f"{segundos:.1f} s de reloj, {trabajo:.1f} s de trabajo (aceleración {trabajo / segundos if segundos else 0:.1f}x)")
+        if errores:
+            raise CommandError(f"{len(errores)} de {len(fragmentos)} fragmentos fallaron.")
@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from Municipio.busqueda import reindexar
+
+
+class Command(BaseCommand):
+    help = "Reconstruye el índice de búsqueda de personas, familias y viviendas."
+    requires_system_checks = []
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.SUCCESS(f"{reindexar()} registros indexados."))
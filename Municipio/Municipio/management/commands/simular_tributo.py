@@ -0,0 +1,33 @@
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from Municipio.models import PagoTributario
+from Municipio.simulacion import InstantaneaCatastro
+
+
+class Command(BaseCommand):
+    help = "Simula la recaudación con otros umbrales y tasas sobre una copia en memoria del catastro."
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument('--umbrales', nargs='+', type=Decimal, default=PagoTributario.UMBRALES, help="Límites de ingreso entre categorías")
+        parser.add_argument('--tasas', nargs='+', type=Decimal, default=[PagoTributario.TASAS[cat] for cat in PagoTributario.CATEGORIAS], help="Tasa de cada categoría")
+        parser.add_argument('--nivel', choices=['municipio', 'zona'], default='municipio')
+
+    def handle(self, *args, **options):
+        inicio = time.perf_counter()
+        instantanea = InstantaneaCatastro.cargar()
+        carga = time.perf_counter() - inicio
+        inicio = time.perf_counter()
+        try:
+            filas = instantanea.comparar(options['umbrales'], options['tasas'], options['nivel'])
+        except ValueError as exc:
+            raise CommandError(str(exc))
+        simulacion = time.perf_counter() - inicio
+
+        self.stdout.write(f"{'Código':>8} {'Vigente':>14} {'Simulada':>14} {'Diferencia':>14}")
+        for fila in filas:
+            codigo = '-' if fila['codigo'] is None else fila['codigo']
+            self.stdout.write(f"{codigo:>8} {fila['vigente']:>14} {fila['simulada']:>14} {fila['diferencia']:>14}")
+        self.stdout.write(f"{len(instantanea)} casas: carga {carga * 1000:.1f} ms, simulación {simulacion * 1000:.1f} ms")
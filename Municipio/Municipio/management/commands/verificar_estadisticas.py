@@ -0,0 +1,28 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from Municipio.estadisticas import reconstruir, verificar
+
+
+class Command(BaseCommand):
+    help = "Compara las estadísticas de viviendas y casas mantenidas en línea con un recálculo completo."
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument('--corregir', action='store_true', help="Reconstruir las estadísticas si hay diferencias")
+
+    def handle(self, *args, **options):
+        inicio = time.perf_counter()
+        diferencias = verificar()
+        self.stderr.write(f"Verificación en {(time.perf_counter() - inicio) * 1000:.1f} ms")
+        if not diferencias:
+            self.stdout.write(self.style.SUCCESS("Las estadísticas coinciden con el recálculo."))
+            return
+        for tabla, distintas in diferencias.items():
+            for clave, (guardado, calculado) in sorted(distintas.items(), key=str):
+                self.stdout.write(f"{tabla} {clave}: guardado {guardado}, calculado {calculado}")
+        if options['corregir']:
+            reconstruir()
+            self.stdout.write(self.style.WARNING("Estadísticas reconstruidas."))
+        else:
+            raise CommandError(f"{sum(map(len, diferencias.values()))} estadísticas no coinciden.")
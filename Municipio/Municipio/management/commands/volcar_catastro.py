@@ -0,0 +1,20 @@
+import time
+
+from django.core.management.base import BaseCommand
+from Municipio.volcado import volcar
+
+
+class Command(BaseCommand):
+    help = "Vuelca las columnas numéricas de Vivienda, Casa y Pago_Tributario a un archivo binario mapeable en memoria."
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument('ruta', help="Archivo de salida")
+        parser.add_argument('--completo', action='store_true', help="Reconstruir el volcado en lugar de agregar solo filas nuevas")
+
+    def handle(self, *args, **options):
+        inicio = time.perf_counter()
+        resumen = volcar(options['ruta'], completo=options['completo'])
+        for tabla, (filas, marca) in resumen.items():
+            self.stdout.write(f"{tabla}: {filas} filas, marca {marca}")
+        self.stdout.write(self.style.SUCCESS(f"Volcado escrito en {time.perf_counter() - inicio:.2f} s"))
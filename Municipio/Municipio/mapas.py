@@ -0,0 +1,55 @@
+class MapaBits:
+    """Conjunto de códigos enteros como mapa de bits: el bit i representa el código base + i."""
+
+    def __init__(self, base=0, bits=0):
+        self.base = base
+        self.bits = bits
+
+    @classmethod
+    def desde_bytes(cls, base, datos):
+        return cls(base or 0, int.from_bytes(datos or b'', 'little'))
+
+    def a_bytes(self):
+        return self.bits.to_bytes((self.bits.bit_length() + 7) // 8, 'little')
+
+    def rebasar(self, base):
+        # Solo puede bajar la base mientras haya bits marcados
+        if not self.bits:
+            self.base = base
+        elif base < self.base:
+            self.bits <<= self.base - base
+            self.base = base
+
+    def agregar(self, codigo):
+        self.rebasar(codigo)
+        self.bits |= 1 << (codigo - self.base)
+
+    def quitar(self, codigo):
+        if codigo >= self.base:
+            self.bits &= ~(1 << (codigo - self.base))
+
+    def __contains__(self, codigo):
+        return codigo >= self.base and bool(self.bits >> (codigo - self.base) & 1)
+
+    def __len__(self):
+        return bin(self.bits).count('1')
+
+    def __iter__(self):
+        bits, posicion = self.bits, self.base
+        while bits:
+            menor = bits & -bits
+            yield posicion + menor.bit_length() - 1
+            bits ^= menor
+
+    def _alinear(self, otro):
+        bases = [mapa.base for mapa in (self, otro) if mapa.bits]
+        base = min(bases) if bases else 0
+        return base, self.bits and self.bits << (self.base - base), otro.bits and otro.bits << (otro.base - base)
+
+    def __or__(self, otro):
+        base, a, b = self._alinear(otro)
+        return MapaBits(base, a | b)
+
+    def __and__(self, otro):
+        base, a, b = self._alinear(otro)
+        return MapaBits(base, a & b)
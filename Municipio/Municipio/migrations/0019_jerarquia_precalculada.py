@@ -0,0 +1,57 @@
+# Generated by Django 4.2.3 on 2026-10-19 17:28
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def rellenar_jerarquia(apps, schema_editor):
+    Vivienda = apps.get_model('Municipio', 'Vivienda')
+    ZonaUrbana = apps.get_model('Municipio', 'ZonaUrbana')
+    Casa = apps.get_model('Municipio', 'Casa')
+    zona = ZonaUrbana.objects.filter(pk=OuterRef('ZonCod'))
+    Vivienda.objects.update(
+        VivMunCod=Subquery(zona.values('MunCod')[:1]),
+        VivRegCod=Subquery(zona.values('MunCod__RegCod')[:1]),
+    )
+    vivienda = Vivienda.objects.filter(pk=OuterRef('VivCod'))
+    Casa.objects.update(
+        CasZonCod=Subquery(vivienda.values('ZonCod')[:1]),
+        CasMunCod=Subquery(vivienda.values('VivMunCod')[:1]),
+        CasRegCod=Subquery(vivienda.values('VivRegCod')[:1]),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Municipio', '0018_alter_casa_casesc_alter_casa_casnumpue_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='casa',
+            name='CasMunCod',
+            field=models.IntegerField(db_column='CasMunCod', db_index=True, editable=False, null=True, verbose_name='Código de Municipio'),
+        ),
+        migrations.AddField(
+            model_name='casa',
+            name='CasRegCod',
+            field=models.IntegerField(db_column='CasRegCod', db_index=True, editable=False, null=True, verbose_name='Código de Región'),
+        ),
+        migrations.AddField(
+            model_name='casa',
+            name='CasZonCod',
+            field=models.IntegerField(db_column='CasZonCod', db_index=True, editable=False, null=True, verbose_name='Código de Zona'),
+        ),
+        migrations.AddField(
+            model_name='vivienda',
+            name='VivMunCod',
+            field=models.IntegerField(db_column='VivMunCod', db_index=True, editable=False, null=True, verbose_name='Código de Municipio'),
+        ),
+        migrations.AddField(
+            model_name='vivienda',
+            name='VivRegCod',
+            field=models.IntegerField(db_column='VivRegCod', db_index=True, editable=False, null=True, verbose_name='Código de Región'),
+        ),
+        migrations.RunPython(rellenar_jerarquia, migrations.RunPython.noop),
+    ]
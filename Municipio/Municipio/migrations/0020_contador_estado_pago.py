@@ -0,0 +1,40 @@
+# Generated by Django 4.2.3 on 2026-10-19 17:29
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def calcular_contadores(apps, schema_editor):
+    PagoTributario = apps.get_model('Municipio', 'PagoTributario')
+    ContadorEstadoPago = apps.get_model('Municipio', 'ContadorEstadoPago')
+    filas = (PagoTributario.objects.exclude(CasCod__CasMunCod=None)
+             .values('CasCod__CasMunCod', 'PagTriEstReg')
+             .annotate(cantidad=models.Count('PagTriCod')))
+    ContadorEstadoPago.objects.bulk_create([
+        ContadorEstadoPago(MunCod_id=fila['CasCod__CasMunCod'], ConEstEst=fila['PagTriEstReg'], ConEstCan=fila['cantidad'])
+        for fila in filas
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Municipio', '0019_jerarquia_precalculada'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ContadorEstadoPago',
+            fields=[
+                ('ConEstCod', models.AutoField(db_column='ConEstCod', primary_key=True, serialize=False, verbose_name='Código')),
+                ('ConEstEst', models.CharField(choices=[('en proceso', 'En Proceso'), ('pagada', 'Pagada'), ('debe', 'Debe')], db_column='ConEstEst', max_length=15, verbose_name='Estado de Pago')),
+                ('ConEstCan', models.IntegerField(db_column='ConEstCan', default=0, verbose_name='Cantidad de Pagos')),
+                ('MunCod', models.ForeignKey(db_column='MunCod', on_delete=django.db.models.deletion.CASCADE, to='Municipio.municipio', verbose_name='Código de Municipio')),
+            ],
+            options={
+                'db_table': 'Contador_Estado_Pago',
+                'unique_together': {('MunCod', 'ConEstEst')},
+            },
+        ),
+        migrations.RunPython(calcular_contadores, migrations.RunPython.noop),
+    ]
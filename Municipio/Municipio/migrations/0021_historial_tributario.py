@@ -0,0 +1,58 @@
+# Generated by Django 4.2.3 on 2026-10-19 17:30
+
+from django.db import migrations, models
+import django.db.models.deletion
+from django.utils import timezone
+
+
+def copiar_pagos(apps, schema_editor):
+    PagoTributario = apps.get_model('Municipio', 'PagoTributario')
+    HistorialTributario = apps.get_model('Municipio', 'HistorialTributario')
+    HistorialTributario.objects.bulk_create([
+        HistorialTributario(CasCod_id=pago.CasCod_id, HisTriAno=pago.PagTriFec.year, HisTriFec=pago.PagTriFec,
+                            HisTriIngFam=pago.PagTriIngFam, HisTriCat=pago.PagTriCat, HisTriPag=pago.PagTriPag)
+        for pago in PagoTributario.objects.all()
+    ], batch_size=1000)
+
+
+def particionar(apps, schema_editor):
+    # Particionado por rango de año solo en MySQL; en SQLite basta el índice por HisTriAno
+    if schema_editor.connection.vendor != 'mysql':
+        return
+    HistorialTributario = apps.get_model('Municipio', 'HistorialTributario')
+    actual = timezone.localdate().year
+    primero = HistorialTributario.objects.order_by('HisTriAno').values_list('HisTriAno', flat=True).first() or actual
+    particiones = [f"PARTITION p{anio} VALUES LESS THAN ({anio + 1})" for anio in range(primero, actual + 2)]
+    particiones.append("PARTITION pmax VALUES LESS THAN MAXVALUE")
+    # La clave de partición debe formar parte de la clave primaria
+    schema_editor.execute("ALTER TABLE `Historial_Tributario` DROP PRIMARY KEY, ADD PRIMARY KEY (`HisTriCod`, `HisTriAno`)")
+    schema_editor.execute("ALTER TABLE `Historial_Tributario` PARTITION BY RANGE (`HisTriAno`) (%s)" % ", ".join(particiones))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Municipio', '0020_contador_estado_pago'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HistorialTributario',
+            fields=[
+                ('HisTriCod', models.AutoField(db_column='HisTriCod', primary_key=True, serialize=False, verbose_name='Código')),
+                ('HisTriAno', models.IntegerField(db_column='HisTriAno', verbose_name='Año Fiscal')),
+                ('HisTriFec', models.DateField(db_column='HisTriFec', verbose_name='Fecha emitida')),
+                ('HisTriIngFam', models.DecimalField(db_column='HisTriIngFam', decimal_places=2, default=0, max_digits=6, verbose_name='Ingreso Familiar')),
+                ('HisTriCat', models.CharField(db_column='HisTriCat', default=' ', max_length=1, null=True, verbose_name='Categoria')),
+                ('HisTriPag', models.DecimalField(db_column='HisTriPag', decimal_places=2, default=0, max_digits=8, verbose_name='Pago Total')),
+                ('CasCod', models.ForeignKey(db_column='CasCod', db_constraint=False, on_delete=django.db.models.deletion.CASCADE, to='Municipio.casa', verbose_name='Código de Casa')),
+            ],
+            options={
+                'db_table': 'Historial_Tributario',
+                'indexes': [models.Index(fields=['HisTriAno'], name='Historial_Tributario_anio')],
+                'unique_together': {('CasCod', 'HisTriAno')},
+            },
+        ),
+        migrations.RunPython(copiar_pagos, migrations.RunPython.noop),
+        migrations.RunPython(particionar, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 4.2.3 on 2026-10-19 17:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Municipio', '0021_historial_tributario'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CursorCambios',
+            fields=[
+                ('CurCod', models.AutoField(db_column='CurCod', primary_key=True, serialize=False, verbose_name='Código')),
+                ('CurNom', models.CharField(db_column='CurNom', max_length=30, unique=True, verbose_name='Consumidor')),
+                ('CurPos', models.BigIntegerField(db_column='CurPos', default=0, verbose_name='Último Evento Leído')),
+            ],
+            options={
+                'db_table': 'Cursor_Cambios',
+            },
+        ),
+        migrations.CreateModel(
+            name='EventoCambio',
+            fields=[
+                ('EveCod', models.BigAutoField(db_column='EveCod', primary_key=True, serialize=False, verbose_name='Código')),
+                ('EveMod', models.CharField(db_column='EveMod', max_length=20, verbose_name='Modelo')),
+                ('EvePk', models.IntegerField(db_column='EvePk', verbose_name='Código del Registro')),
+                ('EveOpe', models.CharField(choices=[('G', 'Guardado'), ('E', 'Eliminado')], db_column='EveOpe', max_length=1, verbose_name='Operación')),
+                ('EveFec', models.DateTimeField(auto_now_add=True, db_column='EveFec', verbose_name='Fecha')),
+            ],
+            options={
+                'db_table': 'Evento_Cambio',
+                'indexes': [models.Index(fields=['EveMod', 'EvePk'], name='Evento_Cambio_registro')],
+            },
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 4.2.3 on 2026-10-19 18:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Municipio', '0022_registro_cambios'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VersionModelo',
+            fields=[
+                ('VerCod', models.AutoField(db_column='VerCod', primary_key=True, serialize=False, verbose_name='Código')),
+                ('VerMod', models.CharField(db_column='VerMod', max_length=100, unique=True, verbose_name='Modelo')),
+                ('VerNum', models.BigIntegerField(db_column='VerNum', verbose_name='Versión')),
+            ],
+            options={
+                'db_table': 'Version_Modelo',
+            },
+        ),
+    ]
@@ -0,0 +1,86 @@
+# Generated by Django 4.2.3 on 2026-10-19 17:34
+
+import re
+import unicodedata
+
+from django.db import migrations, models
+from django.db.utils import OperationalError
+
+# Copia de Municipio.texto al crear el índice: la migración no depende de cambios posteriores del módulo
+CAMPOS_BUSQUEDA = {
+    'persona': ('Persona', ['PerNom']),
+    'familia': ('Familia', ['FamNom']),
+    'vivienda': ('Vivienda', ['VivCal', 'VivNum', 'VivCodPos']),
+}
+
+
+def texto_busqueda(valores):
+    texto = unicodedata.normalize('NFKD', ' '.join(str(valor) for valor in valores if valor))
+    texto = ''.join(c for c in texto if not unicodedata.combining(c)).casefold()
+    return re.sub(r'[^0-9a-z]+', ' ', texto).strip()
+
+SQL_SQLITE = [
+    "CREATE VIRTUAL TABLE Indice_Busqueda_fts USING fts5(IndBusTex, content='Indice_Busqueda', content_rowid='IndBusCod')",
+    "CREATE TRIGGER Indice_Busqueda_ai AFTER INSERT ON Indice_Busqueda BEGIN "
+    "INSERT INTO Indice_Busqueda_fts(rowid, IndBusTex) VALUES (new.IndBusCod, new.IndBusTex); END",
+    "CREATE TRIGGER Indice_Busqueda_ad AFTER DELETE ON Indice_Busqueda BEGIN "
+    "INSERT INTO Indice_Busqueda_fts(Indice_Busqueda_fts, rowid, IndBusTex) VALUES ('delete', old.IndBusCod, old.IndBusTex); END",
+    "CREATE TRIGGER Indice_Busqueda_au AFTER UPDATE ON Indice_Busqueda BEGIN "
+    "INSERT INTO Indice_Busqueda_fts(Indice_Busqueda_fts, rowid, IndBusTex) VALUES ('delete', old.IndBusCod, old.IndBusTex); "
+    "INSERT INTO Indice_Busqueda_fts(rowid, IndBusTex) VALUES (new.IndBusCod, new.IndBusTex); END",
+]
+
+
+def crear_indice_texto(apps, schema_editor):
+    # FULLTEXT en MySQL; en SQLite una tabla FTS5 mantenida por disparadores
+    vendor = schema_editor.connection.vendor
+    if vendor == 'mysql':
+        schema_editor.execute("ALTER TABLE `Indice_Busqueda` ADD FULLTEXT INDEX `Indice_Busqueda_fulltext` (`IndBusTex`)")
+    elif vendor == 'sqlite':
+        try:
+            for sql in SQL_SQLITE:
+                schema_editor.execute(sql)
+        except OperationalError:
+            pass  # SQLite sin FTS5: la búsqueda usa LIKE por prefijo
+
+
+def eliminar_indice_texto(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        for nombre in ('Indice_Busqueda_ai', 'Indice_Busqueda_ad', 'Indice_Busqueda_au'):
+            schema_editor.execute(f"DROP TRIGGER IF EXISTS {nombre}")
+        schema_editor.execute("DROP TABLE IF EXISTS Indice_Busqueda_fts")
+
+
+def indexar_existentes(apps, schema_editor):
+    IndiceBusqueda = apps.get_model('Municipio', 'IndiceBusqueda')
+    for tipo, (nombre, campos) in CAMPOS_BUSQUEDA.items():
+        modelo = apps.get_model('Municipio', nombre)
+        IndiceBusqueda.objects.bulk_create([
+            IndiceBusqueda(IndBusTip=tipo, IndBusPk=fila[0], IndBusTex=texto_busqueda(fila[1:])[:100])
+            for fila in modelo.objects.values_list('pk', *campos).iterator()
+        ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Municipio', '0023_version_modelo'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IndiceBusqueda',
+            fields=[
+                ('IndBusCod', models.AutoField(db_column='IndBusCod', primary_key=True, serialize=False, verbose_name='Código')),
+                ('IndBusTip', models.CharField(choices=[('persona', 'Persona'), ('familia', 'Familia'), ('vivienda', 'Vivienda')], db_column='IndBusTip', max_length=10, verbose_name='Tipo')),
+                ('IndBusPk', models.IntegerField(db_column='IndBusPk', verbose_name='Código del Registro')),
+                ('IndBusTex', models.CharField(db_column='IndBusTex', db_index=True, max_length=100, verbose_name='Texto Normalizado')),
+            ],
+            options={
+                'db_table': 'Indice_Busqueda',
+                'unique_together': {('IndBusTip', 'IndBusPk')},
+            },
+        ),
+        migrations.RunPython(crear_indice_texto, eliminar_indice_texto),
+        migrations.RunPython(indexar_existentes, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,95 @@
+# Generated by Django 4.2.3 on 2026-10-19 17:37
+
+from django.db import migrations, models
+from django.db.models import Count
+import django.db.models.deletion
+
+# OcupacionZona.BITS_PAGINA al crear las páginas
+BITS_PAGINA = 8192
+
+
+# Copia de Municipio.texto al crear las tablas: la migración no depende de cambios posteriores
+def codigo_postal_numerico(codigo):
+    digitos = ''.join(c for c in codigo or '' if c.isdigit())
+    return int(digitos) if digitos else None
+
+
+def _bytes(bits):
+    return bits.to_bytes((bits.bit_length() + 7) // 8, 'little')
+
+
+def indexar_viviendas(apps, schema_editor):
+    Vivienda = apps.get_model('Municipio', 'Vivienda')
+    ZonaCodigoPostal = apps.get_model('Municipio', 'ZonaCodigoPostal')
+    OcupacionZona = apps.get_model('Municipio', 'OcupacionZona')
+    # Un UPDATE por código postal distinto, no por vivienda
+    for codigo in Vivienda.objects.order_by().values_list('VivCodPos', flat=True).distinct():
+        cod_pos = codigo_postal_numerico(codigo)
+        if cod_pos is not None:
+            Vivienda.objects.filter(VivCodPos=codigo).update(VivCodPosNum=cod_pos)
+    adyacencia = {}
+    for fila in Vivienda.objects.exclude(VivCodPosNum=None).values('ZonCod', 'VivCodPosNum').annotate(cantidad=Count('pk')).order_by():
+        clave = (fila['ZonCod'], fila['VivCodPosNum'])
+        adyacencia[clave] = adyacencia.get(clave, 0) + fila['cantidad']
+    ZonaCodigoPostal.objects.bulk_create([
+        ZonaCodigoPostal(ZonCod_id=zon_cod, ZonCodPos=cod_pos, ZonCodPosCan=cantidad)
+        for (zon_cod, cod_pos), cantidad in adyacencia.items()
+    ], batch_size=1000)
+    paginas = {}
+    for viv_cod, zon_cod, ocupada in Vivienda.objects.values_list('VivCod', 'ZonCod', 'VivOcu').iterator():
+        pagina, bit = divmod(viv_cod, BITS_PAGINA)
+        mapas = paginas.setdefault((zon_cod, pagina), [0, 0])
+        mapas[0] |= 1 << bit
+        if ocupada == 'S':
+            mapas[1] |= 1 << bit
+    OcupacionZona.objects.bulk_create([
+        OcupacionZona(ZonCod_id=zon_cod, OcuZonPag=pagina, OcuZonViv=_bytes(viviendas), OcuZonOcu=_bytes(ocupadas))
+        for (zon_cod, pagina), (viviendas, ocupadas) in paginas.items()
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Municipio', '0024_indice_busqueda'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OcupacionZona',
+            fields=[
+                ('OcuZonCod', models.AutoField(db_column='OcuZonCod', primary_key=True, serialize=False, verbose_name='Código')),
+                ('OcuZonPag', models.PositiveIntegerField(db_column='OcuZonPag', default=0, verbose_name='Página')),
+                ('OcuZonViv', models.BinaryField(db_column='OcuZonViv', default=b'', verbose_name='Viviendas')),
+                ('OcuZonOcu', models.BinaryField(db_column='OcuZonOcu', default=b'', verbose_name='Viviendas Ocupadas')),
+                ('ZonCod', models.ForeignKey(db_column='ZonCod', on_delete=django.db.models.deletion.CASCADE, to='Municipio.zonaurbana', verbose_name='Código de Zona')),
+            ],
+            options={
+                'db_table': 'Ocupacion_Zona',
+                'unique_together': {('ZonCod', 'OcuZonPag')},
+            },
+        ),
+        migrations.CreateModel(
+            name='ZonaCodigoPostal',
+            fields=[
+                ('ZonCodPosCod', models.AutoField(db_column='ZonCodPosCod', primary_key=True, serialize=False, verbose_name='Código')),
+                ('ZonCodPos', models.PositiveIntegerField(db_column='ZonCodPos', db_index=True, verbose_name='Código Postal')),
+                ('ZonCodPosCan', models.IntegerField(db_column='ZonCodPosCan', default=0, verbose_name='Número de Viviendas')),
+                ('ZonCod', models.ForeignKey(db_column='ZonCod', on_delete=django.db.models.deletion.CASCADE, to='Municipio.zonaurbana', verbose_name='Código de Zona')),
+            ],
+            options={
+                'db_table': 'Zona_Codigo_Postal',
+                'unique_together': {('ZonCod', 'ZonCodPos')},
+            },
+        ),
+        migrations.AddField(
+            model_name='vivienda',
+            name='VivCodPosNum',
+            field=models.PositiveIntegerField(db_column='VivCodPosNum', db_index=True, editable=False, null=True, verbose_name='Código Postal Numérico'),
+        ),
+        migrations.AddIndex(
+            model_name='vivienda',
+            index=models.Index(fields=['ZonCod', 'VivOcu'], name='Vivienda_zona_ocupada'),
+        ),
+        migrations.RunPython(indexar_viviendas, migrations.RunPython.noop),
+    ]
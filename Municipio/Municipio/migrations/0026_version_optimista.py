@@ -0,0 +1,28 @@
+# Generated by Django 4.2.3 on 2026-10-19 17:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Municipio', '0025_indice_codigo_postal'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='casa',
+            name='CasVer',
+            field=models.PositiveIntegerField(db_column='CasVer', default=0, editable=False, verbose_name='Versión'),
+        ),
+        migrations.AddField(
+            model_name='pagotributario',
+            name='PagTriVer',
+            field=models.PositiveIntegerField(db_column='PagTriVer', default=0, editable=False, verbose_name='Versión'),
+        ),
+        migrations.AddField(
+            model_name='vivienda',
+            name='VivVer',
+            field=models.PositiveIntegerField(db_column='VivVer', default=0, editable=False, verbose_name='Versión'),
+        ),
+    ]
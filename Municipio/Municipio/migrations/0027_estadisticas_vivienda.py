@@ -0,0 +1,74 @@
+# Generated by Django 4.2.3 on 2026-10-19 17:47
+
+from django.db import migrations, models
+import django.db.models.deletion
+from bisect import bisect_right
+from decimal import Decimal
+
+# Cubetas de EstadisticaCasa.CUBETAS al crear la tabla
+CUBETAS = [Decimal('25'), Decimal('50'), Decimal('75'), Decimal('100'), Decimal('150'), Decimal('200'), Decimal('300')]
+
+
+def calcular_estadisticas(apps, schema_editor):
+    Vivienda = apps.get_model('Municipio', 'Vivienda')
+    Casa = apps.get_model('Municipio', 'Casa')
+    EstadisticaVivienda = apps.get_model('Municipio', 'EstadisticaVivienda')
+    EstadisticaCasa = apps.get_model('Municipio', 'EstadisticaCasa')
+    viviendas, casas = {}, {}
+    for zon_cod, estado, tip_viv_cod, ocupada in Vivienda.objects.values_list('ZonCod', 'VivEstReg', 'TipVivCod', 'VivOcu').iterator():
+        total = viviendas.setdefault((zon_cod, estado, tip_viv_cod), [0, 0])
+        total[0] += 1
+        total[1] += ocupada == 'S'
+    for zon_cod, estado, metros in Casa.objects.exclude(CasZonCod=None).values_list('CasZonCod', 'CasEstReg', 'CasMet').iterator():
+        total = casas.setdefault((zon_cod, estado, bisect_right(CUBETAS, metros)), [0, Decimal(0)])
+        total[0] += 1
+        total[1] += metros
+    EstadisticaVivienda.objects.bulk_create([
+        EstadisticaVivienda(ZonCod_id=zon_cod, EstVivEstReg=estado, TipVivCod_id=tip_viv_cod, EstVivCan=cantidad, EstVivOcu=ocupadas)
+        for (zon_cod, estado, tip_viv_cod), (cantidad, ocupadas) in viviendas.items()
+    ])
+    EstadisticaCasa.objects.bulk_create([
+        EstadisticaCasa(ZonCod_id=zon_cod, EstCasEstReg=estado, EstCasCub=cubeta, EstCasCan=cantidad, EstCasMet=metros)
+        for (zon_cod, estado, cubeta), (cantidad, metros) in casas.items()
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Municipio', '0026_version_optimista'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EstadisticaVivienda',
+            fields=[
+                ('EstVivCod', models.AutoField(db_column='EstVivCod', primary_key=True, serialize=False, verbose_name='Código')),
+                ('EstVivEstReg', models.CharField(db_column='EstVivEstReg', max_length=1, verbose_name='Estado de Registro')),
+                ('EstVivCan', models.IntegerField(db_column='EstVivCan', default=0, verbose_name='Número de Viviendas')),
+                ('EstVivOcu', models.IntegerField(db_column='EstVivOcu', default=0, verbose_name='Número de Viviendas Ocupadas')),
+                ('TipVivCod', models.ForeignKey(db_column='TipVivCod', on_delete=django.db.models.deletion.CASCADE, to='Municipio.tipovivienda', verbose_name='Código de Tipo de Vivienda')),
+                ('ZonCod', models.ForeignKey(db_column='ZonCod', on_delete=django.db.models.deletion.CASCADE, to='Municipio.zonaurbana', verbose_name='Código de Zona')),
+            ],
+            options={
+                'db_table': 'Estadistica_Vivienda',
+                'unique_together': {('ZonCod', 'EstVivEstReg', 'TipVivCod')},
+            },
+        ),
+        migrations.CreateModel(
+            name='EstadisticaCasa',
+            fields=[
+                ('EstCasCod', models.AutoField(db_column='EstCasCod', primary_key=True, serialize=False, verbose_name='Código')),
+                ('EstCasEstReg', models.CharField(db_column='EstCasEstReg', max_length=1, verbose_name='Estado de Registro')),
+                ('EstCasCub', models.PositiveSmallIntegerField(db_column='EstCasCub', verbose_name='Cubeta')),
+                ('EstCasCan', models.IntegerField(db_column='EstCasCan', default=0, verbose_name='Número de Casas')),
+                ('EstCasMet', models.DecimalField(db_column='EstCasMet', decimal_places=2, default=0, max_digits=14, verbose_name='Metros')),
+                ('ZonCod', models.ForeignKey(db_column='ZonCod', on_delete=django.db.models.deletion.CASCADE, to='Municipio.zonaurbana', verbose_name='Código de Zona')),
+            ],
+            options={
+                'db_table': 'Estadistica_Casa',
+                'unique_together': {('ZonCod', 'EstCasEstReg', 'EstCasCub')},
+            },
+        ),
+        migrations.RunPython(calcular_estadisticas, migrations.RunPython.noop),
+    ]
@@ -1,11 +1,80 @@
-from django.db import models
+from django.db import connections, models, transaction
+from django.db.models import F
 from django.core.exceptions import ValidationError
+from bisect import bisect_right
 from decimal import Decimal, ROUND_HALF_UP
 from django.utils import timezone
 from django.core.validators import RegexValidator
 from django.core.validators import MaxLengthValidator
+from .texto import codigo_postal_numerico
+from .versiones import incrementar_version
+
+def _actualizar_registrando(queryset, **valores):
+    # update() no dispara señales: se registra el cambio de cada fila en el registro de cambios
+    campo_version = getattr(queryset.model, 'CAMPO_VERSION', None)
+    if campo_version:
+        # Las ediciones abiertas sobre estas filas deben detectar el cambio
+        valores[campo_version] = F(campo_version) + 1
+    from . import estadisticas  # Importa este módulo: no puede cargarse antes que los modelos
+    pks = list(queryset.values_list('pk', flat=True))
+    actualizados = 0
+    for inicio in range(0, len(pks), 1000):
+        lote = pks[inicio:inicio + 1000]
+        anteriores = estadisticas.leer(queryset.model, lote)
+        actualizados += queryset.filter(pk__in=lote).update(**valores)
+        estadisticas.aplicar(queryset.model, anteriores, estadisticas.leer(queryset.model, lote))
+        EventoCambio.registrar(queryset.model, lote)
+    if pks:
+        incrementar_version(queryset.model)
+    return actualizados
+
+def _incrementar(modelo, filtro, crear=True, **deltas):
+    # UPDATE ... SET campo = campo + delta; la fila solo se crea si `crear`. Al restar no se crea:
+    # si falta es porque el borrado en cascada de su zona o municipio ya la eliminó
+    filas = modelo.objects.filter(**filtro)
+    incrementos = {campo: F(campo) + delta for campo, delta in deltas.items()}
+    if filas.update(**incrementos) or not crear:
+        return
+    _, creada = modelo.objects.get_or_create(**filtro, defaults=deltas)
+    if not creada:
+        filas.update(**incrementos)
+
+class ConflictoVersion(ValidationError):
+    pass
+
+class VersionadoMixin:
+    """Control de concurrencia optimista: el UPDATE solo se aplica si la versión leída sigue vigente."""
+    CAMPO_VERSION = None
+
+    def _do_update(self, base_qs, using, pk_val, values, update_fields, forced_update):
+        if self._state.adding:
+            return super()._do_update(base_qs, using, pk_val, values, update_fields, forced_update)
+        campo = self._meta.get_field(self.CAMPO_VERSION)
+        version = getattr(self, campo.attname)
+        values = [(f, modelo, valor) for f, modelo, valor in values if f is not campo] + [(campo, None, version + 1)]
+        # UPDATE ... SET version = n + 1 WHERE pk = ? AND version = n
+        if super()._do_update(base_qs.filter(**{campo.attname: version}), using, pk_val, values, update_fields, forced_update):
+            setattr(self, campo.attname, version + 1)
+            return True
+        if base_qs.filter(pk=pk_val).exists():
+            raise ConflictoVersion(
+                f"{self} fue modificado por otro usuario o proceso; vuelva a cargarlo.",
+                code='conflicto_version',
+            )
+        return False
+
+class GuardadoAtomicoMixin:
+    """save() y delete() en su transacción: la fila y su evento en Evento_Cambio se confirman juntos."""
 
-class Region(models.Model):
+    def save(self, *args, **kwargs):
+        with transaction.atomic(using=kwargs.get('using')):
+            super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic(using=kwargs.get('using')):
+            return super().delete(*args, **kwargs)
+
+class Region(GuardadoAtomicoMixin, models.Model):
     RegCod = models.AutoField(db_column='RegCod', primary_key=True,  verbose_name="Código")
     RegNom = models.CharField(db_column='RegNom', max_length=20, verbose_name="Nombre", unique=True, null=False)
     RegEstReg = models.CharField(db_column='RegEstReg', max_length=1, default='A', verbose_name="Estado de Registro")
@@ -16,7 +85,7 @@ class Region(models.Model):
     def __str__(self):
         return self.RegNom
 
-class Municipio(models.Model):
+class Municipio(GuardadoAtomicoMixin, models.Model):
     MunCod = models.AutoField(db_column='MunCod', primary_key=True, verbose_name="Código")
     MunNom = models.CharField(db_column='MunNom', max_length=20, verbose_name="Nombre", unique=True, null=False)
     MunPreAnu = models.DecimalField(db_column='MunPreAnu', max_digits=8, decimal_places=2, default=0,verbose_name="Presupuesto Anual", null=False)
@@ -30,6 +99,15 @@ class Municipio(models.Model):
     def __str__(self):
         return self.MunNom
 
+    def save(self, *args, **kwargs):
+        existente = not self._state.adding
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if existente:
+                # Propagar un cambio de región a la jerarquía precalculada
+                _actualizar_registrando(Vivienda.objects.filter(VivMunCod=self.pk).exclude(VivRegCod=self.RegCod_id), VivRegCod=self.RegCod_id)
+                _actualizar_registrando(Casa.objects.filter(CasMunCod=self.pk).exclude(CasRegCod=self.RegCod_id), CasRegCod=self.RegCod_id)
+
 class ZonaUrbana(models.Model):
     ZonCod = models.AutoField(db_column='ZonCod', primary_key=True, verbose_name="Código")
     ZonNom = models.CharField(db_column='ZonNom', max_length=20, verbose_name="Nombre", unique=True, null=False)
@@ -42,7 +120,18 @@ class ZonaUrbana(models.Model):
     def __str__(self):
         return self.ZonNom
 
-class TipoVivienda(models.Model):
+    def save(self, *args, **kwargs):
+        existente = not self._state.adding
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if existente:
+                # Propagar un cambio de municipio a la jerarquía precalculada y a los contadores de pagos
+                reg_cod = self.MunCod.RegCod_id
+                _actualizar_registrando(Vivienda.objects.filter(ZonCod=self).exclude(VivMunCod=self.MunCod_id, VivRegCod=reg_cod), VivMunCod=self.MunCod_id, VivRegCod=reg_cod)
+                ContadorEstadoPago.trasladar(Casa.objects.filter(CasZonCod=self.pk), self.MunCod_id)
+                _actualizar_registrando(Casa.objects.filter(CasZonCod=self.pk).exclude(CasMunCod=self.MunCod_id, CasRegCod=reg_cod), CasMunCod=self.MunCod_id, CasRegCod=reg_cod)
+
+class TipoVivienda(GuardadoAtomicoMixin, models.Model):
     TipVivCod = models.AutoField(db_column='TipVivCod', primary_key=True, verbose_name="Código")
     TipVivDes = models.CharField(db_column='TipVivDes', max_length=15, verbose_name="Descripción", unique=True, null=False)
     TipVivEstReg = models.CharField(db_column='TipVivEstReg', max_length=1, default='A', verbose_name="Estado de Registro")
@@ -53,7 +142,21 @@ class TipoVivienda(models.Model):
     def __str__(self):
         return self.TipVivDes
 
-class Vivienda(models.Model):
+class ViviendaQuerySet(models.QuerySet):
+    # Filtros sobre la jerarquía precalculada, sin recorrer Zona_Urbana ni Municipio
+    def in_region(self, region):
+        return self.filter(VivRegCod=getattr(region, 'pk', region))
+
+    def in_municipio(self, municipio):
+        return self.filter(VivMunCod=getattr(municipio, 'pk', municipio))
+
+    def en_codigos_postales(self, desde, hasta):
+        return self.filter(VivCodPosNum__range=(codigo_postal_numerico(str(desde)), codigo_postal_numerico(str(hasta))))
+
+    def ocupadas(self):
+        return self.filter(VivOcu='S')
+
+class Vivienda(VersionadoMixin, models.Model):
     VivCod = models.AutoField(db_column='VivCod', primary_key=True, verbose_name="Código")
     VivCal = models.CharField(db_column='VivCal', max_length=3, verbose_name="Calle",validators=[MaxLengthValidator(3)])
     VivNum = models.CharField(db_column='VivNum', max_length=2, verbose_name="Número",validators=[MaxLengthValidator(2)])
@@ -62,10 +165,21 @@ class Vivienda(models.Model):
     ZonCod = models.ForeignKey(ZonaUrbana, on_delete=models.CASCADE, db_column='ZonCod', verbose_name="Código de Zona")
     TipVivCod = models.ForeignKey(TipoVivienda, on_delete=models.CASCADE, db_column='TipVivCod', verbose_name="Código de Tipo de Vivienda")
     VivEstReg = models.CharField(db_column='VivEstReg', max_length=1, default='A', verbose_name="Estado de Registro")
+    # Ancestros precalculados de la vivienda (Municipio y Región de su zona)
+    VivMunCod = models.IntegerField(db_column='VivMunCod', null=True, editable=False, db_index=True, verbose_name="Código de Municipio")
+    VivRegCod = models.IntegerField(db_column='VivRegCod', null=True, editable=False, db_index=True, verbose_name="Código de Región")
+    # VivCodPos como número, para búsquedas por rango con índice
+    VivCodPosNum = models.PositiveIntegerField(db_column='VivCodPosNum', null=True, editable=False, db_index=True, verbose_name="Código Postal Numérico")
+    # Se incrementa en cada UPDATE; ver VersionadoMixin
+    VivVer = models.PositiveIntegerField(db_column='VivVer', default=0, editable=False, verbose_name="Versión")
+
+    CAMPO_VERSION = 'VivVer'
+    objects = ViviendaQuerySet.as_manager()
 
     class Meta:
         db_table = 'Vivienda'
         unique_together = [['VivCal', 'VivNum']]  # Define la combinación única de campos
+        indexes = [models.Index(fields=['ZonCod', 'VivOcu'], name='Vivienda_zona_ocupada')]
 
     def __str__(self):
         return f"Vivienda {self.VivCod}"
@@ -77,9 +191,18 @@ class Vivienda(models.Model):
             
     def save(self, *args, **kwargs):
         self.full_clean()  # Realizar la validación antes de guardar
-        super().save(*args, **kwargs)
-
-class Familia(models.Model):
+        self.VivMunCod = self.ZonCod.MunCod_id
+        self.VivRegCod = self.ZonCod.MunCod.RegCod_id
+        self.VivCodPosNum = codigo_postal_numerico(self.VivCodPos)
+        existente = not self._state.adding
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if existente:
+                # Si la vivienda cambió de zona, actualizar las casas que contiene y los contadores de sus pagos
+                ContadorEstadoPago.trasladar(Casa.objects.filter(VivCod=self), self.VivMunCod)
+                _actualizar_registrando(Casa.objects.filter(VivCod=self).exclude(CasZonCod=self.ZonCod_id, CasMunCod=self.VivMunCod, CasRegCod=self.VivRegCod), CasZonCod=self.ZonCod_id, CasMunCod=self.VivMunCod, CasRegCod=self.VivRegCod)
+
+class Familia(GuardadoAtomicoMixin, models.Model):
     FamCod = models.AutoField(db_column ='FamCod',primary_key=True, verbose_name="Código")
     FamNom = models.CharField(db_column ='FamNom',max_length=15,verbose_name="Nombre")
     FamNumInt = models.IntegerField(db_column ='FamNumInt',default=0,verbose_name="Número de Integrantes")
@@ -90,7 +213,7 @@ class Familia(models.Model):
     def __str__(self):
         return self.FamNom
 
-class TipoPersona(models.Model):
+class TipoPersona(GuardadoAtomicoMixin, models.Model):
     TipPerCod = models.AutoField(db_column='TipPerCod',primary_key=True,verbose_name="Código")
     TipPerDes = models.CharField(db_column='TipPerDes',max_length=15,verbose_name="Descripción", unique=True)
     TipPerEstReg = models.CharField(db_column='TipPerEstReg',max_length=1, default='A',verbose_name="Estado de Registro")
@@ -101,7 +224,7 @@ class TipoPersona(models.Model):
     def __str__(self):
         return self.TipPerDes
 
-class Persona(models.Model):
+class Persona(GuardadoAtomicoMixin, models.Model):
     PerCod = models.AutoField(db_column='PerCod',primary_key=True,verbose_name="Código")
     PerNom = models.CharField(db_column='PerNom',max_length=20,verbose_name="Nombres")
     FamCod = models.ForeignKey(Familia, on_delete=models.CASCADE, db_column='FamCod',verbose_name="Código de Familia")
@@ -131,7 +254,18 @@ class Persona(models.Model):
         self.full_clean()  # Realizar la validación antes de guardar
         super().save(*args, **kwargs)
 
-class Casa(models.Model):
+class CasaQuerySet(models.QuerySet):
+    # Filtros sobre la jerarquía precalculada, sin recorrer Vivienda, Zona_Urbana ni Municipio
+    def in_region(self, region):
+        return self.filter(CasRegCod=getattr(region, 'pk', region))
+
+    def in_municipio(self, municipio):
+        return self.filter(CasMunCod=getattr(municipio, 'pk', municipio))
+
+    def in_zona(self, zona):
+        return self.filter(CasZonCod=getattr(zona, 'pk', zona))
+
+class Casa(VersionadoMixin, models.Model):
     CasCod = models.AutoField(db_column='CasCod',primary_key=True,verbose_name="Código")
     CasEsc = models.CharField(db_column='CasEsc', max_length=2, default='  ', null=True, verbose_name="Escalera", blank=True, validators=[MaxLengthValidator(2),RegexValidator(r'^[0-9]*$', 'Ingrese solo números válidos.')])
     CasCodBlo = models.CharField(db_column='CasCodBlo', max_length=2, default=' ',blank=True,validators=[MaxLengthValidator(2)], null=True, verbose_name="Código de Bloque")
@@ -141,6 +275,15 @@ class Casa(models.Model):
     VivCod = models.ForeignKey(Vivienda, on_delete=models.CASCADE, db_column='VivCod', verbose_name="Código de Vivienda")
     FamCod = models.ForeignKey(Familia, on_delete=models.CASCADE, db_column='FamCod', verbose_name="Código de Familia")
     CasEstReg = models.CharField(db_column='CasEstReg', max_length=1, default='A', verbose_name="Estado de Registro")
+    # Ancestros precalculados de la casa (copiados de su Vivienda)
+    CasZonCod = models.IntegerField(db_column='CasZonCod', null=True, editable=False, db_index=True, verbose_name="Código de Zona")
+    CasMunCod = models.IntegerField(db_column='CasMunCod', null=True, editable=False, db_index=True, verbose_name="Código de Municipio")
+    CasRegCod = models.IntegerField(db_column='CasRegCod', null=True, editable=False, db_index=True, verbose_name="Código de Región")
+    # Se incrementa en cada UPDATE; ver VersionadoMixin
+    CasVer = models.PositiveIntegerField(db_column='CasVer', default=0, editable=False, verbose_name="Versión")
+
+    CAMPO_VERSION = 'CasVer'
+    objects = CasaQuerySet.as_manager()
 
     class Meta:
         db_table = 'Casa'
@@ -178,14 +321,50 @@ class Casa(models.Model):
     
     def save(self, *args, **kwargs):
         self.full_clean()  # Llama a clean() antes de guardar para validar
-        super().save(*args, **kwargs)
-
-class PagoTributario(models.Model):
+        self.CasZonCod = self.VivCod.ZonCod_id
+        self.CasMunCod = self.VivCod.VivMunCod
+        self.CasRegCod = self.VivCod.VivRegCod
+        with transaction.atomic():
+            if not self._state.adding:
+                # Una casa asignada a una vivienda de otro municipio se lleva sus pagos
+                ContadorEstadoPago.trasladar(Casa.objects.filter(pk=self.pk), self.CasMunCod)
+            super().save(*args, **kwargs)
+
+class PagoTributarioQuerySet(models.QuerySet):
+    def transicionar(self, desde, hacia):
+        # Cambio de estado en bloque, sin recalcular montos: por municipio, un solo UPDATE condicionado
+        # a PagTriEstReg = desde, cuyo número de filas es el ajuste exacto de los contadores
+        PagoTributario.validar_transicion(desde, hacia)
+        movidos = 0
+        with transaction.atomic(using=self.db):
+            pendientes = self.filter(PagTriEstReg=desde)
+            for mun_cod in pendientes.order_by().values_list('CasCod__CasMunCod', flat=True).distinct():
+                filas = pendientes.filter(CasCod__CasMunCod=mun_cod)
+                EventoCambio.registrar_consulta(filas)
+                cantidad = filas.update(PagTriEstReg=hacia, PagTriVer=F('PagTriVer') + 1)
+                ContadorEstadoPago.ajustar(mun_cod, desde, -cantidad)
+                ContadorEstadoPago.ajustar(mun_cod, hacia, cantidad)
+                movidos += cantidad
+            if movidos:
+                incrementar_version(PagoTributario)
+        return movidos
+
+class PagoTributario(VersionadoMixin, models.Model):
     ESTADOS = [
         ('en proceso', 'En Proceso'),
         ('pagada', 'Pagada'),
         ('debe', 'Debe')
     ]
+    # Estados a los que se puede pasar desde cada estado
+    TRANSICIONES = {
+        'debe': ('en proceso', 'pagada'),
+        'en proceso': ('pagada', 'debe'),
+        'pagada': ('debe',),  # Anulación de un pago registrado por error
+    }
+    # Categorías por ingreso familiar: A < 1000 <= B < 2500 <= C, y la tasa de cada una
+    CATEGORIAS = ['A', 'B', 'C']
+    UMBRALES = [Decimal('1000'), Decimal('2500')]
+    TASAS = {'A': Decimal('0.10'), 'B': Decimal('0.15'), 'C': Decimal('0.20')}
 
     PagTriCod = models.AutoField(db_column='PagTriCod', primary_key=True, verbose_name="Pago Tributario Codigo")
     PagTriFec = models.DateField(db_column='PagTriFec', default=timezone.now, verbose_name="Pago Tributario Fecha emitida")
@@ -194,6 +373,11 @@ class PagoTributario(models.Model):
     PagTriCat = models.CharField(db_column='PagTriCat', max_length=1, null=True, default=' ', verbose_name="Categoria")
     PagTriPag = models.DecimalField(db_column='PagTriPag', max_digits=8, decimal_places=2, default=0, verbose_name="Pago Total")
     PagTriEstReg = models.CharField(db_column='PagTriEstReg', max_length=15, choices=ESTADOS, default="debe", verbose_name="Estado de Pago")
+    # Se incrementa en cada UPDATE; ver VersionadoMixin
+    PagTriVer = models.PositiveIntegerField(db_column='PagTriVer', default=0, editable=False, verbose_name="Versión")
+
+    CAMPO_VERSION = 'PagTriVer'
+    objects = PagoTributarioQuerySet.as_manager()
 
     class Meta:
         db_table = 'Pago_Tributario'
@@ -201,38 +385,53 @@ class PagoTributario(models.Model):
 
     def __str__(self):
         return f"Pago {self.PagTriCod}"
+
+    @classmethod
+    def validar_transicion(cls, desde, hacia):
+        if hacia not in cls.TRANSICIONES.get(desde, ()):
+            raise ValidationError(f"No se puede pasar un pago de '{desde}' a '{hacia}'.")
     
     def clean(self):
         # Validar que no haya duplicados de casa
         if PagoTributario.objects.filter(CasCod=self.CasCod).exists() and self.pk is None:
             raise ValidationError("Esta casa ya tiene un pago tributario asignado.")
 
+        # Validar que el cambio de estado sea una transición permitida
+        if self.pk:
+            estado_anterior = PagoTributario.objects.filter(pk=self.pk).values_list('PagTriEstReg', flat=True).first()
+            if estado_anterior and estado_anterior != self.PagTriEstReg:
+                self.validar_transicion(estado_anterior, self.PagTriEstReg)
+
     def save(self, *args, **kwargs):
         propietario = Propietario.objects.filter(PerCod__FamCod=self.CasCod.FamCod).first()
         if propietario:
             self.PagTriIngFam = propietario.ProMonIngFam
             # Asignar la categoría basada en el ingreso familiar
-            if self.PagTriIngFam < 1000:
-                self.PagTriCat = 'A'
-            elif 1000 <= self.PagTriIngFam < 2500:
-                self.PagTriCat = 'B'
-            else:
-                self.PagTriCat = 'C'
-                
-            if self.PagTriCat == 'A':
-                self.PagTriPag = Decimal(self.PagTriIngFam) * Decimal('0.10')
-            elif self.PagTriCat == 'B':
-                self.PagTriPag = Decimal(self.PagTriIngFam) * Decimal('0.15')
-            elif self.PagTriCat == 'C':
-                self.PagTriPag = Decimal(self.PagTriIngFam) * Decimal('0.20')
+            self.PagTriCat = self.CATEGORIAS[bisect_right(self.UMBRALES, self.PagTriIngFam)]
+            self.PagTriPag = Decimal(self.PagTriIngFam) * self.TASAS[self.PagTriCat]
             self.PagTriPag = self.PagTriPag.quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
         else:
-            raise ValidationError("No se encontró un propietario para esta casa.")
+            raise ValidationError("No se encontró un propietario para esta casa.", code='sin_propietario')
         
         self.full_clean()  # Realizar la validación antes de guardar
-        super().save(*args, **kwargs)
+        anterior = None
+        if self.pk:
+            anterior = PagoTributario.objects.filter(pk=self.pk).values_list('CasCod__CasMunCod', 'PagTriEstReg').first()
+        actual = (self.CasCod.CasMunCod, self.PagTriEstReg)
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            # Mantener los contadores por municipio en la misma transacción
+            if anterior != actual:
+                if anterior:
+                    ContadorEstadoPago.ajustar(*anterior, -1)
+                ContadorEstadoPago.ajustar(*actual, 1)
+            # Conservar la tasación del año fiscal en el historial
+            HistorialTributario.objects.update_or_create(
+                CasCod_id=self.CasCod_id, HisTriAno=self.PagTriFec.year,
+                defaults={'HisTriFec': self.PagTriFec, 'HisTriIngFam': self.PagTriIngFam, 'HisTriCat': self.PagTriCat, 'HisTriPag': self.PagTriPag},
+            )
     
-class Propietario(models.Model):
+class Propietario(GuardadoAtomicoMixin, models.Model):
     ProCod = models.AutoField(db_column='ProCod', primary_key=True, verbose_name="Código")
     ProMonIngFam = models.DecimalField(db_column='ProMonIngFam', max_digits=10, decimal_places=2, default=0, verbose_name="Monto Ingreso Familiar")
     PerCod = models.ForeignKey(Persona, on_delete=models.CASCADE, db_column='PerCod', verbose_name="Código de Persona")
@@ -261,3 +460,225 @@ class Propietario(models.Model):
 
         self.full_clean()  # Validar antes de guardar
         super().save(*args, **kwargs)
+
+class ContadorEstadoPago(models.Model):
+    ConEstCod = models.AutoField(db_column='ConEstCod', primary_key=True, verbose_name="Código")
+    MunCod = models.ForeignKey(Municipio, on_delete=models.CASCADE, db_column='MunCod', verbose_name="Código de Municipio")
+    ConEstEst = models.CharField(db_column='ConEstEst', max_length=15, choices=PagoTributario.ESTADOS, verbose_name="Estado de Pago")
+    ConEstCan = models.IntegerField(db_column='ConEstCan', default=0, verbose_name="Cantidad de Pagos")
+
+    class Meta:
+        db_table = 'Contador_Estado_Pago'
+        unique_together = [['MunCod', 'ConEstEst']]
+
+    def __str__(self):
+        return f"{self.MunCod_id} - {self.ConEstEst}: {self.ConEstCan}"
+
+    @classmethod
+    def ajustar(cls, mun_cod, estado, delta):
+        # Casas sin jerarquía calculada no se cuentan en ningún municipio
+        if mun_cod is None or not delta:
+            return
+        # Restar nunca crea el contador: al borrar un municipio, el suyo se elimina antes que sus pagos
+        _incrementar(cls, {'MunCod_id': mun_cod, 'ConEstEst': estado}, crear=delta > 0, ConEstCan=delta)
+
+    @classmethod
+    def trasladar(cls, casas, mun_cod):
+        # Antes de cambiar CasMunCod: los pagos de `casas` de otro municipio pasan a contar en `mun_cod`
+        filas = (PagoTributario.objects.filter(CasCod__in=casas).exclude(CasCod__CasMunCod=mun_cod)
+                 .values_list('CasCod__CasMunCod', 'PagTriEstReg').annotate(cantidad=models.Count('PagTriCod')).order_by())
+        for anterior, estado, cantidad in filas:
+            cls.ajustar(anterior, estado, -cantidad)
+            cls.ajustar(mun_cod, estado, cantidad)
+
+    @classmethod
+    def recalcular(cls):
+        # Reconstruir todos los contadores a partir de Pago_Tributario
+        filas = (PagoTributario.objects.exclude(CasCod__CasMunCod=None)
+                 .values('CasCod__CasMunCod', 'PagTriEstReg')
+                 .annotate(cantidad=models.Count('PagTriCod')))
+        with transaction.atomic():
+            cls.objects.all().delete()
+            cls.objects.bulk_create([
+                cls(MunCod_id=fila['CasCod__CasMunCod'], ConEstEst=fila['PagTriEstReg'], ConEstCan=fila['cantidad'])
+                for fila in filas
+            ])
+
+class HistorialTributarioQuerySet(models.QuerySet):
+    def del_anio(self, anio):
+        # Filtrar por HisTriAno permite a MySQL leer una sola partición
+        return self.filter(HisTriAno=anio)
+
+    def anio_actual(self):
+        return self.del_anio(timezone.localdate().year)
+
+class HistorialTributario(models.Model):
+    HisTriCod = models.AutoField(db_column='HisTriCod', primary_key=True, verbose_name="Código")
+    # Sin restricción de clave foránea: MySQL no la admite en tablas particionadas
+    CasCod = models.ForeignKey(Casa, on_delete=models.CASCADE, db_constraint=False, db_column='CasCod', verbose_name="Código de Casa")
+    HisTriAno = models.IntegerField(db_column='HisTriAno', verbose_name="Año Fiscal")
+    HisTriFec = models.DateField(db_column='HisTriFec', verbose_name="Fecha emitida")
+    HisTriIngFam = models.DecimalField(db_column='HisTriIngFam', max_digits=6, decimal_places=2, default=0, verbose_name="Ingreso Familiar")
+    HisTriCat = models.CharField(db_column='HisTriCat', max_length=1, null=True, default=' ', verbose_name="Categoria")
+    HisTriPag = models.DecimalField(db_column='HisTriPag', max_digits=8, decimal_places=2, default=0, verbose_name="Pago Total")
+
+    objects = HistorialTributarioQuerySet.as_manager()
+
+    class Meta:
+        db_table = 'Historial_Tributario'
+        unique_together = [['CasCod', 'HisTriAno']]
+        indexes = [models.Index(fields=['HisTriAno'], name='Historial_Tributario_anio')]
+
+    def __str__(self):
+        return f"Historial {self.CasCod_id} - {self.HisTriAno}"
+
+class EventoCambio(models.Model):
+    GUARDADO = 'G'
+    ELIMINADO = 'E'
+    OPERACIONES = [
+        (GUARDADO, 'Guardado'),
+        (ELIMINADO, 'Eliminado'),
+    ]
+
+    EveCod = models.BigAutoField(db_column='EveCod', primary_key=True, verbose_name="Código")
+    EveMod = models.CharField(db_column='EveMod', max_length=20, verbose_name="Modelo")
+    EvePk = models.IntegerField(db_column='EvePk', verbose_name="Código del Registro")
+    EveOpe = models.CharField(db_column='EveOpe', max_length=1, choices=OPERACIONES, verbose_name="Operación")
+    EveFec = models.DateTimeField(db_column='EveFec', auto_now_add=True, verbose_name="Fecha")
+
+    class Meta:
+        db_table = 'Evento_Cambio'
+        indexes = [models.Index(fields=['EveMod', 'EvePk'], name='Evento_Cambio_registro')]
+
+    def __str__(self):
+        return f"Evento {self.EveCod}"
+
+    @classmethod
+    def registrar(cls, modelo, pks, operacion=GUARDADO):
+        cls.objects.bulk_create([cls(EveMod=modelo._meta.model_name, EvePk=pk, EveOpe=operacion) for pk in pks])
+
+    @classmethod
+    def registrar_consulta(cls, queryset, operacion=GUARDADO):
+        # INSERT ... SELECT: un evento por fila de `queryset` sin traer sus PK a Python
+        conexion = connections[queryset.db]
+        consulta, parametros = queryset.order_by().values_list('pk').query.sql_with_params()
+        columnas = ", ".join(conexion.ops.quote_name(cls._meta.get_field(campo).column) for campo in ('EveMod', 'EvePk', 'EveOpe', 'EveFec'))
+        pk = conexion.ops.quote_name(queryset.model._meta.pk.column)
+        with conexion.cursor() as cursor:
+            cursor.execute(
+                f"INSERT INTO {conexion.ops.quote_name(cls._meta.db_table)} ({columnas}) "
+                f"SELECT %s, seleccion.{pk}, %s, %s FROM ({consulta}) seleccion",
+                [queryset.model._meta.model_name, operacion, conexion.ops.adapt_datetimefield_value(timezone.now()), *parametros],
+            )
+            return cursor.rowcount
+
+class CursorCambios(models.Model):
+    CurCod = models.AutoField(db_column='CurCod', primary_key=True, verbose_name="Código")
+    CurNom = models.CharField(db_column='CurNom', max_length=30, unique=True, verbose_name="Consumidor")
+    CurPos = models.BigIntegerField(db_column='CurPos', default=0, verbose_name="Último Evento Leído")
+
+    class Meta:
+        db_table = 'Cursor_Cambios'
+
+    def __str__(self):
+        return self.CurNom
+
+class VersionModelo(models.Model):
+    # Versión de los datos de cada modelo para las claves de la caché (ver Municipio.versiones)
+    VerCod = models.AutoField(db_column='VerCod', primary_key=True, verbose_name="Código")
+    VerMod = models.CharField(db_column='VerMod', max_length=100, unique=True, verbose_name="Modelo")
+    VerNum = models.BigIntegerField(db_column='VerNum', verbose_name="Versión")
+
+    class Meta:
+        db_table = 'Version_Modelo'
+
+    def __str__(self):
+        return f"{self.VerMod}: {self.VerNum}"
+
+class IndiceBusqueda(models.Model):
+    TIPOS = [
+        ('persona', 'Persona'),
+        ('familia', 'Familia'),
+        ('vivienda', 'Vivienda'),
+    ]
+
+    IndBusCod = models.AutoField(db_column='IndBusCod', primary_key=True, verbose_name="Código")
+    IndBusTip = models.CharField(db_column='IndBusTip', max_length=10, choices=TIPOS, verbose_name="Tipo")
+    IndBusPk = models.IntegerField(db_column='IndBusPk', verbose_name="Código del Registro")
+    IndBusTex = models.CharField(db_column='IndBusTex', max_length=100, db_index=True, verbose_name="Texto Normalizado")
+
+    class Meta:
+        db_table = 'Indice_Busqueda'
+        unique_together = [['IndBusTip', 'IndBusPk']]
+
+    def __str__(self):
+        return self.IndBusTex
+
+class ZonaCodigoPostal(models.Model):
+    ZonCodPosCod = models.AutoField(db_column='ZonCodPosCod', primary_key=True, verbose_name="Código")
+    ZonCod = models.ForeignKey(ZonaUrbana, on_delete=models.CASCADE, db_column='ZonCod', verbose_name="Código de Zona")
+    ZonCodPos = models.PositiveIntegerField(db_column='ZonCodPos', db_index=True, verbose_name="Código Postal")
+    ZonCodPosCan = models.IntegerField(db_column='ZonCodPosCan', default=0, verbose_name="Número de Viviendas")
+
+    class Meta:
+        db_table = 'Zona_Codigo_Postal'
+        unique_together = [['ZonCod', 'ZonCodPos']]
+
+    def __str__(self):
+        return f"{self.ZonCod_id} - {self.ZonCodPos}"
+
+class OcupacionZona(models.Model):
+    # Los mapas se guardan por páginas de VivCod: guardar una vivienda reescribe solo su página
+    BITS_PAGINA = 8192
+
+    OcuZonCod = models.AutoField(db_column='OcuZonCod', primary_key=True, verbose_name="Código")
+    ZonCod = models.ForeignKey(ZonaUrbana, on_delete=models.CASCADE, db_column='ZonCod', verbose_name="Código de Zona")
+    # Mapas de bits de los VivCod desde OcuZonPag * BITS_PAGINA: viviendas de la zona y viviendas ocupadas
+    OcuZonPag = models.PositiveIntegerField(db_column='OcuZonPag', default=0, verbose_name="Página")
+    OcuZonViv = models.BinaryField(db_column='OcuZonViv', default=b'', verbose_name="Viviendas")
+    OcuZonOcu = models.BinaryField(db_column='OcuZonOcu', default=b'', verbose_name="Viviendas Ocupadas")
+
+    class Meta:
+        db_table = 'Ocupacion_Zona'
+        unique_together = [['ZonCod', 'OcuZonPag']]
+
+    def __str__(self):
+        return f"Ocupación {self.ZonCod_id} - {self.OcuZonPag}"
+
+class EstadisticaVivienda(models.Model):
+    # Viviendas y viviendas ocupadas por zona, estado de registro y tipo; el municipio suma sus zonas
+    EstVivCod = models.AutoField(db_column='EstVivCod', primary_key=True, verbose_name="Código")
+    ZonCod = models.ForeignKey(ZonaUrbana, on_delete=models.CASCADE, db_column='ZonCod', verbose_name="Código de Zona")
+    EstVivEstReg = models.CharField(db_column='EstVivEstReg', max_length=1, verbose_name="Estado de Registro")
+    TipVivCod = models.ForeignKey(TipoVivienda, on_delete=models.CASCADE, db_column='TipVivCod', verbose_name="Código de Tipo de Vivienda")
+    EstVivCan = models.IntegerField(db_column='EstVivCan', default=0, verbose_name="Número de Viviendas")
+    EstVivOcu = models.IntegerField(db_column='EstVivOcu', default=0, verbose_name="Número de Viviendas Ocupadas")
+
+    class Meta:
+        db_table = 'Estadistica_Vivienda'
+        unique_together = [['ZonCod', 'EstVivEstReg', 'TipVivCod']]
+
+    def __str__(self):
+        return f"{self.ZonCod_id} - {self.EstVivEstReg} - {self.TipVivCod_id}: {self.EstVivOcu}/{self.EstVivCan}"
+
+class EstadisticaCasa(models.Model):
+    # Cantidad y suma de CasMet por zona, estado de registro y cubeta del histograma de superficie
+    CUBETAS = [Decimal('25'), Decimal('50'), Decimal('75'), Decimal('100'), Decimal('150'), Decimal('200'), Decimal('300')]
+
+    EstCasCod = models.AutoField(db_column='EstCasCod', primary_key=True, verbose_name="Código")
+    ZonCod = models.ForeignKey(ZonaUrbana, on_delete=models.CASCADE, db_column='ZonCod', verbose_name="Código de Zona")
+    EstCasEstReg = models.CharField(db_column='EstCasEstReg', max_length=1, verbose_name="Estado de Registro")
+    EstCasCub = models.PositiveSmallIntegerField(db_column='EstCasCub', verbose_name="Cubeta")
+    EstCasCan = models.IntegerField(db_column='EstCasCan', default=0, verbose_name="Número de Casas")
+    EstCasMet = models.DecimalField(db_column='EstCasMet', max_digits=14, decimal_places=2, default=0, verbose_name="Metros")
+
+    class Meta:
+        db_table = 'Estadistica_Casa'
+        unique_together = [['ZonCod', 'EstCasEstReg', 'EstCasCub']]
+
+    def __str__(self):
+        return f"{self.ZonCod_id} - {self.EstCasEstReg} - {self.EstCasCub}: {self.EstCasCan}"
+
+    @classmethod
+    def cubeta(cls, metros):
+        return bisect_right(cls.CUBETAS, metros)
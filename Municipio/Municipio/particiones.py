@@ -0,0 +1,62 @@
+from django.db import connection, transaction
+from django.core.exceptions import ValidationError
+from django.utils import timezone
+from .models import HistorialTributario
+
+TABLA = HistorialTributario._meta.db_table
+
+
+def tabla_archivo(anio):
+    return f"{TABLA}_{anio}"
+
+
+def particiones_existentes():
+    # Nombres de las particiones de Historial_Tributario (vacío fuera de MySQL)
+    if connection.vendor != 'mysql':
+        return []
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT PARTITION_NAME FROM information_schema.PARTITIONS "
+            "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND PARTITION_NAME IS NOT NULL "
+            "ORDER BY PARTITION_ORDINAL_POSITION",
+            [TABLA],
+        )
+        return [fila[0] for fila in cursor.fetchall()]
+
+
+def preparar_particion(anio):
+    # Separar el año de la partición pmax antes de que reciba filas
+    if connection.vendor != 'mysql' or f"p{anio}" in particiones_existentes():
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"ALTER TABLE `{TABLA}` REORGANIZE PARTITION pmax INTO ("
+            f"PARTITION p{anio} VALUES LESS THAN ({anio + 1}), "
+            f"PARTITION pmax VALUES LESS THAN MAXVALUE)"
+        )
+    return True
+
+
+def archivar_anio(anio):
+    # Mover las tasaciones de un año cerrado a su propia tabla Historial_Tributario_<año>
+    if anio >= timezone.localdate().year:
+        raise ValidationError("Solo se pueden archivar años fiscales cerrados.")
+    if tabla_archivo(anio) in connection.introspection.table_names():
+        raise ValidationError(f"El año {anio} ya está archivado en {tabla_archivo(anio)}.")
+    archivo = connection.ops.quote_name(tabla_archivo(anio))
+    tabla = connection.ops.quote_name(TABLA)
+    if connection.vendor == 'mysql':
+        if f"p{anio}" not in particiones_existentes():
+            raise ValidationError(f"No existe la partición del año {anio}.")
+        # Intercambio de partición: operación de metadatos, sin DELETE masivo
+        with connection.cursor() as cursor:
+            cursor.execute(f"CREATE TABLE {archivo} LIKE {tabla}")
+            cursor.execute(f"ALTER TABLE {archivo} REMOVE PARTITIONING")
+            cursor.execute(f"ALTER TABLE {tabla} EXCHANGE PARTITION p{anio} WITH TABLE {archivo}")
+            cursor.execute(f"SELECT COUNT(*) FROM {archivo}")
+            return cursor.fetchone()[0]
+    # Emulación para SQLite: copiar y borrar el año en una transacción
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f"CREATE TABLE {archivo} AS SELECT * FROM {tabla} WHERE HisTriAno = %s", [anio])
+        cursor.execute(f"DELETE FROM {tabla} WHERE HisTriAno = %s", [anio])
+        return cursor.rowcount
@@ -0,0 +1,111 @@
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.db.models import Case, Count, DecimalField, Q, Sum, Value, When
+from django.db.models.functions import Coalesce
+
+from .models import Casa, Municipio, PagoTributario, ZonaUrbana
+from .versiones import versiones
+
+NIVELES = ('municipio', 'zona', 'categoria')
+
+# Columnas de agrupación de cada nivel, sobre la jerarquía precalculada de Casa
+AGRUPACION = {
+    'municipio': ('CasCod__CasMunCod',),
+    'zona': ('CasCod__CasMunCod', 'CasCod__CasZonCod'),
+    'categoria': ('CasCod__CasMunCod', 'PagTriCat'),
+}
+
+# Estado de pago -> nombre del importe en el informe
+IMPORTES = {
+    'pagada': 'recaudado',
+    'en proceso': 'pendiente',
+    'debe': 'adeudado',
+}
+
+# Cambios que alteran el informe: pagos, casas que cambian de zona, presupuestos y nombres
+MODELOS = (PagoTributario, Casa, Municipio, ZonaUrbana)
+
+CERO = Decimal('0.00')
+
+
+def _suma(filtro=None):
+    monto = 'PagTriPag' if filtro is None else Case(When(filtro, then='PagTriPag'), default=Value(CERO))
+    return Coalesce(Sum(monto, output_field=DecimalField(max_digits=14, decimal_places=2)), Value(CERO))
+
+
+def _clave(nivel, anio):
+    # Las versiones de todos los modelos, de la caché o en una sola consulta
+    numeros = ":".join(map(str, versiones(*MODELOS).values()))
+    return f"presupuesto:{nivel}:{anio or 'todos'}:{numeros}"
+
+
+def _agrupar(nivel, anio):
+    # Una sola consulta agrupada: SUM(CASE WHEN estado = ... THEN PagTriPag ELSE 0 END) por estado
+    pagos = PagoTributario.objects.all()
+    if anio:
+        pagos = pagos.filter(PagTriFec__year=anio)
+    return pagos.values(*AGRUPACION[nivel]).order_by(*AGRUPACION[nivel]).annotate(
+        pagos=Count('PagTriCod'),
+        emitido=_suma(),
+        **{importe: _suma(Q(PagTriEstReg=estado)) for estado, importe in IMPORTES.items()},
+    )
+
+
+def _importes(fila):
+    return {'pagos': fila['pagos'], **{importe: Decimal(fila[importe]).quantize(CERO) for importe in ('emitido', *IMPORTES.values())}}
+
+
+def _calcular(nivel, anio):
+    municipios = {mun['MunCod']: mun for mun in Municipio.objects.values('MunCod', 'MunNom', 'MunPreAnu')}
+    filas = []
+    if nivel == 'municipio':
+        totales = {fila['CasCod__CasMunCod']: fila for fila in _agrupar(nivel, anio)}
+        # También los municipios sin pagos, cuyo presupuesto queda sin ejecutar
+        for mun_cod in sorted(set(municipios) | set(totales), key=lambda cod: (cod is None, cod)):
+            municipio = municipios.get(mun_cod, {})
+            importes = _importes(totales.get(mun_cod, {'pagos': 0, 'emitido': CERO, **dict.fromkeys(IMPORTES.values(), CERO)}))
+            presupuesto = municipio.get('MunPreAnu')
+            filas.append({
+                'municipio': mun_cod,
+                'nombre': municipio.get('MunNom'),
+                'presupuesto': presupuesto,
+                **importes,
+                'ejecucion': (importes['recaudado'] * 100 / presupuesto).quantize(Decimal('0.01')) if presupuesto else None,
+            })
+    elif nivel == 'zona':
+        zonas = dict(ZonaUrbana.objects.values_list('ZonCod', 'ZonNom'))
+        for fila in _agrupar(nivel, anio):
+            filas.append({
+                'municipio': fila['CasCod__CasMunCod'],
+                'zona': fila['CasCod__CasZonCod'],
+                'nombre': zonas.get(fila['CasCod__CasZonCod']),
+                **_importes(fila),
+            })
+    else:
+        for fila in _agrupar(nivel, anio):
+            filas.append({
+                'municipio': fila['CasCod__CasMunCod'],
+                'nombre': municipios.get(fila['CasCod__CasMunCod'], {}).get('MunNom'),
+                'categoria': fila['PagTriCat'],
+                **_importes(fila),
+            })
+    return filas
+
+
+def ejecucion_presupuestaria(nivel='municipio', anio=None):
+    """
+    Importes recaudados, pendientes y adeudados por municipio, zona o categoría.
+
+    El resultado se guarda en la caché bajo las versiones de los modelos de MODELOS, que están en la
+    base: cualquier escritura en PagoTributario lo invalida. La de otro proceso se ve al vencer la
+    versión guardada en la caché (versiones.VIGENCIA).
+    """
+    if nivel not in NIVELES:
+        raise ValueError(f"Nivel '{nivel}' no válido; use uno de {', '.join(NIVELES)}.")
+    clave = _clave(nivel, anio)
+    filas = cache.get(clave)
+    if filas is None:
+        filas = _calcular(nivel, anio)
+        cache.set(clave, filas, timeout=None)
+    return filas
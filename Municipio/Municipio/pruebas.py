@@ -0,0 +1,127 @@
+import ast
+import hashlib
+import importlib.util
+import os
+import sqlite3
+
+import django
+from django.apps import apps
+from django.conf import settings
+from django.core.management import call_command
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test.runner import DiscoverRunner
+
+
+def _modulos_del_proyecto(ruta):
+    """Archivos de los módulos del proyecto (bajo BASE_DIR) que importa el archivo Python `ruta`."""
+    with open(ruta, 'rb') as archivo:
+        arbol = ast.parse(archivo.read(), ruta)
+    nombres = set()
+    for nodo in ast.walk(arbol):
+        if isinstance(nodo, ast.Import):
+            nombres.update(alias.name for alias in nodo.names)
+        elif isinstance(nodo, ast.ImportFrom) and nodo.module and not nodo.level:
+            # "from paquete import modulo" también puede importar un submódulo
+            nombres.add(nodo.module)
+            nombres.update(f"{nodo.module}.{alias.name}" for alias in nodo.names)
+    proyecto = os.path.join(os.path.abspath(settings.BASE_DIR), '')
+    modulos = set()
+    for nombre in nombres:
+        try:
+            especificacion = importlib.util.find_spec(nombre)
+        except (ImportError, ValueError):
+            continue  # Un nombre importado desde un módulo, no un submódulo
+        if especificacion and especificacion.origin and os.path.isfile(especificacion.origin):
+            origen = os.path.abspath(especificacion.origin)
+            if origen.startswith(proyecto):
+                modulos.add(origen)
+    return sorted(modulos)
+
+
+def _firma():
+    """
+    Hash de las migraciones y fixtures de todas las aplicaciones: cambia si cambia el esquema o los datos.
+
+    Incluye los módulos del proyecto que importan las migraciones, porque su código también define los datos migrados.
+    """
+    firma = hashlib.sha256(django.get_version().encode())
+    firma.update(repr(getattr(settings, 'FIXTURES_PRUEBAS', [])).encode())
+    importados = set()
+    for app in sorted(apps.get_app_configs(), key=lambda app: app.label):
+        for subdirectorio in ('migrations', 'fixtures'):
+            directorio = os.path.join(app.path, subdirectorio)
+            if not os.path.isdir(directorio):
+                continue
+            for nombre in sorted(os.listdir(directorio)):
+                if nombre.endswith(('.py', '.json')):
+                    firma.update(f"{app.label}/{subdirectorio}/{nombre}".encode())
+                    with open(os.path.join(directorio, nombre), 'rb') as archivo:
+                        firma.update(archivo.read())
+                if subdirectorio == 'migrations' and nombre.endswith('.py'):
+                    importados.update(_modulos_del_proyecto(os.path.join(directorio, nombre)))
+    for ruta in sorted(importados):
+        firma.update(os.path.relpath(ruta, settings.BASE_DIR).encode())
+        with open(ruta, 'rb') as archivo:
+            firma.update(archivo.read())
+    return firma.hexdigest()[:16]
+
+
+def ruta_instantanea():
+    return os.path.join(settings.INSTANTANEAS_PRUEBAS, f"instantanea_{_firma()}.sqlite3")
+
+
+def construir_instantanea(ruta, verbosidad=0):
+    """Aplica las migraciones y carga FIXTURES_PRUEBAS en un archivo SQLite nuevo."""
+    os.makedirs(os.path.dirname(ruta), exist_ok=True)
+    temporal = f"{ruta}.{os.getpid()}.tmp"
+    conexion = connections[DEFAULT_DB_ALIAS]
+    original = conexion.settings_dict['NAME']
+    conexion.close()
+    conexion.settings_dict['NAME'] = temporal
+    try:
+        call_command('migrate', verbosity=max(verbosidad - 1, 0), interactive=False, database=DEFAULT_DB_ALIAS)
+        fixtures = getattr(settings, 'FIXTURES_PRUEBAS', [])
+        if fixtures:
+            call_command('loaddata', *fixtures, verbosity=max(verbosidad - 1, 0), database=DEFAULT_DB_ALIAS)
+    finally:
+        conexion.close()
+        conexion.settings_dict['NAME'] = original
+    # Varias ejecuciones en paralelo pueden construirla a la vez: gana la última, todas son iguales
+    os.replace(temporal, ruta)
+
+
+class RunnerInstantanea(DiscoverRunner):
+    """
+    Crea la base de pruebas SQLite copiando una instantánea con el esquema migrado y los fixtures.
+
+    La instantánea se construye la primera vez y se reutiliza mientras no cambien las migraciones ni
+    los fixtures. Con otra base de datos, varias bases o pruebas en paralelo se usa el proceso normal.
+    """
+
+    def setup_databases(self, **kwargs):
+        conexion = connections[DEFAULT_DB_ALIAS]
+        if conexion.vendor != 'sqlite' or len(connections.databases) > 1 or self.parallel > 1 or self.keepdb:
+            return super().setup_databases(**kwargs)
+        instantanea = ruta_instantanea()
+        if not os.path.exists(instantanea):
+            if self.verbosity >= 1:
+                self.log(f"Construyendo la instantánea de la base de pruebas en {instantanea}...")
+            construir_instantanea(instantanea, self.verbosity)
+        elif self.verbosity >= 1:
+            self.log(f"Usando la instantánea de la base de pruebas {instantanea}.")
+
+        original = conexion.settings_dict['NAME']
+        nombre = conexion.creation._get_test_db_name()
+        conexion.close()
+        if not conexion.creation.is_in_memory_db(nombre) and os.path.exists(nombre):
+            os.remove(nombre)
+        settings.DATABASES[DEFAULT_DB_ALIAS]['NAME'] = nombre
+        conexion.settings_dict['NAME'] = nombre
+        conexion.ensure_connection()
+        # Copia página a página con la API de respaldo de SQLite, también hacia una base en memoria
+        fuente = sqlite3.connect(instantanea)
+        try:
+            fuente.backup(conexion.connection)
+        finally:
+            fuente.close()
+        return [(conexion, original, True)]
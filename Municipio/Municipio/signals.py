@@ -0,0 +1,96 @@
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+from . import estadisticas, zonas
+from .busqueda import desindexar, indexar
+from .versiones import incrementar_version
+from .models import (Casa, ContadorEstadoPago, EventoCambio, Familia, Municipio, PagoTributario, Persona,
+                     Propietario, Region, TipoPersona, TipoVivienda, Vivienda, ZonaUrbana)
+
+# Modelos del censo cuyos cambios se publican en Evento_Cambio
+MODELOS_CON_CAMBIOS = (Region, Municipio, ZonaUrbana, TipoVivienda, Vivienda, Familia, TipoPersona, Persona, Casa,
+                       PagoTributario, Propietario)
+
+
+@receiver(post_delete, sender=PagoTributario)
+def descontar_pago_eliminado(sender, instance, **kwargs):
+    # La casa aún existe: el borrado en cascada elimina los pagos antes que la casa
+    mun_cod = Casa.objects.filter(pk=instance.CasCod_id).values_list('CasMunCod', flat=True).first()
+    ContadorEstadoPago.ajustar(mun_cod, instance.PagTriEstReg, -1)
+
+
+def registrar_guardado(sender, instance, **kwargs):
+    EventoCambio.registrar(sender, [instance.pk])
+    incrementar_version(sender)
+
+
+def registrar_eliminacion(sender, instance, **kwargs):
+    EventoCambio.registrar(sender, [instance.pk], EventoCambio.ELIMINADO)
+    incrementar_version(sender)
+
+
+for modelo in MODELOS_CON_CAMBIOS:
+    post_save.connect(registrar_guardado, sender=modelo, dispatch_uid=f'cambios_guardado_{modelo._meta.model_name}')
+    post_delete.connect(registrar_eliminacion, sender=modelo, dispatch_uid=f'cambios_eliminacion_{modelo._meta.model_name}')
+
+
+@receiver(post_save, sender=Persona)
+@receiver(post_save, sender=Familia)
+@receiver(post_save, sender=Vivienda)
+def indexar_busqueda(sender, instance, **kwargs):
+    indexar(instance)
+
+
+@receiver(post_delete, sender=Persona)
+@receiver(post_delete, sender=Familia)
+@receiver(post_delete, sender=Vivienda)
+def desindexar_busqueda(sender, instance, **kwargs):
+    desindexar(sender, instance.pk)
+
+
+# Campos de Vivienda que usa el índice de zonas; la fila anterior la lee recordar_fila_anterior()
+UBICACION = ('ZonCod_id', 'VivCodPosNum', 'VivOcu')
+
+
+@receiver(post_save, sender=Vivienda)
+def actualizar_indice_zonas(sender, instance, **kwargs):
+    anterior = getattr(instance, '_ubicacion_anterior', None)
+    actual = (instance.ZonCod_id, instance.VivCodPosNum, instance.VivOcu)
+    if anterior == actual:
+        return
+    if anterior:
+        zonas.aplicar(anterior[0], anterior[1], instance.pk, anterior[2] == 'S', -1)
+    zonas.aplicar(actual[0], actual[1], instance.pk, actual[2] == 'S', 1)
+
+
+@receiver(post_delete, sender=Vivienda)
+def descontar_vivienda_zonas(sender, instance, **kwargs):
+    zonas.aplicar(instance.ZonCod_id, instance.VivCodPosNum, instance.pk, False, -1)
+
+
+@receiver(pre_save, sender=Vivienda)
+@receiver(pre_save, sender=Casa)
+@receiver(pre_delete, sender=Vivienda)
+@receiver(pre_delete, sender=Casa)
+def recordar_fila_anterior(sender, instance, **kwargs):
+    # Una sola lectura de la fila para las estadísticas y el índice de zonas. Se lee de la base: la
+    # instancia puede estar desactualizada por un UPDATE en bloque
+    instance._estadistica_anterior, instance._ubicacion_anterior = [], None
+    campos = estadisticas.CAMPOS[sender]
+    ubicacion = UBICACION if sender is Vivienda else ()
+    fila = sender.objects.filter(pk=instance.pk).values(*dict.fromkeys([*campos, *ubicacion])).first() if instance.pk else None
+    if fila is not None:
+        instance._estadistica_anterior = [tuple(fila[campo] for campo in campos)]
+        if ubicacion:
+            instance._ubicacion_anterior = tuple(fila[campo] for campo in ubicacion)
+
+
+@receiver(post_save, sender=Vivienda)
+@receiver(post_save, sender=Casa)
+def actualizar_estadisticas(sender, instance, **kwargs):
+    estadisticas.aplicar(sender, getattr(instance, '_estadistica_anterior', []), [estadisticas.fila(instance)])
+
+
+@receiver(post_delete, sender=Vivienda)
+@receiver(post_delete, sender=Casa)
+def descontar_estadisticas(sender, instance, **kwargs):
+    estadisticas.aplicar(sender, getattr(instance, '_estadistica_anterior', []), [])
@@ -0,0 +1,129 @@
+from array import array
+from bisect import bisect_right
+from decimal import Decimal
+
+from .iteracion import por_lotes
+from .models import Casa, PagoTributario, Propietario
+
+# Las tasas se manejan en millonésimas para calcular montos en céntimos con enteros
+ESCALA_TASA = 1000000
+SIN_CODIGO = -1
+
+# NumPy es opcional y costoso de importar: se carga al crear la primera instantánea
+np = False
+
+
+def _numpy():
+    global np
+    if np is False:
+        try:
+            import numpy as np
+        except ImportError:  # Sin NumPy se usan los arreglos del módulo array
+            np = None
+    return np
+
+
+def _centimos(valor):
+    return int((Decimal(valor) * 100).to_integral_value())
+
+
+def _a_decimal(centimos):
+    return (Decimal(int(centimos)) / 100).quantize(Decimal('0.01'))
+
+
+class InstantaneaCatastro:
+    """Copia de solo lectura, por columnas, de las casas con su zona, municipio e ingreso familiar."""
+
+    COLUMNAS = ('cas_cod', 'zon_cod', 'mun_cod', 'cas_met', 'ingreso', 'con_propietario')
+
+    def __init__(self, cas_cod, zon_cod, mun_cod, cas_met, ingreso, con_propietario):
+        self.cas_cod = cas_cod
+        self.zon_cod = zon_cod
+        self.mun_cod = mun_cod
+        self.cas_met = cas_met  # Céntimos de metro cuadrado
+        self.ingreso = ingreso  # Céntimos
+        self.con_propietario = con_propietario
+        if _numpy() is not None:
+            # Vista sin copia sobre los mismos búferes
+            for nombre in self.COLUMNAS:
+                columna = getattr(self, nombre)
+                if isinstance(columna, (array, memoryview)):
+                    setattr(self, nombre, np.frombuffer(columna, dtype=np.dtype(getattr(columna, 'typecode', None) or columna.format)))
+
+    def __len__(self):
+        return len(self.cas_cod)
+
+    @classmethod
+    def cargar(cls, tamano_lote=5000):
+        ingresos = {}
+        for fam_cod, monto in Propietario.objects.values_list('PerCod__FamCod', 'ProMonIngFam').order_by('-ProCod'):
+            ingresos[fam_cod] = _centimos(monto)  # Prevalece el primer propietario, como en PagoTributario.save()
+        columnas = {nombre: array('q') for nombre in cls.COLUMNAS[:-1]}
+        columnas['con_propietario'] = array('b')
+        casas = Casa.objects.values_list('CasCod', 'CasZonCod', 'CasMunCod', 'CasMet', 'FamCod')
+        for lote in por_lotes(casas, tamano_lote):
+            for cas_cod, zon_cod, mun_cod, cas_met, fam_cod in lote:
+                ingreso = ingresos.get(fam_cod)
+                columnas['cas_cod'].append(cas_cod)
+                columnas['zon_cod'].append(SIN_CODIGO if zon_cod is None else zon_cod)
+                columnas['mun_cod'].append(SIN_CODIGO if mun_cod is None else mun_cod)
+                columnas['cas_met'].append(_centimos(cas_met))
+                columnas['ingreso'].append(ingreso or 0)
+                columnas['con_propietario'].append(ingreso is not None)
+        return cls(**columnas)
+
+    @classmethod
+    def desde_volcado(cls, volcado):
+        """Instantánea sobre las columnas mapeadas de un VolcadoCatastro, sin consultar la base."""
+        casa = volcado.columnas('casa')
+        if _numpy() is not None:
+            con_propietario = (np.frombuffer(casa['ingreso'], dtype=np.int64) >= 0).astype(np.int8)
+        else:
+            con_propietario = array('b', (ingreso >= 0 for ingreso in casa['ingreso']))
+        return cls(casa['cas_cod'], casa['zon_cod'], casa['mun_cod'], casa['cas_met'], casa['ingreso'], con_propietario)
+
+    def simular(self, umbrales=None, tasas=None):
+        """Monto en céntimos de cada casa con los umbrales y tasas dados (por defecto los vigentes)."""
+        umbrales = PagoTributario.UMBRALES if umbrales is None else umbrales
+        tasas = [PagoTributario.TASAS[cat] for cat in PagoTributario.CATEGORIAS] if tasas is None else tasas
+        if len(tasas) != len(umbrales) + 1:
+            raise ValueError("Debe haber una tasa más que umbrales.")
+        if list(umbrales) != sorted(umbrales):
+            raise ValueError("Los umbrales deben estar en orden ascendente.")
+        umbrales = [_centimos(umbral) for umbral in umbrales]
+        tasas = [int((Decimal(tasa) * ESCALA_TASA).to_integral_value()) for tasa in tasas]
+        mitad = ESCALA_TASA // 2
+        if np is not None:
+            tasa = np.asarray(tasas, dtype=np.int64)[np.searchsorted(umbrales, self.ingreso, side='right')]
+            montos = (self.ingreso * tasa + mitad) // ESCALA_TASA
+            return np.where(self.con_propietario != 0, montos, 0)
+        montos = array('q')
+        for ingreso, con_propietario in zip(self.ingreso, self.con_propietario):
+            tasa = tasas[bisect_right(umbrales, ingreso)]
+            montos.append((ingreso * tasa + mitad) // ESCALA_TASA if con_propietario else 0)
+        return montos
+
+    def totales(self, montos, nivel='municipio'):
+        codigos = self.mun_cod if nivel == 'municipio' else self.zon_cod
+        if np is not None:
+            unicos, indices = np.unique(codigos, return_inverse=True)
+            sumas = np.bincount(indices, weights=montos, minlength=len(unicos)) if len(unicos) else []
+            return {int(cod): int(round(total)) for cod, total in zip(unicos, sumas)}
+        resultado = {}
+        for cod, monto in zip(codigos, montos):
+            resultado[cod] = resultado.get(cod, 0) + monto
+        return resultado
+
+    def comparar(self, umbrales, tasas, nivel='municipio'):
+        """Recaudación vigente y simulada por municipio o zona, en Decimal; no escribe en la base."""
+        vigente = self.totales(self.simular(), nivel)
+        simulada = self.totales(self.simular(umbrales, tasas), nivel)
+        return [
+            {
+                'codigo': None if cod == SIN_CODIGO else cod,
+                'vigente': _a_decimal(vigente.get(cod, 0)),
+                'simulada': _a_decimal(simulada.get(cod, 0)),
+                'diferencia': _a_decimal(simulada.get(cod, 0) - vigente.get(cod, 0)),
+            }
+            for cod in sorted(set(vigente) | set(simulada))
+        ]
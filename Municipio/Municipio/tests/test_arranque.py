@@ -0,0 +1,39 @@
+import os
+import subprocess
+import sys
+import textwrap
+
+from django.conf import settings
+from django.core.management import get_commands, load_command_class
+from django.test import SimpleTestCase
+
+
+class ArranqueTests(SimpleTestCase):
+    def test_perfil_por_lotes_sin_numpy_al_importar(self):
+        # En un proceso nuevo: se registra cada intento de importar numpy
+        programa = textwrap.dedent("""
+            import sys
+            intentos = []
+            class Registro:
+                def find_spec(self, nombre, ruta=None, objetivo=None):
+                    if nombre.split('.')[0] == 'numpy':
+                        intentos.append(nombre)
+            sys.meta_path.insert(0, Registro())
+            import django
+            django.setup()
+            from django.conf import settings
+            from Municipio import simulacion
+            print(settings.INSTALLED_APPS, settings.MIDDLEWARE, len(intentos))
+            simulacion._numpy()
+            print(len(intentos) > 0)
+        """)
+        salida = subprocess.run([sys.executable, '-c', programa], cwd=settings.BASE_DIR, capture_output=True, text=True, check=True,
+                                env={**os.environ, 'DJANGO_SETTINGS_MODULE': 'mysite.settings_batch'}).stdout.split('\n')
+        self.assertEqual(salida[:2], ["['Municipio'] [] 0", 'True'])
+
+    def test_comandos_sin_verificaciones_del_sistema(self):
+        comandos = [nombre for nombre, aplicacion in get_commands().items() if aplicacion == 'Municipio']
+        self.assertTrue(comandos)
+        for nombre in comandos:
+            with self.subTest(comando=nombre):
+                self.assertEqual(load_command_class('Municipio', nombre).requires_system_checks, [])
@@ -0,0 +1,71 @@
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from ..auditoria import ConjuntoPks, aplicar_plan, auditar
+from ..models import Familia, Municipio, Persona, Region, TipoPersona, TipoVivienda, Vivienda, ZonaUrbana
+
+
+class AuditoriaTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.municipio = Municipio.objects.create(MunNom="Chiclayo", RegCod=Region.objects.create(RegNom="Lambayeque"))
+        zona = ZonaUrbana.objects.create(ZonNom="La Victoria", MunCod=cls.municipio)
+        particular, _ = TipoVivienda.objects.get_or_create(TipVivDes='Particular')
+        # ' AB' y 'AB' son la misma calle una vez compactados los espacios
+        cls.vivienda, cls.repetida, _ = [
+            Vivienda.objects.create(VivCal=calle, VivNum='1', VivCodPos='1400', ZonCod=zona, TipVivCod=particular)
+            for calle in ('AB', ' AB', 'CD')
+        ]
+        TipoPersona.objects.get_or_create(TipPerDes='Propietario')
+        integrante, _ = TipoPersona.objects.get_or_create(TipPerDes='Integrante')
+        cls.familia = Familia.objects.create(FamNom="Familia Pérez")
+        cls.conservar, cls.duplicada, _, cls.huerfana = [
+            Persona.objects.create(PerNom=nombre, FamCod=cls.familia, TipPerCod=integrante)
+            for nombre in ("Ana Pérez", "ana  perez", "Luis Pérez", "Eva Pérez")
+        ]
+
+    def setUp(self):
+        Persona.objects.filter(pk=self.huerfana.pk).update(FamCod_id=999999)
+        self.addCleanup(Persona.objects.filter(pk=self.huerfana.pk).update, FamCod_id=self.familia.pk)
+
+    def test_duplicados_huerfanos_y_contadores(self):
+        plan = auditar(particiones=4, tamano_lote=2)
+        self.assertEqual(plan['duplicados'], {
+            'persona': [{'clave': [self.familia.pk, 'ana perez'], 'conservar': self.conservar.pk, 'desactivar': [self.duplicada.pk]}],
+            'vivienda': [{'clave': ['ab', '1'], 'conservar': self.vivienda.pk, 'desactivar': [self.repetida.pk]}],
+        })
+        self.assertEqual(plan['huerfanos'], {'persona': {'FamCod': [self.huerfana.pk]}})
+        self.assertEqual(plan['desactivar'], {'persona': sorted([self.duplicada.pk, self.huerfana.pk]), 'vivienda': [self.repetida.pk]})
+        # Los contadores no se mantienen al insertar: la auditoría los recalcula sin contar lo que desactiva
+        self.assertEqual(plan['contadores'], {'municipio': {self.municipio.pk: [0, 2]}, 'familia': {self.familia.pk: [0, 2]}})
+
+        self.assertEqual(aplicar_plan(plan), {'persona': 2, 'vivienda': 1, 'municipio': 1, 'familia': 1})
+        self.assertEqual(set(Persona.objects.filter(PerEstReg='I').values_list('pk', flat=True)), {self.duplicada.pk, self.huerfana.pk})
+        self.assertEqual(Municipio.objects.get(pk=self.municipio.pk).MunNumViv, 2)
+        self.assertEqual(Familia.objects.get(pk=self.familia.pk).FamNumInt, 2)
+        plan = auditar(particiones=4)
+        self.assertEqual((plan['duplicados'], plan['huerfanos'], plan['desactivar'], plan['contadores']), ({}, {}, {}, {}))
+
+    def test_comando_con_plan_en_archivo(self):
+        directorio = tempfile.TemporaryDirectory()
+        self.addCleanup(directorio.cleanup)
+        ruta = os.path.join(directorio.name, 'plan.json')
+        call_command('auditar_censo', '--plan', ruta, '--particiones', '2', stderr=StringIO())
+        with open(ruta, encoding='utf-8') as archivo:
+            self.assertEqual(json.load(archivo)['contadores']['municipio'], {str(self.municipio.pk): [0, 2]})
+        errores = StringIO()
+        call_command('auditar_censo', '--aplicar', ruta, stderr=errores)
+        self.assertIn("municipio: 1 registros actualizados", errores.getvalue())
+        self.assertEqual(Municipio.objects.get(pk=self.municipio.pk).MunNumViv, 2)
+
+    def test_conjunto_de_pks(self):
+        conjunto = ConjuntoPks()
+        for pk in (0, 7, 8, 100000):
+            conjunto.agregar(pk)
+        self.assertEqual([pk for pk in (0, 1, 7, 8, 9, 100000, 100001, -1) if pk in conjunto], [0, 7, 8, 100000])
+        self.assertEqual(len(conjunto.bits), 100000 // 8 + 1)
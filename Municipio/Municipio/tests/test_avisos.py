@@ -0,0 +1,90 @@
+import os
+import tempfile
+import zipfile
+from decimal import Decimal
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from ..avisos import SIN_ZONA, leer_manifiesto, lotes_por_zona, renderizar_lote, ruta_lote
+from ..models import (Casa, Familia, Municipio, PagoTributario, Persona, Propietario, Region, TipoPersona, TipoVivienda,
+                      Vivienda, ZonaUrbana)
+
+
+class AvisosTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.municipio = Municipio.objects.create(MunNom="Cusco", RegCod=Region.objects.create(RegNom="Cusco"))
+        cls.san_blas, cls.wanchaq = (ZonaUrbana.objects.create(ZonNom=nombre, MunCod=cls.municipio)
+                                     for nombre in ("San Blas", "Wanchaq"))
+        cls.pagos = [cls.crear_pago(calle, zona) for calle, zona in (('S1', cls.san_blas), ('S2', cls.san_blas),
+                                                                      ('S3', cls.san_blas), ('W1', cls.wanchaq))]
+
+    @classmethod
+    def crear_pago(cls, calle, zona):
+        particular, _ = TipoVivienda.objects.get_or_create(TipVivDes='Particular')
+        propietario, _ = TipoPersona.objects.get_or_create(TipPerDes='Propietario')
+        vivienda = Vivienda.objects.create(VivCal=calle, VivNum='7', VivCodPos='0800', ZonCod=zona, TipVivCod=particular)
+        familia = Familia.objects.create(FamNom=f"Familia {calle}")
+        persona = Persona.objects.create(PerNom=f"Titular {calle}", FamCod=familia, TipPerCod=propietario)
+        Propietario.objects.create(PerCod=persona, ProMonIngFam=Decimal('1500'))
+        casa = Casa.objects.create(CasEsc=None, CasCodBlo=None, CasPla=None, CasNumPue=None, CasMet=Decimal('80'),
+                                   VivCod=vivienda, FamCod=familia)
+        return PagoTributario.objects.create(CasCod=casa, PagTriEstReg='debe')
+
+    def setUp(self):
+        directorio = tempfile.TemporaryDirectory()
+        self.addCleanup(directorio.cleanup)
+        self.directorio = directorio.name
+
+    def test_lotes_por_zona_con_datos_unidos(self):
+        lotes = list(lotes_por_zona(2))
+        self.assertEqual([(zon_cod, [aviso['PagTriCod'] for aviso in avisos]) for zon_cod, avisos in lotes], [
+            (self.san_blas.pk, [self.pagos[0].pk, self.pagos[1].pk]),
+            (self.san_blas.pk, [self.pagos[2].pk]),
+            (self.wanchaq.pk, [self.pagos[3].pk]),
+        ])
+        aviso = lotes[2][1][0]
+        self.assertEqual((aviso['calle'], aviso['zona'], aviso['municipio'], aviso['propietario']),
+                         ('W1', "Wanchaq", "Cusco", "Titular W1"))
+
+    def test_zip_por_lote_y_reanudacion(self):
+        for zon_cod, avisos in lotes_por_zona(2):
+            renderizar_lote(self.directorio, zon_cod, avisos)
+        ruta = ruta_lote(self.directorio, self.san_blas.pk, self.pagos[0].pk, self.pagos[1].pk)
+        with zipfile.ZipFile(ruta) as archivo:
+            self.assertEqual(archivo.namelist(), [f"aviso_{pago.CasCod_id}.html" for pago in self.pagos[:2]])
+            html = archivo.read(f"aviso_{self.pagos[0].CasCod_id}.html").decode()
+        self.assertIn("Titular S1", html)
+        self.assertIn(f"S/ {self.pagos[0].PagTriPag}".replace('.', ','), html)  # Formato es-pe
+        # Con todos los lotes ya generados no se renderiza nada de nuevo
+        salida = StringIO()
+        call_command('generar_avisos', self.directorio, '--lote', '2', '--procesos', '1', stdout=salida)
+        self.assertIn("0 avisos generados (4 ya existían)", salida.getvalue())
+
+    def generar(self):
+        salida = StringIO()
+        call_command('generar_avisos', self.directorio, '--lote', '2', '--procesos', '1', stdout=salida)
+        return salida.getvalue()
+
+    def test_manifiesto_con_el_ultimo_pago_por_zona(self):
+        self.assertIn("4 avisos generados (0 ya existían)", self.generar())
+        self.assertEqual(leer_manifiesto(self.directorio), {
+            f"zona_{self.san_blas.pk}": self.pagos[2].pk,
+            f"zona_{self.wanchaq.pk}": self.pagos[3].pk,
+        })
+        # Al reanudar, cada zona se lee después de su último pago: solo el pago nuevo se genera
+        nuevo = self.crear_pago('S4', self.san_blas)
+        self.assertEqual([[aviso['PagTriCod'] for aviso in avisos] for _, avisos in lotes_por_zona(2, leer_manifiesto(self.directorio))],
+                         [[nuevo.pk]])
+        self.assertIn("1 avisos generados (0 ya existían)", self.generar())
+        self.assertEqual(leer_manifiesto(self.directorio)[f"zona_{self.san_blas.pk}"], nuevo.pk)
+
+    def test_pagos_de_casas_sin_zona(self):
+        Casa.objects.filter(pk=self.pagos[3].CasCod_id).update(CasZonCod=None)
+        self.assertEqual([(zon_cod, len(avisos)) for zon_cod, avisos in lotes_por_zona(5)], [(self.san_blas.pk, 3), (None, 1)])
+        salida = self.generar()
+        self.assertIn(f"1 avisos de casas sin zona (CasZonCod vacío) en {os.path.join(self.directorio, SIN_ZONA)}", salida)
+        self.assertTrue(os.path.exists(ruta_lote(self.directorio, None, self.pagos[3].pk, self.pagos[3].pk)))
+        self.assertEqual(leer_manifiesto(self.directorio)[SIN_ZONA], self.pagos[3].pk)
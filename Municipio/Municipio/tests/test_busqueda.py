@@ -0,0 +1,83 @@
+from io import StringIO
+from unittest import mock
+
+from django.contrib import admin
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import RequestFactory, TestCase
+from django.urls import reverse
+
+from ..admin import PersonaAdmin
+from ..busqueda import buscar
+from ..models import (Familia, IndiceBusqueda, Municipio, Persona, Region, TipoPersona, TipoVivienda, Vivienda,
+                      ZonaUrbana)
+from ..texto import normalizar
+
+
+class BusquedaTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = User.objects.create_user('staff', password='clave', is_staff=True)
+        region = Region.objects.create(RegNom="Áncash")
+        zona = ZonaUrbana.objects.create(ZonNom="Centro", MunCod=Municipio.objects.create(MunNom="Huaraz", RegCod=region))
+        particular, _ = TipoVivienda.objects.get_or_create(TipVivDes='Particular')
+        TipoPersona.objects.get_or_create(TipPerDes='Propietario')
+        integrante, _ = TipoPersona.objects.get_or_create(TipPerDes='Integrante')
+        familia = Familia.objects.create(FamNom="Familia Álamos")
+        cls.alamos = [Persona.objects.create(PerNom=f"Ana Álamos {i}", FamCod=familia, TipPerCod=integrante) for i in range(3)]
+        cls.alameda = Persona.objects.create(PerNom="Luis Alameda", FamCod=familia, TipPerCod=integrante)
+        cls.vivienda = Vivienda.objects.create(VivCal="Ñuñ", VivNum='12', VivCodPos='0200', ZonCod=zona,
+                                               TipVivCod=particular)
+
+    def buscar_admin(self, termino):
+        request = RequestFactory().get('/admin/Municipio/persona/', {'q': termino})
+        request.user = self.staff
+        queryset, _ = PersonaAdmin(Persona, admin.site).get_search_results(request, Persona.objects.all(), termino)
+        return queryset
+
+    def test_normalizar(self):
+        self.assertEqual(normalizar("  Jirón  ÑUÑOA, 12-B "), "jiron nunoa 12 b")
+
+    def test_busqueda_por_prefijo_sin_tildes(self):
+        for fts in (True, False):
+            with self.subTest(fts=fts), mock.patch('Municipio.busqueda._fts5_disponible', return_value=fts):
+                resultado = buscar('ÁLAMOS an', ['persona'])
+                self.assertEqual(resultado['total'], 3)
+                self.assertEqual({fila['pk'] for fila in resultado['resultados']}, {persona.pk for persona in self.alamos})
+                self.assertEqual(buscar('alam', ['persona'])['total'], 4)
+                self.assertEqual(buscar('alam', ['familia'])['total'], 1)
+                self.assertEqual(buscar('nun 12', ['vivienda'])['resultados'][0]['pk'], self.vivienda.pk)
+                pagina = buscar('alam', ['persona'], pagina=2, por_pagina=3)
+                self.assertEqual((pagina['total'], len(pagina['resultados'])), (4, 1))
+
+    def test_indice_al_guardar_y_borrar(self):
+        self.alameda.PerNom = "Luis Pérez"
+        self.alameda.save()
+        self.assertEqual(buscar('alameda', ['persona'])['total'], 0)
+        self.assertEqual(buscar('perez', ['persona'])['resultados'][0]['pk'], self.alameda.pk)
+        self.vivienda.delete()
+        self.assertFalse(IndiceBusqueda.objects.filter(IndBusTip='vivienda').exists())
+
+    def test_reindexar(self):
+        IndiceBusqueda.objects.all().delete()
+        salida = StringIO()
+        call_command('reindexar_busqueda', stdout=salida)
+        self.assertIn("6 registros indexados", salida.getvalue())
+        self.assertEqual(buscar('alam')['total'], 5)
+
+    def test_admin_sin_limite_de_resultados(self):
+        for fts in (True, False):
+            with self.subTest(fts=fts), mock.patch('Municipio.busqueda._fts5_disponible', return_value=fts):
+                queryset = self.buscar_admin('álamos')
+                # Una sola consulta con el índice como subconsulta, sin traer ni truncar las PK
+                with self.assertNumQueries(1):
+                    self.assertEqual(set(queryset), set(self.alamos))
+                self.assertEqual(self.buscar_admin('alam').count(), 4)
+
+    def test_vista_solo_para_el_personal(self):
+        url = reverse('Municipio:buscar')
+        self.assertEqual(self.client.get(url, {'q': 'alamos'}).status_code, 302)
+        self.client.force_login(self.staff)
+        respuesta = self.client.get(url, {'q': 'alamos', 'tipo': 'persona'})
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(respuesta.json()['total'], 3)
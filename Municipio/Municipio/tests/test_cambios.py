@@ -0,0 +1,136 @@
+import json
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.db import DatabaseError, connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from ..cambios import confirmar_cambios, leer_cambios, purgar_cambios
+from ..models import (CursorCambios, EventoCambio, Familia, Municipio, Persona, Region, TipoPersona, TipoVivienda, Vivienda,
+                      ZonaUrbana)
+
+
+class RegistroCambiosTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.region = Region.objects.create(RegNom="Junín")
+        cls.municipio = Municipio.objects.create(MunNom="Huancayo", RegCod=cls.region)
+        EventoCambio.objects.all().delete()
+
+    def evento(self, pk, hace, codigo=None):
+        evento = EventoCambio.objects.create(EveCod=codigo, EveMod='vivienda', EvePk=pk, EveOpe=EventoCambio.GUARDADO)
+        EventoCambio.objects.filter(pk=evento.pk).update(EveFec=timezone.now() - timedelta(seconds=hace))
+        return evento.pk
+
+    def leer(self, consumidor='pruebas', **opciones):
+        eventos, posicion = leer_cambios(consumidor, **opciones)
+        confirmar_cambios(consumidor, posicion)
+        return [(evento.EvePk, evento.EveCod) for evento in eventos]
+
+    def test_eventos_de_guardado_y_borrado(self):
+        zona = ZonaUrbana.objects.create(ZonNom="El Tambo", MunCod=self.municipio)
+        pk = zona.pk
+        zona.delete()
+        self.assertEqual(list(EventoCambio.objects.order_by('EveCod').values_list('EveMod', 'EvePk', 'EveOpe')),
+                         [('zonaurbana', pk, 'G'), ('zonaurbana', pk, 'E')])
+
+    def test_propagacion_en_bloque_registra_las_filas(self):
+        # update() no dispara señales: el cambio de región de las viviendas del municipio se registra igual
+        zona = ZonaUrbana.objects.create(ZonNom="El Tambo", MunCod=self.municipio)
+        particular, _ = TipoVivienda.objects.get_or_create(TipVivDes='Particular')
+        viviendas = [Vivienda.objects.create(VivCal=f'R{i}', VivNum='1', VivCodPos='1200', ZonCod=zona, TipVivCod=particular) for i in range(2)]
+        self.municipio.RegCod = Region.objects.create(RegNom="Pasco")
+        EventoCambio.objects.all().delete()
+        self.municipio.save()
+        self.assertEqual(set(EventoCambio.objects.values_list('EveMod', 'EvePk')),
+                         {('municipio', self.municipio.pk)} | {('vivienda', vivienda.pk) for vivienda in viviendas})
+
+    def test_fila_y_evento_en_la_misma_transaccion(self):
+        # Si no se puede registrar el evento, el cambio tampoco queda guardado
+        tipo, _ = TipoPersona.objects.get_or_create(TipPerDes='Propietario')
+        persona = Persona.objects.create(PerNom="Rosa", FamCod=Familia.objects.create(FamNom="Quispe"), TipPerCod=tipo)
+        with mock.patch.object(EventoCambio, 'registrar', side_effect=DatabaseError):
+            with self.assertRaises(DatabaseError):
+                Region.objects.create(RegNom="Huánuco")
+            with self.assertRaises(DatabaseError):
+                persona.delete()
+        self.assertFalse(Region.objects.filter(RegNom="Huánuco").exists())
+        self.assertTrue(Persona.objects.filter(pk=persona.pk).exists())
+
+    def test_propagacion_en_la_transaccion_del_guardado(self):
+        zona = ZonaUrbana.objects.create(ZonNom="Chilca", MunCod=self.municipio)
+        particular, _ = TipoVivienda.objects.get_or_create(TipVivDes='Particular')
+        Vivienda.objects.create(VivCal='R1', VivNum='1', VivCodPos='1200', ZonCod=zona, TipVivCod=particular)
+        registrar = EventoCambio.registrar
+
+        def fallar_con_viviendas(modelo, pks, *args):
+            if modelo is Vivienda:
+                raise DatabaseError
+            return registrar(modelo, pks, *args)
+
+        self.municipio.RegCod = Region.objects.create(RegNom="Huánuco")
+        with mock.patch.object(EventoCambio, 'registrar', side_effect=fallar_con_viviendas), self.assertRaises(DatabaseError):
+            self.municipio.save()
+        self.assertEqual(Municipio.objects.get(pk=self.municipio.pk).RegCod, self.region)
+
+    def test_registrar_consulta(self):
+        # INSERT ... SELECT, como en transicionar(): un evento por fila sin traer las PK
+        otro = Municipio.objects.create(MunNom="Jauja", RegCod=self.region)
+        EventoCambio.objects.all().delete()
+        self.assertEqual(EventoCambio.registrar_consulta(Municipio.objects.filter(RegCod=self.region)), 2)
+        self.assertEqual(set(EventoCambio.objects.values_list('EveMod', 'EvePk', 'EveOpe')),
+                         {('municipio', self.municipio.pk, 'G'), ('municipio', otro.pk, 'G')})
+        self.assertTrue(all(EventoCambio.objects.values_list('EveFec', flat=True)))
+
+    def test_ultimo_evento_por_registro_en_orden(self):
+        self.evento(1, 60)
+        segundo, tercero = self.evento(2, 60), self.evento(1, 60)
+        self.assertEqual(self.leer(), [(2, segundo), (1, tercero)])
+        self.assertEqual(self.leer(), [])
+        self.assertEqual(self.leer('otro'), [(2, segundo), (1, tercero)])
+
+    def test_no_avanza_sobre_transacciones_sin_confirmar(self):
+        anterior = self.evento(1, 60)
+        self.assertEqual(self.leer(), [(1, anterior)])
+        # Otra transacción tomó el EveCod siguiente pero todavía no confirmó; esta ya confirmó el suyo
+        pendiente = anterior + 1
+        visible = self.evento(3, 1, codigo=anterior + 2)
+        self.assertEqual(self.leer(), [])
+        # La primera confirma: con el retraso cumplido se leen los dos, sin saltear el de EveCod menor
+        self.evento(2, 1, codigo=pendiente)
+        EventoCambio.objects.update(EveFec=timezone.now() - timedelta(seconds=60))
+        self.assertEqual(self.leer(), [(2, pendiente), (3, visible)])
+
+    def test_sin_retraso(self):
+        reciente = self.evento(1, 0)
+        self.assertEqual(self.leer(retraso=timedelta(0)), [(1, reciente)])
+
+    def test_purgar_leidos_y_reemplazados(self):
+        leido, _ = self.evento(1, 60), self.evento(2, 60)
+        reemplazado, ultimo = self.evento(3, 60), self.evento(3, 60)
+        CursorCambios.objects.create(CurNom='pruebas', CurPos=leido)
+        self.assertEqual(purgar_cambios(), 2)
+        self.assertEqual(list(EventoCambio.objects.values_list('EvePk', flat=True).order_by('EveCod')), [2, 3])
+        self.assertFalse(EventoCambio.objects.filter(pk=reemplazado).exists())
+        self.assertTrue(EventoCambio.objects.filter(pk=ultimo).exists())
+
+    def test_purgar_en_un_solo_delete(self):
+        for pk in (1, 1, 2, 1, 2):
+            self.evento(pk, 60)
+        with CaptureQueriesContext(connection) as consultas:
+            self.assertEqual(purgar_cambios(), 3)  # Sin cursores solo se borran los reemplazados
+        self.assertEqual([consulta['sql'].split()[0] for consulta in consultas], ['SELECT', 'DELETE'])
+        self.assertEqual(list(EventoCambio.objects.values_list('EvePk', flat=True).order_by('EveCod')), [1, 2])
+
+    def test_comando_emite_el_estado_actual(self):
+        self.evento(self.municipio.pk, 60)
+        EventoCambio.objects.update(EveMod='municipio')
+        salida = StringIO()
+        call_command('consumir_cambios', 'pruebas', stdout=salida)
+        [linea] = salida.getvalue().splitlines()
+        self.assertEqual(json.loads(linea)['datos']['MunNom'], "Huancayo")
+        self.assertEqual(CursorCambios.objects.get(CurNom='pruebas').CurPos, EventoCambio.objects.get().pk)
@@ -0,0 +1,96 @@
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.forms import modelform_factory
+from django.test import TestCase
+from django.urls import reverse
+
+from ..concurrencia import modificar, reintentar
+from ..forms import VersionadoForm
+from ..models import (Casa, ConflictoVersion, Familia, Municipio, PagoTributario, Persona, Propietario, Region, TipoPersona,
+                      TipoVivienda, Vivienda, ZonaUrbana)
+
+
+class ConcurrenciaTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        region = Region.objects.create(RegNom="Junín")
+        cls.zona = ZonaUrbana.objects.create(ZonNom="El Tambo", MunCod=Municipio.objects.create(MunNom="Huancayo", RegCod=region))
+        cls.vivienda = Vivienda.objects.create(VivCal='T1', VivNum='3', VivCodPos='1200', ZonCod=cls.zona,
+                                               TipVivCod=TipoVivienda.objects.get_or_create(TipVivDes='Particular')[0])
+        familia = Familia.objects.create(FamNom="Familia Quispe")
+        propietario, _ = TipoPersona.objects.get_or_create(TipPerDes='Propietario')
+        Propietario.objects.create(PerCod=Persona.objects.create(PerNom="Rosa Quispe", FamCod=familia, TipPerCod=propietario),
+                                   ProMonIngFam=Decimal('1800'))
+        cls.casa = Casa.objects.create(CasEsc=None, CasCodBlo=None, CasPla=None, CasNumPue=None, CasMet=Decimal('80'),
+                                       VivCod=cls.vivienda, FamCod=familia)
+
+    def test_conflicto_con_version_vieja(self):
+        primera, segunda = Casa.objects.get(pk=self.casa.pk), Casa.objects.get(pk=self.casa.pk)
+        primera.CasMet = Decimal('90')
+        primera.save()
+        self.assertEqual(primera.CasVer, self.casa.CasVer + 1)
+        segunda.CasMet = Decimal('95')
+        with self.assertRaises(ConflictoVersion):
+            segunda.save()
+        self.assertEqual(Casa.objects.get(pk=self.casa.pk).CasMet, Decimal('90'))
+
+    def test_actualizaciones_en_bloque_cambian_la_version(self):
+        # La cascada de la jerarquía y transicionar también invalidan las ediciones abiertas
+        vivienda = Vivienda.objects.get(pk=self.vivienda.pk)
+        self.zona.MunCod = Municipio.objects.create(MunNom="Chupaca", RegCod=self.zona.MunCod.RegCod)
+        self.zona.save()
+        vivienda.VivOcu = 'S'
+        with self.assertRaises(ConflictoVersion):
+            vivienda.save()
+        pago = PagoTributario.objects.create(CasCod=Casa.objects.get(pk=self.casa.pk))
+        PagoTributario.objects.filter(pk=pago.pk).transicionar('debe', 'pagada')
+        self.assertEqual(PagoTributario.objects.get(pk=pago.pk).PagTriVer, pago.PagTriVer + 1)
+        with self.assertRaises(ConflictoVersion):
+            pago.save()
+
+    def test_formulario_con_version_vieja(self):
+        Formulario = modelform_factory(Casa, form=VersionadoForm, fields=['CasMet'])
+        leida = Formulario(instance=Casa.objects.get(pk=self.casa.pk)).fields['version'].initial
+        Casa.objects.get(pk=self.casa.pk).save()
+        formulario = Formulario({'CasMet': '90', 'version': leida}, instance=Casa.objects.get(pk=self.casa.pk))
+        self.assertFalse(formulario.is_valid())
+        self.assertIn("Otro usuario o proceso", formulario.non_field_errors()[0])
+        formulario = Formulario({'CasMet': '90', 'version': leida + 1}, instance=Casa.objects.get(pk=self.casa.pk))
+        self.assertTrue(formulario.is_valid())
+        self.assertEqual(formulario.save().CasVer, leida + 2)
+
+    def test_admin_avisa_del_conflicto(self):
+        self.client.force_login(User.objects.create_superuser('admin', password='clave'))
+        url = reverse('admin:Municipio_casa_change', args=[self.casa.pk])
+        datos = {'CasEsc': '', 'CasCodBlo': '', 'CasPla': '', 'CasNumPue': '', 'CasMet': '85', 'VivCod': self.vivienda.pk,
+                 'FamCod': self.casa.FamCod_id, 'version': self.casa.CasVer}
+        Casa.objects.get(pk=self.casa.pk).save()
+        respuesta = self.client.post(url, datos)
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertContains(respuesta, "Otro usuario o proceso")
+        self.assertEqual(Casa.objects.get(pk=self.casa.pk).CasMet, Decimal('80'))
+
+    def test_modificar_reintenta_con_la_version_vigente(self):
+        intentos = []
+
+        def cambio(casa):
+            intentos.append(casa.CasVer)
+            if len(intentos) == 1:
+                casa.CasVer -= 1  # Leída antes de que otro escritor la guardara
+            casa.CasMet = Decimal('70')
+
+        with mock.patch('Municipio.concurrencia.time.sleep') as espera:
+            casa = modificar(Casa, self.casa.pk, cambio)
+        self.assertEqual(intentos, [self.casa.CasVer, self.casa.CasVer])
+        self.assertEqual(espera.call_count, 1)
+        self.assertEqual((casa.CasMet, casa.CasVer), (Decimal('70'), self.casa.CasVer + 1))
+
+    def test_reintentar_se_rinde(self):
+        def siempre_en_conflicto():
+            raise ConflictoVersion("conflicto")
+
+        with mock.patch('Municipio.concurrencia.time.sleep') as espera, self.assertRaises(ConflictoVersion):
+            reintentar(siempre_en_conflicto, intentos=3)
+        self.assertEqual(espera.call_count, 2)
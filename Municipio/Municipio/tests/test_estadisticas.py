@@ -0,0 +1,115 @@
+from decimal import Decimal
+from io import StringIO
+
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.db.models.signals import post_delete
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from .. import estadisticas, signals
+from ..models import (Casa, EstadisticaCasa, EstadisticaVivienda, Familia, Municipio, Region, TipoVivienda, Vivienda,
+                      ZonaUrbana, _actualizar_registrando)
+
+
+class EstadisticasTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.region = Region.objects.create(RegNom="Tumbes")
+        cls.municipio = Municipio.objects.create(MunNom="Zorritos", RegCod=cls.region)
+        cls.zona, cls.otra_zona = (ZonaUrbana.objects.create(ZonNom=nombre, MunCod=cls.municipio) for nombre in ("Bocapán", "Acapulco"))
+        cls.particular, _ = TipoVivienda.objects.get_or_create(TipVivDes='Particular')
+
+    def vivienda(self, calle, zona=None, ocupada='N'):
+        return Vivienda.objects.create(VivCal=calle, VivNum='5', VivCodPos='2400', VivOcu=ocupada, ZonCod=zona or self.zona,
+                                       TipVivCod=self.particular)
+
+    def casa(self, vivienda, metros):
+        # Una casa por familia
+        return Casa.objects.create(CasEsc=None, CasCodBlo=None, CasPla=None, CasNumPue=None, CasMet=Decimal(metros),
+                                   VivCod=vivienda, FamCod=Familia.objects.create(FamNom=f"Familia {vivienda.VivCal}"))
+
+    def test_una_lectura_de_la_fila_anterior(self):
+        # Estadísticas e índice de zonas comparten la lectura de la fila antes de guardar
+        vivienda = self.vivienda('L1')
+        vivienda.VivOcu = 'S'
+        with CaptureQueriesContext(connection) as consultas:
+            vivienda.save()
+        lecturas = [consulta['sql'] for consulta in consultas if consulta['sql'].startswith('SELECT "Vivienda"')]
+        self.assertEqual(len(lecturas), 1)
+        self.assertEqual(estadisticas.ocupacion('zona', self.zona.pk)['ocupadas'], 1)
+        self.assertEqual(estadisticas.verificar(), {})
+
+    def test_coinciden_con_recalculo_tras_guardar_mover_y_borrar(self):
+        vivienda = self.vivienda('A1', ocupada='S')
+        casa = self.casa(vivienda, '120')
+        self.casa(self.vivienda('A2'), '40')
+        self.assertEqual(estadisticas.ocupacion('zona', self.zona.pk)['ocupadas'], 1)
+
+        vivienda.ZonCod = self.otra_zona
+        vivienda.save()
+        casa.refresh_from_db()
+        self.assertEqual(casa.CasZonCod, self.otra_zona.pk)
+        self.assertEqual(estadisticas.verificar(), {})
+        self.assertEqual(estadisticas.ocupacion('zona', self.otra_zona.pk)['viviendas'], 1)
+        self.assertEqual(estadisticas.superficie('zona', self.otra_zona.pk)['media'], Decimal('120.00'))
+
+        casa.delete()
+        vivienda.delete()
+        self.assertEqual(estadisticas.verificar(), {})
+        self.assertEqual(estadisticas.ocupacion('municipio', self.municipio.pk)['viviendas'], 1)
+
+    def test_actualizaciones_en_bloque(self):
+        for calle in ('U1', 'U2', 'U3'):
+            self.vivienda(calle, ocupada='S')
+        # update() no dispara señales: _actualizar_registrando aplica la diferencia de las filas
+        _actualizar_registrando(Vivienda.objects.filter(VivCal__in=['U1', 'U2']), VivEstReg='I')
+        self.assertEqual(estadisticas.verificar(), {})
+        self.assertEqual(estadisticas.ocupacion('zona', self.zona.pk)['viviendas'], 1)
+        self.assertEqual(estadisticas.ocupacion('zona', self.zona.pk, estado='I')['ocupadas'], 2)
+
+    def test_histograma_tasa_y_reconstruccion(self):
+        for calle, ocupada, metros in (('H1', 'S', '20'), ('H2', 'N', '30'), ('H3', 'S', '400')):
+            self.casa(self.vivienda(calle, ocupada=ocupada), metros)
+        inactiva = Vivienda.objects.get(VivCal='H2')
+        inactiva.VivEstReg = 'I'
+        inactiva.save()
+        self.assertEqual(estadisticas.ocupacion('zona', self.zona.pk),
+                         {'viviendas': 2, 'ocupadas': 2, 'tasa': Decimal('100.00'), 'tipos': {'Particular': 2}})
+        self.assertEqual(estadisticas.ocupacion('zona', self.zona.pk, estado=None)['tasa'], Decimal('66.67'))
+        superficie = estadisticas.superficie('municipio', self.municipio.pk)
+        self.assertEqual((superficie['casas'], superficie['media']), (3, Decimal('150.00')))
+        self.assertEqual([cubeta['casas'] for cubeta in superficie['histograma']], [1, 1, 0, 0, 0, 0, 0, 1])
+        guardadas = estadisticas.guardadas()
+        EstadisticaCasa.objects.all().delete()
+        estadisticas.reconstruir()
+        self.assertEqual(estadisticas.guardadas(), guardadas)
+
+    def test_comando_verificar(self):
+        self.casa(self.vivienda('V1'), '60')
+        EstadisticaVivienda.objects.update(EstVivCan=5)
+        with self.assertRaisesMessage(CommandError, "1 estadísticas no coinciden."):
+            call_command('verificar_estadisticas', stdout=StringIO(), stderr=StringIO())
+        salida = StringIO()
+        call_command('verificar_estadisticas', '--corregir', stdout=salida, stderr=StringIO())
+        self.assertIn("guardado (5, 0), calculado (1, 0)", salida.getvalue())
+        self.assertEqual(estadisticas.verificar(), {})
+
+    def test_restar_no_crea_filas(self):
+        estadisticas.aplicar(Vivienda, [(self.zona.pk, 'A', self.particular.pk, 'S')], [])
+        estadisticas.aplicar(Casa, [(self.zona.pk, 'A', Decimal('80'))], [])
+        self.assertFalse(EstadisticaVivienda.objects.exists())
+        self.assertFalse(EstadisticaCasa.objects.exists())
+
+    def test_borrar_zona_con_viviendas(self):
+        # El borrado en cascada elimina antes las estadísticas de la zona que sus viviendas
+        zona = ZonaUrbana.objects.create(ZonNom="Cancas", MunCod=self.municipio)
+        self.casa(self.vivienda('B1', zona=zona), '80')
+        # Sin el índice de zonas, que tiene su propia prueba de borrado en cascada
+        post_delete.disconnect(signals.descontar_vivienda_zonas, sender=Vivienda)
+        try:
+            zona.delete()
+        finally:
+            post_delete.connect(signals.descontar_vivienda_zonas, sender=Vivienda)
+        self.assertFalse(EstadisticaVivienda.objects.filter(ZonCod=zona.pk).exists())
+        self.assertEqual(estadisticas.verificar(), {})
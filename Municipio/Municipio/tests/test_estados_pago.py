@@ -0,0 +1,88 @@
+from decimal import Decimal
+
+from django.core.exceptions import ValidationError
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from ..models import (Casa, ContadorEstadoPago, Familia, Municipio, PagoTributario, Persona, Propietario, Region, TipoPersona,
+                      TipoVivienda, Vivienda, ZonaUrbana)
+
+
+class ContadorEstadoPagoTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        region = Region.objects.create(RegNom="Lima")
+        cls.lima, cls.callao = (Municipio.objects.create(MunNom=nombre, RegCod=region) for nombre in ("Lima", "Callao"))
+        cls.cercado = ZonaUrbana.objects.create(ZonNom="Cercado", MunCod=cls.lima)
+        cls.bellavista = ZonaUrbana.objects.create(ZonNom="Bellavista", MunCod=cls.callao)
+        cls.particular, _ = TipoVivienda.objects.get_or_create(TipVivDes='Particular')
+        cls.propietario, _ = TipoPersona.objects.get_or_create(TipPerDes='Propietario')
+
+    def pagar(self, calle, zona=None, estado='debe'):
+        # Vivienda, casa, familia con su propietario y el pago de esa casa
+        vivienda = Vivienda.objects.create(VivCal=calle, VivNum='1', VivCodPos='1500', ZonCod=zona or self.cercado, TipVivCod=self.particular)
+        familia = Familia.objects.create(FamNom=calle)
+        persona = Persona.objects.create(PerNom=calle, FamCod=familia, TipPerCod=self.propietario)
+        Propietario.objects.create(PerCod=persona, ProMonIngFam=Decimal('1200'))
+        casa = Casa.objects.create(CasEsc=None, CasCodBlo=None, CasPla=None, CasNumPue=None, CasMet=Decimal('80'),
+                                   VivCod=vivienda, FamCod=familia)
+        return PagoTributario.objects.create(CasCod=casa, PagTriEstReg=estado)
+
+    def contadores(self):
+        return set(ContadorEstadoPago.objects.exclude(ConEstCan=0).values_list('MunCod', 'ConEstEst', 'ConEstCan'))
+
+    def test_guardar_y_borrar(self):
+        pago = self.pagar('A1')
+        self.pagar('A2')
+        pago.PagTriEstReg = 'pagada'
+        pago.save()
+        self.assertEqual(self.contadores(), {(self.lima.pk, 'debe', 1), (self.lima.pk, 'pagada', 1)})
+        pago.delete()
+        self.assertEqual(self.contadores(), {(self.lima.pk, 'debe', 1)})
+
+    def test_borrar_municipio_con_pagos(self):
+        # El contador del municipio se borra antes que sus pagos: descontarlos no debe volver a crearlo
+        self.pagar('B1', self.bellavista)
+        self.callao.delete()
+        self.assertFalse(ContadorEstadoPago.objects.filter(MunCod=self.callao.pk).exists())
+        self.assertFalse(PagoTributario.objects.exists())
+        connection.check_constraints()
+
+    def test_cambio_de_municipio(self):
+        movida = self.pagar('C1', estado='pagada').CasCod
+        self.pagar('C2', ZonaUrbana.objects.create(ZonNom="Rímac", MunCod=self.lima))
+        vivienda = self.pagar('C3').CasCod.VivCod
+        destino = Vivienda.objects.create(VivCal='C4', VivNum='1', VivCodPos='1500', ZonCod=self.bellavista, TipVivCod=self.particular)
+        self.assertEqual(self.contadores(), {(self.lima.pk, 'debe', 2), (self.lima.pk, 'pagada', 1)})
+
+        # Una zona, una vivienda y una casa pasan al Callao con sus pagos
+        rimac = ZonaUrbana.objects.get(ZonNom="Rímac")
+        rimac.MunCod = self.callao
+        rimac.save()
+        vivienda.ZonCod = self.bellavista
+        vivienda.save()
+        movida.VivCod = destino
+        movida.save()
+        self.assertEqual(self.contadores(), {(self.callao.pk, 'debe', 2), (self.callao.pk, 'pagada', 1)})
+        ContadorEstadoPago.recalcular()
+        self.assertEqual(self.contadores(), {(self.callao.pk, 'debe', 2), (self.callao.pk, 'pagada', 1)})
+
+    def test_transicionar_con_un_update_por_municipio(self):
+        pagos = [self.pagar(f'D{i}') for i in range(3)] + [self.pagar('D3', self.bellavista)]
+        PagoTributario.objects.filter(pk=pagos[0].pk).transicionar('debe', 'en proceso')
+        with CaptureQueriesContext(connection) as consultas:
+            movidos = PagoTributario.objects.all().transicionar('debe', 'pagada')
+        self.assertEqual(movidos, 3)
+        updates = [consulta['sql'] for consulta in consultas if consulta['sql'].startswith('UPDATE "Pago_Tributario"')]
+        self.assertEqual(len(updates), 2)
+        self.assertEqual(self.contadores(), {(self.lima.pk, 'en proceso', 1), (self.lima.pk, 'pagada', 2), (self.callao.pk, 'pagada', 1)})
+
+    def test_transicion_no_permitida(self):
+        pago = self.pagar('E1', estado='pagada')
+        with self.assertRaises(ValidationError):
+            PagoTributario.objects.transicionar('pagada', 'en proceso')
+        pago.PagTriEstReg = 'en proceso'
+        with self.assertRaises(ValidationError):
+            pago.save()
+        self.assertEqual(self.contadores(), {(self.lima.pk, 'pagada', 1)})
@@ -0,0 +1,75 @@
+from decimal import Decimal
+from unittest import mock
+
+from django.test import TestCase
+
+from ..fragmentos import Fragmento, _ejecutar_fragmento, planificar, recalcular_pagos, resumir_pagos
+from ..models import (Casa, Familia, Municipio, PagoTributario, Persona, Propietario, Region, TipoPersona, TipoVivienda,
+                      Vivienda, ZonaUrbana)
+
+
+def _fallar(fragmento):
+    raise RuntimeError(f"fragmento {fragmento.municipio}")
+
+
+class FragmentosTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        region = Region.objects.create(RegNom="Ica")
+        cls.ica, cls.pisco = (Municipio.objects.create(MunNom=nombre, RegCod=region) for nombre in ("Ica", "Pisco"))
+        cls.centro, cls.oeste = (ZonaUrbana.objects.create(ZonNom=nombre, MunCod=cls.ica) for nombre in ("Ica Centro", "Ica Oeste"))
+        cls.puerto = ZonaUrbana.objects.create(ZonNom="San Andrés", MunCod=cls.pisco)
+        cls.particular, _ = TipoVivienda.objects.get_or_create(TipVivDes='Particular')
+        cls.propietario, _ = TipoPersona.objects.get_or_create(TipPerDes='Propietario')
+
+    def vivienda(self, calle, zona):
+        return Vivienda.objects.create(VivCal=calle, VivNum='2', VivCodPos='1100', ZonCod=zona, TipVivCod=self.particular)
+
+    def pagar(self, calle, zona):
+        familia = Familia.objects.create(FamNom=f"Familia {calle}")
+        Propietario.objects.create(PerCod=Persona.objects.create(PerNom=f"Titular {calle}", FamCod=familia, TipPerCod=self.propietario),
+                                   ProMonIngFam=Decimal('1500'))
+        casa = Casa.objects.create(CasEsc=None, CasCodBlo=None, CasPla=None, CasNumPue=None, CasMet=Decimal('80'),
+                                   VivCod=self.vivienda(calle, zona), FamCod=familia)
+        return PagoTributario.objects.create(CasCod=casa)
+
+    def test_planificar_divide_municipios_grandes(self):
+        for i in range(3):
+            self.vivienda(f"F{i}", self.centro)
+        self.vivienda('G1', self.oeste)
+        self.vivienda('P1', self.puerto)
+        self.assertEqual(planificar(1, limite=10), [Fragmento(self.ica.pk, None, 4), Fragmento(self.pisco.pk, None, 1)])
+        self.assertEqual(planificar(1, [self.ica.pk], limite=2),
+                         [Fragmento(self.ica.pk, (self.centro.pk,), 3), Fragmento(self.ica.pk, (self.oeste.pk,), 1)])
+        # Sin límite: la mitad de lo que le toca a cada proceso
+        self.assertEqual(len(planificar(2)), 3)
+
+    def test_recalcular_pagos_separa_los_errores(self):
+        modificado, sin_propietario, invalido, igual = [self.pagar(f"H{i}", self.centro) for i in range(4)]
+        self.pagar('P1', self.puerto)
+        Propietario.objects.filter(PerCod__FamCod=modificado.CasCod.FamCod).update(ProMonIngFam=Decimal('3000'))
+        Propietario.objects.filter(PerCod__FamCod=sin_propietario.CasCod.FamCod).delete()
+        PagoTributario.objects.filter(pk=invalido.pk).update(PagTriEstReg='anulado')
+        resultado = recalcular_pagos(Fragmento(self.ica.pk, None, 4), tamano_lote=2)
+        self.assertEqual(resultado, {'pagos': 4, 'modificados': 1, 'sin_propietario': 1, 'invalidos': 1, 'conflictos': 0})
+        self.assertEqual(PagoTributario.objects.get(pk=modificado.pk).PagTriCat, 'C')
+        self.assertEqual(PagoTributario.objects.get(pk=igual.pk).PagTriPag, igual.PagTriPag)
+
+    def test_resumir_por_grupo_de_zonas(self):
+        pagos = [self.pagar(f"R{i}", self.centro) for i in range(2)]
+        self.pagar('R9', self.oeste)
+        PagoTributario.objects.filter(pk=pagos[0].pk).transicionar('debe', 'en proceso')
+        self.assertEqual(resumir_pagos(Fragmento(self.ica.pk, (self.centro.pk,), 2)), {
+            'casas': 2, 'pagos_debe': 1, 'monto_debe': pagos[1].PagTriPag,
+            'pagos_en_proceso': 1, 'monto_en_proceso': pagos[0].PagTriPag,
+        })
+
+    def test_error_de_un_fragmento_vuelve_como_traza(self):
+        fragmento = Fragmento(self.ica.pk, None, 0)
+        # En el trabajador cierra sus conexiones; aquí cerraría la de la transacción de la prueba
+        with mock.patch('Municipio.fragmentos.connections') as conexiones:
+            devuelto, resultado, error, segundos = _ejecutar_fragmento(_fallar, fragmento, {})
+        conexiones.close_all.assert_called_once_with()
+        self.assertEqual((devuelto, resultado), (fragmento, None))
+        self.assertIn(f"RuntimeError: fragmento {self.ica.pk}", error)
+        self.assertGreaterEqual(segundos, 0)
@@ -0,0 +1,45 @@
+from datetime import date
+from decimal import Decimal
+from io import StringIO
+
+from django.core.exceptions import ValidationError
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from ..models import (Casa, Familia, HistorialTributario, Municipio, PagoTributario, Persona, Propietario, Region, TipoPersona,
+                      TipoVivienda, Vivienda, ZonaUrbana)
+from ..particiones import archivar_anio, tabla_archivo
+
+
+class HistorialTributarioTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        municipio = Municipio.objects.create(MunNom="Cusco", RegCod=Region.objects.create(RegNom="Cusco"))
+        vivienda = Vivienda.objects.create(VivCal='H1', VivNum='1', VivCodPos='8000', TipVivCod=TipoVivienda.objects.get_or_create(TipVivDes='Particular')[0],
+                                           ZonCod=ZonaUrbana.objects.create(ZonNom="San Blas", MunCod=municipio))
+        familia = Familia.objects.create(FamNom="Quispe")
+        titular = Persona.objects.create(PerNom="Rosa Quispe", FamCod=familia, TipPerCod=TipoPersona.objects.get_or_create(TipPerDes='Propietario')[0])
+        cls.propietario = Propietario.objects.create(PerCod=titular, ProMonIngFam=Decimal('3000'))
+        cls.casa = Casa.objects.create(CasEsc=None, CasCodBlo=None, CasPla=None, CasNumPue=None, CasMet=Decimal('90'), VivCod=vivienda, FamCod=familia)
+
+    def test_una_tasacion_por_anio(self):
+        pago = PagoTributario.objects.create(CasCod=self.casa)
+        self.propietario.ProMonIngFam = Decimal('900')
+        self.propietario.save()
+        pago.save()
+        historial = HistorialTributario.objects.anio_actual().get(CasCod=self.casa)
+        self.assertEqual((historial.HisTriCat, historial.HisTriPag), ('A', Decimal('90.00')))
+        self.assertEqual(HistorialTributario.objects.count(), 1)
+
+    def test_archivar_anio_cerrado_una_sola_vez(self):
+        anio = timezone.localdate().year - 1
+        PagoTributario.objects.create(CasCod=self.casa, PagTriFec=date(anio, 6, 30))
+        self.assertEqual(archivar_anio(anio), 1)
+        self.assertFalse(HistorialTributario.objects.del_anio(anio).exists())
+        with self.assertRaisesMessage(ValidationError, "ya está archivado"):
+            archivar_anio(anio)
+        with self.assertRaisesMessage(CommandError, tabla_archivo(anio)):
+            call_command('archivar_historial', str(anio), stdout=StringIO())
+        with self.assertRaises(ValidationError):
+            archivar_anio(timezone.localdate().year)
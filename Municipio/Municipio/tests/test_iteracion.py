@@ -0,0 +1,49 @@
+from django.db import connection
+from django.db.models import Value
+from django.db.models.functions import Concat
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from ..iteracion import por_lotes, recorrer
+from ..models import Region
+
+
+class IteracionTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.pks = [Region.objects.create(RegNom=f"Lote {i}").pk for i in range(5)]
+
+    def setUp(self):
+        self.regiones = Region.objects.filter(pk__in=self.pks)
+
+    def test_lotes_por_clave_sin_offset(self):
+        with CaptureQueriesContext(connection) as consultas:
+            lotes = list(por_lotes(self.regiones.values_list('pk', flat=True), 2))
+        self.assertEqual(lotes, [self.pks[0:2], self.pks[2:4], self.pks[4:]])
+        # El último lote viene incompleto: no hace falta una consulta más para saber que terminó
+        self.assertEqual(len(consultas), 3)
+        self.assertFalse(any('OFFSET' in consulta['sql'] for consulta in consultas))
+        self.assertIn('ORDER BY', consultas[1]['sql'])
+
+    def test_cada_tipo_de_queryset(self):
+        esperado = [self.pks[0:3], self.pks[3:]]
+        self.assertEqual([[fila[0] for fila in lote] for lote in por_lotes(self.regiones.values_list('RegCod', 'RegNom'), 3)], esperado)
+        self.assertEqual([[fila['pk'] for fila in lote] for lote in por_lotes(self.regiones.values('pk', 'RegNom'), 3)], esperado)
+        self.assertEqual([[region.pk for region in lote] for lote in por_lotes(self.regiones.order_by('-RegNom'), 3)], esperado)
+
+    def test_reanudar_desde_una_clave(self):
+        self.assertEqual(list(recorrer(self.regiones.values_list('pk', flat=True), 2, desde=self.pks[2])), self.pks[3:])
+        self.assertEqual(list(recorrer(self.regiones.values_list('pk', flat=True), desde=self.pks[-1])), [])
+
+    def test_querysets_no_admitidos(self):
+        for queryset in (Region.objects.values_list('RegNom', 'pk'), Region.objects.values('RegNom'), Region.objects.all()[:2]):
+            with self.subTest(queryset=queryset.query), self.assertRaises(ValueError):
+                next(por_lotes(queryset))
+
+    def test_transaccion_por_lote(self):
+        for i, lote in enumerate(por_lotes(self.regiones.values_list('pk', flat=True), 2, transaccion=True)):
+            Region.objects.filter(pk__in=lote).update(RegNom=Concat('RegNom', Value(' procesada')))
+            if i == 1:
+                break  # Interrumpido: el segundo lote se revierte, el primero ya se confirmó
+        procesadas = Region.objects.filter(pk__in=self.pks, RegNom__endswith=' procesada').order_by('pk').values_list('pk', flat=True)
+        self.assertEqual(list(procesadas), self.pks[:2])
@@ -0,0 +1,42 @@
+from decimal import Decimal
+
+from django.test import TestCase
+
+from ..models import Casa, Familia, Municipio, Region, TipoVivienda, Vivienda, ZonaUrbana
+
+
+class JerarquiaTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.norte, cls.sur = Region.objects.create(RegNom="Norte"), Region.objects.create(RegNom="Sur")
+        cls.municipio = Municipio.objects.create(MunNom="Piura", RegCod=cls.norte)
+        cls.zona = ZonaUrbana.objects.create(ZonNom="Castilla", MunCod=cls.municipio)
+        cls.particular, _ = TipoVivienda.objects.get_or_create(TipVivDes='Particular')
+
+    def crear_casa(self, calle, zona):
+        vivienda = Vivienda.objects.create(VivCal=calle, VivNum='1', VivCodPos='2000', ZonCod=zona, TipVivCod=self.particular)
+        return Casa.objects.create(CasEsc=None, CasCodBlo=None, CasPla=None, CasNumPue=None, CasMet=Decimal('80'),
+                                   VivCod=vivienda, FamCod=Familia.objects.create(FamNom=calle))
+
+    def test_se_calcula_al_crear(self):
+        casa = self.crear_casa('J1', self.zona)
+        self.assertEqual((casa.VivCod.VivMunCod, casa.VivCod.VivRegCod), (self.municipio.pk, self.norte.pk))
+        self.assertEqual((casa.CasZonCod, casa.CasMunCod, casa.CasRegCod), (self.zona.pk, self.municipio.pk, self.norte.pk))
+
+    def test_se_propaga_al_cambiar_de_padre(self):
+        casa = self.crear_casa('J2', self.zona)
+        otro = Municipio.objects.create(MunNom="Sullana", RegCod=self.norte)
+        self.zona.MunCod = otro
+        self.zona.save()
+        otro.RegCod = self.sur
+        otro.save()
+        casa.refresh_from_db()
+        self.assertEqual((casa.CasMunCod, casa.CasRegCod), (otro.pk, self.sur.pk))
+        self.assertEqual(list(Vivienda.objects.in_municipio(otro)), [casa.VivCod])
+
+        vivienda = casa.VivCod
+        vivienda.ZonCod = ZonaUrbana.objects.create(ZonNom="Catacaos", MunCod=self.municipio)
+        vivienda.save()
+        self.assertEqual(list(Casa.objects.in_zona(vivienda.ZonCod)), [casa])
+        self.assertEqual(list(Casa.objects.in_region(self.norte)), [casa])
+        self.assertFalse(Vivienda.objects.in_region(self.sur).exists())
@@ -0,0 +1,84 @@
+import time
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db.models import F
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from ..models import (Casa, Familia, Municipio, PagoTributario, Persona, Propietario, Region, TipoPersona, TipoVivienda,
+                      VersionModelo, Vivienda, ZonaUrbana)
+from ..presupuesto import ejecucion_presupuestaria
+from ..versiones import VIGENCIA
+
+
+class PresupuestoTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        region = Region.objects.create(RegNom="Loreto")
+        cls.iquitos = Municipio.objects.create(MunNom="Iquitos", RegCod=region, MunPreAnu=Decimal('1000'))
+        cls.nauta = Municipio.objects.create(MunNom="Nauta", RegCod=region, MunPreAnu=Decimal('500'))
+        cls.belen, cls.punchana = (ZonaUrbana.objects.create(ZonNom=nombre, MunCod=cls.iquitos) for nombre in ("Belén", "Punchana"))
+        particular, _ = TipoVivienda.objects.get_or_create(TipVivDes='Particular')
+        propietario, _ = TipoPersona.objects.get_or_create(TipPerDes='Propietario')
+        cls.pagos = []
+        for calle, zona in (('P1', cls.belen), ('P2', cls.belen), ('P3', cls.punchana)):
+            vivienda = Vivienda.objects.create(VivCal=calle, VivNum='4', VivCodPos='1600', ZonCod=zona, TipVivCod=particular)
+            familia = Familia.objects.create(FamNom=f"Familia {calle}")
+            Propietario.objects.create(PerCod=Persona.objects.create(PerNom=f"Titular {calle}", FamCod=familia, TipPerCod=propietario),
+                                       ProMonIngFam=Decimal('1500'))
+            casa = Casa.objects.create(CasEsc=None, CasCodBlo=None, CasPla=None, CasNumPue=None, CasMet=Decimal('80'),
+                                       VivCod=vivienda, FamCod=familia)
+            cls.pagos.append(PagoTributario.objects.create(CasCod=casa))
+
+    def setUp(self):
+        cache.clear()
+
+    def fila(self, municipio, **kwargs):
+        return next(fila for fila in ejecucion_presupuestaria(**kwargs) if fila['municipio'] == municipio.pk)
+
+    def test_importes_por_estado_y_ejecucion(self):
+        PagoTributario.objects.filter(pk=self.pagos[0].pk).transicionar('debe', 'pagada')
+        PagoTributario.objects.filter(pk=self.pagos[1].pk).transicionar('debe', 'en proceso')
+        fila = self.fila(self.iquitos)
+        pagado = self.pagos[0].PagTriPag
+        self.assertEqual((fila['pagos'], fila['emitido'], fila['recaudado'], fila['pendiente'], fila['adeudado']),
+                         (3, sum(pago.PagTriPag for pago in self.pagos), pagado, self.pagos[1].PagTriPag, self.pagos[2].PagTriPag))
+        self.assertEqual(fila['ejecucion'], (pagado * 100 / Decimal('1000')).quantize(Decimal('0.01')))
+        # Un municipio sin pagos aparece con su presupuesto sin ejecutar
+        self.assertEqual((self.fila(self.nauta)['pagos'], self.fila(self.nauta)['ejecucion']), (0, Decimal('0.00')))
+
+    def test_por_zona_y_por_anio(self):
+        zonas = {fila['zona']: fila['pagos'] for fila in ejecucion_presupuestaria('zona') if fila['municipio'] == self.iquitos.pk}
+        self.assertEqual(zonas, {self.belen.pk: 2, self.punchana.pk: 1})
+        self.assertEqual(self.fila(self.iquitos, anio=timezone.now().year)['pagos'], 3)
+        self.assertEqual(self.fila(self.iquitos, anio=2000)['pagos'], 0)
+        with self.assertRaises(ValueError):
+            ejecucion_presupuestaria('region')
+
+    def test_cache_invalidada_por_versiones(self):
+        self.fila(self.iquitos)
+        # Con el resultado y las versiones en la caché no se consulta la base
+        with self.assertNumQueries(0):
+            self.fila(self.iquitos)
+        with self.captureOnCommitCallbacks(execute=True):
+            PagoTributario.objects.filter(pk=self.pagos[0].pk).transicionar('debe', 'pagada')
+        self.assertEqual(self.fila(self.iquitos)['recaudado'], self.pagos[0].PagTriPag)
+        # Otro proceso cambia un pago y su versión: se ve cuando vence la versión guardada en la caché
+        PagoTributario.objects.filter(pk=self.pagos[1].pk).update(PagTriEstReg='pagada')
+        VersionModelo.objects.filter(VerMod=PagoTributario._meta.label_lower).update(VerNum=F('VerNum') + 1)
+        with mock.patch('django.core.cache.backends.locmem.time.time', return_value=time.time() + VIGENCIA + 1):
+            self.assertEqual(self.fila(self.iquitos)['recaudado'], self.pagos[0].PagTriPag + self.pagos[1].PagTriPag)
+
+    def test_vista_solo_para_el_personal(self):
+        url = reverse('Municipio:presupuesto')
+        self.assertEqual(self.client.get(url).status_code, 302)
+        self.client.force_login(User.objects.create_user('staff', password='clave', is_staff=True))
+        respuesta = self.client.get(url, {'nivel': 'categoria'})
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(sum(fila['pagos'] for fila in respuesta.json()['resultados']), 3)
+        self.assertEqual(self.client.get(url, {'nivel': 'region'}).status_code, 400)
+        self.assertEqual(self.client.get(url, {'anio': 'dos mil'}).status_code, 400)
@@ -0,0 +1,27 @@
+import os
+import tempfile
+
+from django.conf import settings
+from django.test import SimpleTestCase, override_settings
+
+from ..pruebas import _firma, _modulos_del_proyecto, ruta_instantanea
+
+
+class InstantaneaPruebasTests(SimpleTestCase):
+    def test_modulos_del_proyecto_importados_por_migraciones(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.py', delete=False) as archivo:
+            archivo.write("import os\nfrom django.db import migrations\nfrom Municipio.texto import normalizar\n"
+                          "from Municipio import mapas\nfrom .vecino import algo\n")
+        self.addCleanup(os.remove, archivo.name)
+        aplicacion = os.path.join(settings.BASE_DIR, 'Municipio')
+        self.assertEqual(_modulos_del_proyecto(archivo.name),
+                         [os.path.join(aplicacion, nombre) for nombre in ('__init__.py', 'mapas.py', 'texto.py')])
+
+    def test_firma_cambia_con_los_fixtures(self):
+        with override_settings(FIXTURES_PRUEBAS=['catalogos']):
+            firma = _firma()
+            self.assertEqual(_firma(), firma)
+        with override_settings(FIXTURES_PRUEBAS=['catalogos', 'otros']):
+            self.assertNotEqual(_firma(), firma)
+        with override_settings(FIXTURES_PRUEBAS=['catalogos'], INSTANTANEAS_PRUEBAS='/tmp/instantaneas'):
+            self.assertEqual(ruta_instantanea(), f"/tmp/instantaneas/instantanea_{firma}.sqlite3")
@@ -0,0 +1,47 @@
+from decimal import Decimal
+
+from django.test import TestCase
+
+from ..models import (Casa, Familia, Municipio, PagoTributario, Persona, Propietario, Region, TipoPersona, TipoVivienda, Vivienda,
+                      ZonaUrbana)
+from ..simulacion import InstantaneaCatastro
+
+
+class InstantaneaCatastroTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        region = Region.objects.create(RegNom="Arequipa")
+        cls.municipios = [Municipio.objects.create(MunNom=nombre, RegCod=region) for nombre in ("Arequipa", "Yanahuara")]
+        particular, _ = TipoVivienda.objects.get_or_create(TipVivDes='Particular')
+        propietario, _ = TipoPersona.objects.get_or_create(TipPerDes='Propietario')
+        # Una casa por categoría en Arequipa y una de categoría C en Yanahuara
+        for i, (municipio, ingreso) in enumerate(zip(cls.municipios * 2, ['800', '3000', '1500', '2500'])):
+            zona = ZonaUrbana.objects.get_or_create(ZonNom=f"Zona {municipio.MunNom}", MunCod=municipio)[0]
+            vivienda = Vivienda.objects.create(VivCal=f'S{i}', VivNum='1', VivCodPos='4000', ZonCod=zona, TipVivCod=particular)
+            familia = Familia.objects.create(FamNom=f"Familia {i}")
+            titular = Persona.objects.create(PerNom=f"Titular {i}", FamCod=familia, TipPerCod=propietario)
+            Propietario.objects.create(PerCod=titular, ProMonIngFam=Decimal(ingreso))
+            casa = Casa.objects.create(CasEsc=None, CasCodBlo=None, CasPla=None, CasNumPue=None, CasMet=Decimal('80'),
+                                       VivCod=vivienda, FamCod=familia)
+            PagoTributario.objects.create(CasCod=casa)
+
+    def test_tasas_vigentes_reproducen_los_pagos(self):
+        instantanea = InstantaneaCatastro.cargar(tamano_lote=3)
+        self.assertEqual(len(instantanea), 4)
+        pagos = {pago.CasCod_id: int(pago.PagTriPag * 100) for pago in PagoTributario.objects.all()}
+        self.assertEqual(dict(zip(map(int, instantanea.cas_cod), map(int, instantanea.simular()))), pagos)
+
+    def test_comparar_por_municipio(self):
+        filas = InstantaneaCatastro.cargar().comparar([Decimal('1000')], [Decimal('0.10'), Decimal('0.30')])
+        self.assertEqual([fila['codigo'] for fila in filas], [municipio.pk for municipio in self.municipios])
+        # Arequipa: 80 + 225 pasan a 80 + 450; Yanahuara: 600 + 500 pasan a 900 + 750
+        self.assertEqual([(fila['vigente'], fila['simulada']) for fila in filas],
+                         [(Decimal('305.00'), Decimal('530.00')), (Decimal('1100.00'), Decimal('1650.00'))])
+        self.assertEqual(filas[1]['diferencia'], Decimal('550.00'))
+
+    def test_casa_sin_propietario(self):
+        Propietario.objects.filter(ProMonIngFam=Decimal('800')).delete()
+        instantanea = InstantaneaCatastro.cargar()
+        self.assertEqual(sorted(map(int, instantanea.simular())), [0, 22500, 50000, 60000])
+        with self.assertRaises(ValueError):
+            instantanea.simular([Decimal('2000'), Decimal('1000')], [Decimal('0.1')] * 3)
@@ -0,0 +1,94 @@
+import time
+from unittest import mock
+
+from django.core.cache import cache
+from django.db.models import F
+from django.test import TestCase
+from django.urls import reverse
+
+from ..models import Municipio, Region, VersionModelo, ZonaUrbana
+from ..versiones import VIGENCIA, consultar, incrementar_version, version, versiones
+
+
+class VersionesTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_incremento_tras_el_commit(self):
+        anterior = version(Region)
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            Region.objects.create(RegNom="Tacna")
+            self.assertEqual(version(Region), anterior)
+        self.assertTrue(callbacks)
+        self.assertGreater(version(Region), anterior)
+
+    def test_otro_proceso_invalida_la_cache(self):
+        calculos = []
+        consulta = lambda: calculos.append(1) or len(calculos)
+        self.assertEqual(consultar(Region, 'prueba', consulta), 1)
+        self.assertEqual(consultar(Region, 'prueba', consulta), 1)
+        # Un proceso por lotes, con su propia caché, solo puede avisar a través de la base: el cambio se ve
+        # cuando vence la versión guardada en la caché de este proceso
+        VersionModelo.objects.filter(VerMod=Region._meta.label_lower).update(VerNum=F('VerNum') + 1)
+        self.assertEqual(consultar(Region, 'prueba', consulta), 1)
+        with mock.patch('django.core.cache.backends.locmem.time.time', return_value=time.time() + VIGENCIA + 1):
+            self.assertEqual(consultar(Region, 'prueba', consulta), 2)
+
+    def test_versiones_en_una_consulta(self):
+        versiones(Region, Municipio)
+        cache.clear()
+        with self.assertNumQueries(1):
+            numeros = versiones(Region, Municipio)
+        self.assertEqual(set(numeros), {Region, Municipio})
+        with self.assertNumQueries(0):
+            self.assertEqual(versiones(Region, Municipio), numeros)
+        VersionModelo.objects.all().delete()
+        with self.captureOnCommitCallbacks(execute=True):
+            incrementar_version(ZonaUrbana)
+        self.assertTrue(VersionModelo.objects.filter(VerMod=ZonaUrbana._meta.label_lower).exists())
+
+
+class CatalogosTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.region = Region.objects.create(RegNom="Moquegua")
+
+    def setUp(self):
+        cache.clear()
+
+    def test_lista_y_detalle(self):
+        respuesta = self.client.get(reverse('Municipio:lista_catalogo', args=['regiones']))
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertIn({'RegCod': self.region.pk, 'RegNom': "Moquegua", 'RegEstReg': 'A'}, respuesta.json()['resultados'])
+        detalle = self.client.get(reverse('Municipio:detalle_catalogo', args=['regiones', self.region.pk]))
+        self.assertEqual(detalle.json()['RegNom'], "Moquegua")
+        self.assertEqual(self.client.get(reverse('Municipio:detalle_catalogo', args=['regiones', 0])).status_code, 404)
+        self.assertEqual(self.client.get(reverse('Municipio:lista_catalogo', args=['casas'])).status_code, 404)
+
+    def test_cache_caliente_sin_consultas(self):
+        lista = reverse('Municipio:lista_catalogo', args=['regiones'])
+        detalle = reverse('Municipio:detalle_catalogo', args=['regiones', self.region.pk])
+        etag = self.client.get(lista)['ETag']
+        self.client.get(detalle)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(lista).status_code, 200)
+            self.assertEqual(self.client.get(detalle).json()['RegNom'], "Moquegua")
+            self.assertEqual(self.client.get(lista, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+    def test_municipios_sin_presupuesto(self):
+        municipio = Municipio.objects.create(MunNom="Mariscal Nieto", RegCod=self.region, MunPreAnu=750000)
+        detalle = self.client.get(reverse('Municipio:detalle_catalogo', args=['municipios', municipio.pk])).json()
+        self.assertEqual((detalle['MunNom'], detalle['RegCod_id']), ("Mariscal Nieto", self.region.pk))
+        resultados = self.client.get(reverse('Municipio:lista_catalogo', args=['municipios'])).json()['resultados']
+        self.assertFalse(any('MunPreAnu' in registro for registro in [detalle, *resultados]))
+
+    def test_get_condicional_hasta_que_cambia_el_catalogo(self):
+        url = reverse('Municipio:lista_catalogo', args=['regiones'])
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.region.RegNom = "Ilo"
+            self.region.save()
+        respuesta = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(respuesta.json()['resultados'][-1]['RegNom'], "Ilo")
@@ -0,0 +1,92 @@
+import os
+import tempfile
+from decimal import Decimal
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from ..models import (Casa, Familia, Municipio, PagoTributario, Persona, Propietario, Region, TipoPersona, TipoVivienda, Vivienda,
+                      ZonaUrbana)
+from ..simulacion import InstantaneaCatastro
+from ..volcado import ESTADOS, VolcadoCatastro, volcar
+
+
+class VolcadoCatastroTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.municipio = Municipio.objects.create(MunNom="Trujillo", RegCod=Region.objects.create(RegNom="La Libertad"))
+        cls.zona = ZonaUrbana.objects.create(ZonNom="Huanchaco", MunCod=cls.municipio)
+        cls.particular, _ = TipoVivienda.objects.get_or_create(TipVivDes='Particular')
+        cls.propietario, _ = TipoPersona.objects.get_or_create(TipPerDes='Propietario')
+
+    def setUp(self):
+        directorio = tempfile.TemporaryDirectory()
+        self.addCleanup(directorio.cleanup)
+        self.ruta = os.path.join(directorio.name, 'catastro.bin')
+
+    def pagar(self, calle, ingreso='2000', ocupada='N'):
+        vivienda = Vivienda.objects.create(VivCal=calle, VivNum='1', VivCodPos='1300', VivOcu=ocupada, ZonCod=self.zona, TipVivCod=self.particular)
+        familia = Familia.objects.create(FamNom=calle)
+        titular = Persona.objects.create(PerNom=calle, FamCod=familia, TipPerCod=self.propietario)
+        Propietario.objects.create(PerCod=titular, ProMonIngFam=Decimal(ingreso))
+        casa = Casa.objects.create(CasEsc=None, CasCodBlo=None, CasPla=None, CasNumPue=None, CasMet=Decimal('75.5'),
+                                   VivCod=vivienda, FamCod=familia)
+        return PagoTributario.objects.create(CasCod=casa)
+
+    def leer(self, tabla, columna):
+        with VolcadoCatastro(self.ruta) as volcado:
+            return list(volcado.columna(tabla, columna))
+
+    def test_ida_y_vuelta(self):
+        pago = self.pagar('V1', ocupada='S')
+        casa = pago.CasCod
+        self.assertEqual(volcar(self.ruta), {'vivienda': (1, casa.VivCod_id), 'casa': (1, casa.pk), 'pago': (1, pago.pk)})
+        with VolcadoCatastro(self.ruta) as volcado:
+            fila = {nombre: columna[0] for nombre, columna in volcado.columnas('casa').items()}
+            instantanea = InstantaneaCatastro.desde_volcado(volcado)
+            self.assertEqual(list(instantanea.simular()), list(InstantaneaCatastro.cargar().simular()))
+            del instantanea
+        self.assertEqual(fila, {'cas_cod': casa.pk, 'viv_cod': casa.VivCod_id, 'fam_cod': casa.FamCod_id,
+                                'zon_cod': self.zona.pk, 'mun_cod': self.municipio.pk, 'cas_met': 7550, 'ingreso': 200000})
+        self.assertEqual(self.leer('vivienda', 'ocupada'), [1])
+        self.assertEqual(self.leer('pago', 'pago'), [30000])
+
+    def test_incremental_solo_lee_filas_nuevas(self):
+        primero = self.pagar('V1')
+        volcar(self.ruta)
+        segundo = self.pagar('V2', ingreso='900')
+        with CaptureQueriesContext(connection) as consultas:
+            self.assertEqual(volcar(self.ruta)['pago'], (2, segundo.pk))
+        lecturas = [consulta['sql'] for consulta in consultas if consulta['sql'].startswith('SELECT "Pago_Tributario"."PagTriCod"')]
+        # La relectura empieza después de la marca anterior
+        self.assertIn(f'> {primero.pk}', lecturas[0])
+        self.assertEqual(self.leer('pago', 'pag_tri_cod'), [primero.pk, segundo.pk])
+        self.assertEqual(self.leer('pago', 'estado'), [ESTADOS['debe']] * 2)
+
+    def test_borrados_e_ingresos_vigentes(self):
+        primero, segundo = self.pagar('V1'), self.pagar('V2')
+        volcar(self.ruta)
+        # Un borrado entre las filas ya volcadas obliga a releer la tabla
+        segundo.delete()
+        tercero = self.pagar('V3')
+        volcar(self.ruta)
+        self.assertEqual(self.leer('pago', 'pag_tri_cod'), [primero.pk, tercero.pk])
+        # El ingreso se relee en cada volcado; una familia sin propietario queda en -1
+        Propietario.objects.filter(PerCod__FamCod=primero.CasCod.FamCod).update(ProMonIngFam=Decimal('3000'))
+        Propietario.objects.filter(PerCod__FamCod=segundo.CasCod.FamCod).delete()
+        volcar(self.ruta)
+        self.assertEqual(self.leer('casa', 'ingreso'), [300000, -1, 200000])
+
+    def test_incremental_con_filas_modificadas(self):
+        pago, otro = self.pagar('V1'), self.pagar('V2')
+        volcar(self.ruta)
+        # Cambiar una fila ya volcada incrementa su versión: la tabla se vuelve a leer entera
+        PagoTributario.objects.filter(pk=pago.pk).transicionar('debe', 'pagada')
+        nuevo = self.pagar('V3')
+        with CaptureQueriesContext(connection) as consultas:
+            self.assertEqual(volcar(self.ruta)['pago'], (3, nuevo.pk))
+        lecturas = [consulta['sql'] for consulta in consultas if consulta['sql'].startswith('SELECT "Pago_Tributario"."PagTriCod"')]
+        self.assertIn('> 0', lecturas[0])
+        self.assertEqual(self.leer('pago', 'estado'), [ESTADOS['pagada'], ESTADOS['debe'], ESTADOS['debe']])
+        self.assertEqual(self.leer('pago', 'pag_tri_cod'), [pago.pk, otro.pk, nuevo.pk])
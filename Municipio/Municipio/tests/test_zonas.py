@@ -0,0 +1,104 @@
+from importlib import import_module
+
+from django.apps import apps
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from .. import zonas
+from ..mapas import MapaBits
+from ..models import Municipio, OcupacionZona, Region, TipoVivienda, Vivienda, ZonaCodigoPostal, ZonaUrbana
+
+
+class ZonasTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.region = Region.objects.create(RegNom="Piura")
+        cls.municipio = Municipio.objects.create(MunNom="Sullana", RegCod=cls.region)
+        cls.bellavista, cls.marcavelica = (ZonaUrbana.objects.create(ZonNom=nombre, MunCod=cls.municipio)
+                                           for nombre in ("Bellavista", "Marcavelica"))
+        cls.particular, _ = TipoVivienda.objects.get_or_create(TipVivDes='Particular')
+
+    def vivienda(self, calle, zona=None, ocupada='N', codigo_postal='2000', **campos):
+        return Vivienda.objects.create(VivCal=calle, VivNum='1', VivCodPos=codigo_postal, VivOcu=ocupada,
+                                       ZonCod=zona or self.bellavista, TipVivCod=self.particular, **campos)
+
+    def indice(self):
+        adyacencia = set(ZonaCodigoPostal.objects.filter(ZonCodPosCan__gt=0).values_list('ZonCod', 'ZonCodPos', 'ZonCodPosCan'))
+        return adyacencia, zonas.ocupacion_por_zona()
+
+    def test_mapa_de_bits(self):
+        pares = MapaBits()
+        for codigo in (40, 42, 44):
+            pares.agregar(codigo)
+        altos = MapaBits.desde_bytes(43, MapaBits(43, 0b11).a_bytes())
+        self.assertEqual(list(pares | altos), [40, 42, 43, 44])
+        self.assertEqual(list(pares & altos), [44])
+        pares.quitar(42)
+        self.assertEqual((len(pares), 42 in pares, 44 in pares), (2, False, True))
+
+    def test_rango_de_codigos_postales_ocupados(self):
+        dentro = self.vivienda('R1', ocupada='S', codigo_postal='0012')
+        self.vivienda('R2', codigo_postal='0012')
+        self.vivienda('R3', ocupada='S', codigo_postal='0150')
+        self.assertEqual(dentro.VivCodPosNum, 12)
+        self.assertEqual(list(Vivienda.objects.en_codigos_postales('0010', 99).ocupadas()), [dentro])
+
+    def test_indice_coincide_con_reconstruccion(self):
+        vivienda = self.vivienda('A1', ocupada='S', codigo_postal='0012')
+        self.vivienda('A2', codigo_postal='0015')
+        vivienda.ZonCod = self.marcavelica
+        vivienda.save()
+        self.vivienda('A3', zona=self.marcavelica).delete()
+        incremental = self.indice()
+        zonas.reconstruir()
+        self.assertEqual(incremental, self.indice())
+        self.assertEqual(zonas.zonas_en_codigos_postales(10, 12), {self.marcavelica.pk})
+        self.assertEqual(list(zonas.viviendas_ocupadas([self.marcavelica.pk])), [vivienda.pk])
+
+    def test_mapas_por_pagina(self):
+        cercana = self.vivienda('C1')
+        lejana = self.vivienda('C2', VivCod=2 * OcupacionZona.BITS_PAGINA + 5)
+        paginas = dict(OcupacionZona.objects.filter(ZonCod=self.bellavista).values_list('OcuZonPag', 'OcuZonViv'))
+        self.assertEqual(set(paginas), {0, 2})
+        self.assertLessEqual(max(len(bytes(mapa)) for mapa in paginas.values()), OcupacionZona.BITS_PAGINA // 8)
+        # Guardar una vivienda solo bloquea y reescribe su página
+        lejana.VivOcu = 'S'
+        with CaptureQueriesContext(connection) as consultas:
+            lejana.save()
+        escrituras = [consulta['sql'] for consulta in consultas if consulta['sql'].startswith('UPDATE "Ocupacion_Zona"')]
+        self.assertEqual(len(escrituras), 1)
+        self.assertEqual(zonas.ocupacion_por_zona([self.bellavista.pk]), {self.bellavista.pk: (2, 1)})
+        self.assertEqual(list(zonas.viviendas_ocupadas([self.bellavista.pk])), [lejana.pk])
+        # Una página sin viviendas no se conserva
+        lejana.delete()
+        self.assertEqual(list(OcupacionZona.objects.filter(ZonCod=self.bellavista).values_list('OcuZonPag', flat=True)), [0])
+        self.assertIn(cercana.pk, MapaBits.desde_bytes(0, paginas[0]))
+
+    def test_migracion_actualiza_por_codigo_postal(self):
+        for i, codigo_postal in enumerate(('0012', '0012', '0012', '0150', 'S/N')):
+            self.vivienda(f"M{i}", ocupada='S' if i % 2 else 'N', codigo_postal=codigo_postal)
+        self.vivienda('M9', zona=self.marcavelica, VivCod=OcupacionZona.BITS_PAGINA + 1)
+        incremental = self.indice()
+        Vivienda.objects.update(VivCodPosNum=None)
+        ZonaCodigoPostal.objects.all().delete()
+        OcupacionZona.objects.all().delete()
+        migracion = import_module('Municipio.migrations.0025_indice_codigo_postal')
+        with CaptureQueriesContext(connection) as consultas:
+            migracion.indexar_viviendas(apps, None)
+        actualizaciones = [consulta['sql'] for consulta in consultas if consulta['sql'].startswith('UPDATE "Vivienda"')]
+        self.assertEqual(len(actualizaciones), 3)  # '0012', '0150' y '2000'; 'S/N' no tiene número
+        self.assertEqual(Vivienda.objects.filter(VivCodPos='0012').values_list('VivCodPosNum', flat=True).distinct().get(), 12)
+        self.assertEqual(incremental, self.indice())
+
+    def test_borrar_zona_y_municipio_con_viviendas(self):
+        municipio = Municipio.objects.create(MunNom="Paita", RegCod=self.region)
+        zona, otra_zona = (ZonaUrbana.objects.create(ZonNom=nombre, MunCod=municipio) for nombre in ("Colán", "Yacila"))
+        self.vivienda('B1', zona=zona, ocupada='S')
+        self.vivienda('B2', zona=otra_zona)
+        zona.delete()
+        self.assertFalse(OcupacionZona.objects.filter(ZonCod=zona.pk).exists())
+        self.assertFalse(ZonaCodigoPostal.objects.filter(ZonCod=zona.pk).exists())
+        municipio.delete()
+        self.assertFalse(Vivienda.objects.filter(VivMunCod=municipio.pk).exists())
+        connection.check_constraints()
@@ -0,0 +1,29 @@
+import re
+import unicodedata
+
+_NO_ALFANUMERICO = re.compile(r'[^0-9a-z]+')
+
+
+def normalizar(texto):
+    """Texto en minúsculas, sin tildes ni signos, con un espacio entre palabras."""
+    texto = unicodedata.normalize('NFKD', texto or '')
+    texto = ''.join(c for c in texto if not unicodedata.combining(c)).casefold()
+    return _NO_ALFANUMERICO.sub(' ', texto).strip()
+
+
+# Tipo del índice de búsqueda -> (modelo, campos cuyo texto se indexa)
+CAMPOS_BUSQUEDA = {
+    'persona': ('Persona', ['PerNom']),
+    'familia': ('Familia', ['FamNom']),
+    'vivienda': ('Vivienda', ['VivCal', 'VivNum', 'VivCodPos']),
+}
+
+
+def texto_busqueda(valores):
+    return normalizar(' '.join(str(valor) for valor in valores if valor))
+
+
+def codigo_postal_numerico(codigo):
+    """VivCodPos como entero ('0012' -> 12), o None si no tiene dígitos."""
+    digitos = ''.join(c for c in codigo or '' if c.isdigit())
+    return int(digitos) if digitos else None
@@ -0,0 +1,11 @@
+from django.urls import path
+from . import views
+
+app_name = 'Municipio'
+
+urlpatterns = [
+    path('catalogos/<slug:catalogo>/', views.lista_catalogo, name='lista_catalogo'),
+    path('catalogos/<slug:catalogo>/<int:pk>/', views.detalle_catalogo, name='detalle_catalogo'),
+    path('buscar/', views.buscar, name='buscar'),
+    path('presupuesto/', views.presupuesto, name='presupuesto'),
+]
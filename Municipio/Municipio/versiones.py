@@ -0,0 +1,87 @@
+import time
+from datetime import datetime, timezone as dt_timezone
+
+from django.apps import apps
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
+
+# Cada modelo tiene un número de versión en la tabla Version_Modelo: el instante (en microsegundos) de su
+# último cambio. Está en la base y no en la caché para que los procesos por lotes, que tienen su propia
+# caché, invaliden también la de los procesos web. Las claves de la caché incluyen la versión, así que
+# un cambio invalida todo lo anterior sin borrarlo y el desalojo LRU se encarga de las entradas viejas.
+# La versión leída se guarda en la caché durante VIGENCIA segundos: con la caché caliente una petición no
+# consulta la base. Un cambio de este proceso la borra al confirmarse; el de un proceso con otra caché
+# se ve, como mucho, VIGENCIA segundos después.
+VIGENCIA = 5
+
+
+def _versiones():
+    # models importa este módulo: el modelo se resuelve al usarlo
+    return apps.get_model('Municipio', 'VersionModelo').objects
+
+
+def _nombre(modelo):
+    return modelo._meta.label_lower
+
+
+def _ahora():
+    return time.time_ns() // 1000
+
+
+def _clave_version(nombre):
+    return f"version:{nombre}"
+
+
+def versiones(*modelos):
+    """{modelo: versión} de todos los modelos: de la caché, o de la base con una sola consulta."""
+    nombres = {_nombre(modelo): modelo for modelo in modelos}
+    claves = {_clave_version(nombre): nombre for nombre in nombres}
+    numeros = {claves[clave]: numero for clave, numero in cache.get_many(claves).items()}
+    pendientes = nombres.keys() - numeros.keys()
+    if pendientes:
+        leidos = dict(_versiones().filter(VerMod__in=pendientes).values_list('VerMod', 'VerNum'))
+        faltantes = pendientes - leidos.keys()
+        if faltantes:
+            # Modelo sin cambios registrados todavía: un instante posterior a cualquier dato ya guardado en la caché
+            _versiones().bulk_create([_versiones().model(VerMod=nombre, VerNum=_ahora()) for nombre in faltantes],
+                                     ignore_conflicts=True)
+            leidos.update(_versiones().filter(VerMod__in=faltantes).values_list('VerMod', 'VerNum'))
+        cache.set_many({_clave_version(nombre): numero for nombre, numero in leidos.items()}, timeout=VIGENCIA)
+        numeros.update(leidos)
+    return {modelo: numeros[nombre] for nombre, modelo in nombres.items()}
+
+
+def version(modelo):
+    return versiones(modelo)[modelo]
+
+
+def ultima_modificacion(modelo):
+    return datetime.fromtimestamp(version(modelo) / 1000000, tz=dt_timezone.utc)
+
+
+def incrementar_version(modelo):
+    # Tras el commit, para que nadie guarde datos sin confirmar bajo la versión nueva, y fuera de la
+    # transacción, para no bloquear la fila de la versión mientras dura
+    def incrementar():
+        filas = _versiones().filter(VerMod=_nombre(modelo))
+        actualizada = filas.update(VerNum=Greatest(F('VerNum') + 1, _ahora()))
+        cache.delete(_clave_version(_nombre(modelo)))
+        if not actualizada:
+            version(modelo)
+    transaction.on_commit(incrementar)
+
+
+def clave_versionada(modelo, *partes):
+    return ":".join([modelo._meta.label_lower, str(version(modelo)), *map(str, partes)])
+
+
+def consultar(modelo, nombre, consulta):
+    """Resultado de `consulta()` guardado en la caché bajo la versión vigente de `modelo`."""
+    clave = clave_versionada(modelo, 'consulta', nombre)
+    resultado = cache.get(clave)
+    if resultado is None:
+        resultado = consulta()
+        cache.set(clave, resultado, timeout=None)
+    return resultado
@@ -1,3 +1,109 @@
-from django.shortcuts import render
+import json
 
-# Create your views here.
+from django.contrib.admin.views.decorators import staff_member_required
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import Http404, HttpResponse, JsonResponse
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import condition, require_GET
+
+from .busqueda import buscar as buscar_indice
+from .models import IndiceBusqueda, Municipio, Region, TipoPersona, TipoVivienda, ZonaUrbana
+from .presupuesto import NIVELES, ejecucion_presupuestaria
+from .versiones import clave_versionada, consultar, ultima_modificacion, version
+
+# Datos de referencia que cambian pocas veces al año, con los campos que se publican: las vistas son
+# públicas, así que el presupuesto de Municipio (MunPreAnu) no se incluye
+CATALOGOS = {
+    'regiones': (Region, ['RegCod', 'RegNom', 'RegEstReg']),
+    'municipios': (Municipio, ['MunCod', 'MunNom', 'MunNumViv', 'RegCod_id', 'MunEstReg']),
+    'zonas': (ZonaUrbana, ['ZonCod', 'ZonNom', 'MunCod_id', 'ZonEstReg']),
+    'tipos-vivienda': (TipoVivienda, ['TipVivCod', 'TipVivDes', 'TipVivEstReg']),
+    'tipos-persona': (TipoPersona, ['TipPerCod', 'TipPerDes', 'TipPerEstReg']),
+}
+
+
+def _catalogo(catalogo):
+    try:
+        return CATALOGOS[catalogo]
+    except KeyError:
+        raise Http404("Catálogo no encontrado.")
+
+
+def _modelo(catalogo):
+    return _catalogo(catalogo)[0]
+
+
+def _registros(catalogo):
+    # Registros del catálogo indexados por su clave primaria, guardados en la caché
+    modelo, campos = _catalogo(catalogo)
+    return consultar(modelo, 'registros', lambda: {
+        fila[modelo._meta.pk.attname]: fila for fila in modelo.objects.order_by('pk').values(*campos)
+    })
+
+
+def _etag(request, catalogo, pk=None):
+    return f'"{catalogo}-{version(_modelo(catalogo))}"'
+
+
+def _ultima_modificacion(request, catalogo, pk=None):
+    return ultima_modificacion(_modelo(catalogo))
+
+
+def _respuesta_json(modelo, clave, datos):
+    # Cuerpo ya serializado en la caché: una petición repetida no consulta la base
+    contenido = cache.get(clave)
+    if contenido is None:
+        contenido = json.dumps(datos(), cls=DjangoJSONEncoder)
+        cache.set(clave, contenido, timeout=None)
+    respuesta = HttpResponse(contenido, content_type='application/json')
+    patch_cache_control(respuesta, max_age=0, must_revalidate=True)
+    return respuesta
+
+
+@require_GET
+@condition(etag_func=_etag, last_modified_func=_ultima_modificacion)
+def lista_catalogo(request, catalogo):
+    modelo = _modelo(catalogo)
+    return _respuesta_json(modelo, clave_versionada(modelo, 'lista'), lambda: {
+        'resultados': list(_registros(catalogo).values()),
+    })
+
+
+@require_GET
+@condition(etag_func=_etag, last_modified_func=_ultima_modificacion)
+def detalle_catalogo(request, catalogo, pk):
+    modelo = _modelo(catalogo)
+
+    def registro():
+        # Solo si la respuesta no está en la caché: un registro inexistente no se guarda
+        try:
+            return _registros(catalogo)[pk]
+        except KeyError:
+            raise Http404("Registro no encontrado.")
+
+    return _respuesta_json(modelo, clave_versionada(modelo, 'detalle', pk), registro)
+
+
+@require_GET
+@staff_member_required
+def buscar(request):
+    tipos = [tipo for tipo in request.GET.getlist('tipo') if tipo in dict(IndiceBusqueda.TIPOS)]
+    try:
+        pagina = max(int(request.GET.get('pagina', 1)), 1)
+    except ValueError:
+        pagina = 1
+    return JsonResponse(buscar_indice(request.GET.get('q', ''), tipos, pagina))
+
+
+@require_GET
+@staff_member_required
+def presupuesto(request):
+    nivel = request.GET.get('nivel', 'municipio')
+    if nivel not in NIVELES:
+        return JsonResponse({'error': f"Nivel no válido; use uno de {', '.join(NIVELES)}."}, status=400)
+    try:
+        anio = int(request.GET['anio']) if request.GET.get('anio') else None
+    except ValueError:
+        return JsonResponse({'error': "El año debe ser un número."}, status=400)
+    return JsonResponse({'nivel': nivel, 'anio': anio, 'resultados': ejecucion_presupuestaria(nivel, anio)})
@@ -0,0 +1,202 @@
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+from decimal import Decimal
+
+from django.db.models import Count, Sum
+
+from .iteracion import por_lotes
+from .models import Casa, PagoTributario, Propietario, Vivienda
+
+# Formato del archivo:
+#   cabecera  <8sII: firma, versión, longitud del directorio
+#   directorio JSON: por tabla, filas, marca (mayor PK volcada) y columnas {nombre: [tipo, desplazamiento]}
+#   columnas contiguas, alineadas a 8 bytes, en el orden de bytes de la máquina que las escribió
+FIRMA = b'MUNCAT\0\0'
+VERSION = 1
+CABECERA = struct.Struct('<8sII')
+
+CATEGORIAS = {cat: i for i, cat in enumerate(PagoTributario.CATEGORIAS)}
+ESTADOS = {estado: i for i, (estado, _) in enumerate(PagoTributario.ESTADOS)}
+
+
+def _entero(valor):
+    return -1 if valor is None else valor
+
+
+def _centimos(valor):
+    return int((Decimal(valor) * 100).to_integral_value())
+
+
+# Tabla -> (consulta, campo PK, columnas (nombre, tipo, conversión)).
+# La columna 'ingreso' de casa no sale de la consulta: en cada volcado se completa con el ingreso
+# vigente del propietario de fam_cod, porque Propietario no tiene versión que indique sus cambios.
+TABLAS = {
+    'vivienda': (
+        lambda: Vivienda.objects.values_list('VivCod', 'ZonCod', 'VivMunCod', 'TipVivCod', 'VivOcu'),
+        'VivCod',
+        [('viv_cod', 'q', _entero), ('zon_cod', 'q', _entero), ('mun_cod', 'q', _entero),
+         ('tip_viv_cod', 'q', _entero), ('ocupada', 'b', lambda ocu: ocu == 'S')],
+    ),
+    'casa': (
+        lambda: Casa.objects.values_list('CasCod', 'VivCod', 'FamCod', 'CasZonCod', 'CasMunCod', 'CasMet'),
+        'CasCod',
+        [('cas_cod', 'q', _entero), ('viv_cod', 'q', _entero), ('fam_cod', 'q', _entero), ('zon_cod', 'q', _entero),
+         ('mun_cod', 'q', _entero), ('cas_met', 'q', _centimos), ('ingreso', 'q', None)],
+    ),
+    'pago': (
+        lambda: PagoTributario.objects.values_list('PagTriCod', 'CasCod', 'PagTriCat', 'PagTriPag', 'PagTriEstReg'),
+        'PagTriCod',
+        [('pag_tri_cod', 'q', _entero), ('cas_cod', 'q', _entero), ('categoria', 'b', lambda cat: CATEGORIAS.get(cat, -1)),
+         ('pago', 'q', _centimos), ('estado', 'b', lambda estado: ESTADOS.get(estado, -1))],
+    ),
+}
+
+
+def _ingresos():
+    ingresos = {}
+    for fam_cod, monto in Propietario.objects.values_list('PerCod__FamCod', 'ProMonIngFam').order_by('-ProCod'):
+        ingresos[fam_cod] = _centimos(monto)
+    return ingresos
+
+
+def _huella(tabla, marca=None):
+    """
+    [filas, suma de PK, suma de versiones] de la tabla, o de sus filas con PK <= marca.
+
+    Cada UPDATE incrementa la versión de la fila (VersionadoMixin, _actualizar_registrando, transicionar)
+    y un borrado cambia la cantidad y la suma de PK: si la huella de las filas ya volcadas no cambió,
+    basta con agregar las nuevas.
+    """
+    modelo = TABLAS[tabla][0]().model
+    filas = modelo.objects.all() if marca is None else modelo.objects.filter(pk__lte=marca)
+    huella = filas.aggregate(filas=Count('pk'), pks=Sum('pk'), versiones=Sum(modelo.CAMPO_VERSION))
+    return [huella['filas'], huella['pks'] or 0, huella['versiones'] or 0]
+
+
+def _leer_tabla(tabla, marca, tamano_lote=5000):
+    consulta, _, columnas = TABLAS[tabla]
+    leidas = [columna for columna in columnas if columna[2] is not None]
+    datos = {nombre: array(tipo) for nombre, tipo, _ in leidas}
+    for lote in por_lotes(consulta(), tamano_lote, desde=marca):
+        for fila in lote:
+            for (nombre, _, conversion), valor in zip(leidas, fila):
+                datos[nombre].append(conversion(valor))
+        marca = lote[-1][0]
+    return datos, marca
+
+
+def _columna_ingresos(fam_cod):
+    # -1 marca las familias sin propietario (y las casas sin familia)
+    ingresos = _ingresos()
+    return array('q', (ingresos.get(codigo, -1) for codigo in fam_cod))
+
+
+class VolcadoCatastro:
+    """Lectura del archivo mediante mmap de solo lectura; las columnas son vistas sin copia."""
+
+    def __init__(self, ruta):
+        with open(ruta, 'rb') as archivo:
+            self._mmap = mmap.mmap(archivo.fileno(), 0, access=mmap.ACCESS_READ)
+        firma, version, longitud = CABECERA.unpack_from(self._mmap, 0)
+        if firma != FIRMA:
+            raise ValueError(f"{ruta} no es un volcado del catastro.")
+        if version != VERSION:
+            raise ValueError(f"Versión de volcado {version} no soportada (se esperaba {VERSION}).")
+        self.directorio = json.loads(self._mmap[CABECERA.size:CABECERA.size + longitud].decode())
+        if self.directorio['orden'] != sys.byteorder:
+            raise ValueError("El volcado se escribió con otro orden de bytes.")
+        self.tablas = self.directorio['tablas']
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.cerrar()
+
+    def cerrar(self):
+        # Falla con BufferError si todavía hay columnas en uso
+        self._mmap.close()
+
+    def filas(self, tabla):
+        return self.tablas[tabla]['filas']
+
+    def marca(self, tabla):
+        return self.tablas[tabla]['marca']
+
+    def columna(self, tabla, nombre):
+        tipo, desplazamiento = self.tablas[tabla]['columnas'][nombre]
+        tamano = array(tipo).itemsize * self.filas(tabla)
+        return memoryview(self._mmap)[desplazamiento:desplazamiento + tamano].cast(tipo)
+
+    def columnas(self, tabla):
+        return {nombre: self.columna(tabla, nombre) for nombre in self.tablas[tabla]['columnas']}
+
+
+def _alinear(posicion):
+    return (posicion + 7) // 8 * 8
+
+
+def volcar(ruta, completo=False):
+    """
+    Escribe o actualiza el volcado.
+
+    Sin `completo`, de cada tabla solo se leen las filas con PK mayor a la marca anterior, siempre que
+    las ya volcadas no hayan cambiado desde entonces (ver _huella); si cambiaron, la tabla se vuelve a leer entera.
+    """
+    previo = None
+    if not completo and os.path.exists(ruta):
+        previo = VolcadoCatastro(ruta)
+    try:
+        tablas = {}
+        for tabla, (_, _, columnas) in TABLAS.items():
+            # Antes de leer: lo que cambie durante la lectura no coincidirá con la huella la próxima vez
+            huella = _huella(tabla)
+            anterior = previo.tablas.get(tabla) if previo else None
+            if anterior and anterior.get('huella') != _huella(tabla, anterior['marca']):
+                anterior = None
+            nuevos, marca = _leer_tabla(tabla, anterior['marca'] if anterior else 0)
+            datos = {}
+            for nombre, tipo, conversion in columnas:
+                datos[nombre] = array(tipo)
+                if conversion is None:
+                    continue
+                if anterior:
+                    datos[nombre].frombytes(previo.columna(tabla, nombre).tobytes())
+                datos[nombre].extend(nuevos[nombre])
+            if 'ingreso' in datos:
+                datos['ingreso'] = _columna_ingresos(datos['fam_cod'])
+            tablas[tabla] = (datos, marca, huella)
+    finally:
+        if previo:
+            previo.cerrar()
+
+    # Calcular desplazamientos: el directorio depende de ellos, así que se reserva su tamaño primero
+    directorio = {'orden': sys.byteorder, 'tablas': {}}
+    for tabla, (datos, marca, huella) in tablas.items():
+        filas = len(next(iter(datos.values())))
+        directorio['tablas'][tabla] = {'filas': filas, 'marca': marca, 'huella': huella, 'columnas': {n: [c.typecode, 0] for n, c in datos.items()}}
+    longitud = len(json.dumps(directorio).encode()) + 64 * sum(len(d) for d, _, _ in tablas.values())
+    posicion = _alinear(CABECERA.size + longitud)
+    for tabla, (datos, _, _) in tablas.items():
+        for nombre, columna in datos.items():
+            directorio['tablas'][tabla]['columnas'][nombre][1] = posicion
+            posicion = _alinear(posicion + columna.itemsize * len(columna))
+    texto = json.dumps(directorio).encode().ljust(longitud)
+
+    # Escribir en un temporal y reemplazar: los lectores con el mapa anterior no se ven afectados
+    temporal = f"{ruta}.tmp"
+    with open(temporal, 'wb') as archivo:
+        archivo.write(CABECERA.pack(FIRMA, VERSION, longitud))
+        archivo.write(texto)
+        for tabla, (datos, _, _) in tablas.items():
+            for nombre, columna in datos.items():
+                archivo.seek(directorio['tablas'][tabla]['columnas'][nombre][1])
+                columna.tofile(archivo)
+        archivo.flush()
+        os.fsync(archivo.fileno())
+    os.replace(temporal, ruta)
+    return {tabla: (directorio['tablas'][tabla]['filas'], marca) for tabla, (_, marca, _) in tablas.items()}
@@ -0,0 +1,100 @@
+from django.db import transaction
+from .iteracion import recorrer
+from .mapas import MapaBits
+from .models import OcupacionZona, Vivienda, ZonaCodigoPostal, _incrementar
+from .texto import codigo_postal_numerico
+
+
+def _base(pagina):
+    return pagina * OcupacionZona.BITS_PAGINA
+
+
+def _mapas(ocupacion):
+    return (MapaBits.desde_bytes(_base(ocupacion.OcuZonPag), ocupacion.OcuZonViv),
+            MapaBits.desde_bytes(_base(ocupacion.OcuZonPag), ocupacion.OcuZonOcu))
+
+
+def _bytes(mapa, pagina):
+    mapa.rebasar(_base(pagina))
+    return mapa.a_bytes()
+
+
+def aplicar(zon_cod, cod_pos, viv_cod, ocupada, signo):
+    """Suma (signo 1) o resta (signo -1) una vivienda de la adyacencia zona-código postal y de la página de su mapa."""
+    pagina = viv_cod // OcupacionZona.BITS_PAGINA
+    with transaction.atomic():
+        # Al restar no se crean filas: si la zona se está borrando, el Collector ya eliminó las suyas
+        if cod_pos is not None:
+            _incrementar(ZonaCodigoPostal, {'ZonCod_id': zon_cod, 'ZonCodPos': cod_pos}, crear=signo > 0, ZonCodPosCan=signo)
+        if signo > 0:
+            OcupacionZona.objects.get_or_create(ZonCod_id=zon_cod, OcuZonPag=pagina)
+        ocupacion = OcupacionZona.objects.select_for_update().filter(ZonCod_id=zon_cod, OcuZonPag=pagina).first()
+        if ocupacion is None:
+            return
+        viviendas, ocupadas = _mapas(ocupacion)
+        if signo > 0:
+            viviendas.agregar(viv_cod)
+            if ocupada:
+                ocupadas.agregar(viv_cod)
+        else:
+            viviendas.quitar(viv_cod)
+            ocupadas.quitar(viv_cod)
+        if not viviendas.bits:
+            ocupacion.delete()
+            return
+        ocupacion.OcuZonViv = _bytes(viviendas, pagina)
+        ocupacion.OcuZonOcu = _bytes(ocupadas, pagina)
+        ocupacion.save(update_fields=['OcuZonViv', 'OcuZonOcu'])
+
+
+def reconstruir():
+    """Recalcula la adyacencia y los mapas de ocupación desde Vivienda."""
+    adyacencia, mapas = {}, {}
+    for viv_cod, zon_cod, cod_pos, ocupada in recorrer(Vivienda.objects.values_list('VivCod', 'ZonCod', 'VivCodPos', 'VivOcu'), 5000):
+        cod_pos = codigo_postal_numerico(cod_pos)
+        if cod_pos is not None:
+            adyacencia[zon_cod, cod_pos] = adyacencia.get((zon_cod, cod_pos), 0) + 1
+        viviendas, ocupadas = mapas.setdefault((zon_cod, viv_cod // OcupacionZona.BITS_PAGINA), (MapaBits(), MapaBits()))
+        viviendas.agregar(viv_cod)
+        if ocupada == 'S':
+            ocupadas.agregar(viv_cod)
+    with transaction.atomic():
+        ZonaCodigoPostal.objects.all().delete()
+        ZonaCodigoPostal.objects.bulk_create([
+            ZonaCodigoPostal(ZonCod_id=zon_cod, ZonCodPos=cod_pos, ZonCodPosCan=cantidad)
+            for (zon_cod, cod_pos), cantidad in adyacencia.items()
+        ], batch_size=1000)
+        OcupacionZona.objects.all().delete()
+        OcupacionZona.objects.bulk_create([
+            OcupacionZona(ZonCod_id=zon_cod, OcuZonPag=pagina, OcuZonViv=_bytes(viviendas, pagina), OcuZonOcu=_bytes(ocupadas, pagina))
+            for (zon_cod, pagina), (viviendas, ocupadas) in mapas.items()
+        ], batch_size=1000)
+    return len({zon_cod for zon_cod, _ in mapas})
+
+
+def zonas_en_codigos_postales(desde, hasta):
+    """Zonas con al menos una vivienda en el rango de códigos postales."""
+    return set(ZonaCodigoPostal.objects.filter(
+        ZonCodPos__range=(codigo_postal_numerico(str(desde)), codigo_postal_numerico(str(hasta))), ZonCodPosCan__gt=0,
+    ).values_list('ZonCod', flat=True))
+
+
+def ocupacion_por_zona(zonas=None):
+    """{ZonCod: (viviendas, ocupadas)} contando bits, sin recorrer Vivienda."""
+    consulta = OcupacionZona.objects.all()
+    if zonas is not None:
+        consulta = consulta.filter(ZonCod__in=zonas)
+    resultado = {}
+    for ocupacion in consulta:
+        viviendas, ocupadas = _mapas(ocupacion)
+        total = resultado.get(ocupacion.ZonCod_id, (0, 0))
+        resultado[ocupacion.ZonCod_id] = (total[0] + len(viviendas), total[1] + len(ocupadas))
+    return resultado
+
+
+def viviendas_ocupadas(zonas):
+    """Mapa de bits con los VivCod ocupados de las zonas dadas (unión de las páginas de sus mapas)."""
+    resultado = MapaBits()
+    for ocupacion in OcupacionZona.objects.filter(ZonCod__in=zonas).order_by('OcuZonPag'):
+        resultado = resultado | _mapas(ocupacion)[1]
+    return resultado
@@ -0,0 +1,69 @@
+"""
+Mide el arranque en frío de manage.py y de los puntos de entrada WSGI/ASGI con ``python -X importtime``.
+
+Ejecutar desde el directorio del proyecto (junto a manage.py):
+
+    python benchmarks/arranque.py
+    python benchmarks/arranque.py --settings mysite.settings mysite.settings_batch --repeticiones 10
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+PROYECTO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+ENTRADAS = {
+    'manage.py check': ['manage.py', 'check'],
+    'manage.py help': ['manage.py', 'help'],
+    'mysite.wsgi': ['-c', 'import mysite.wsgi'],
+    'mysite.asgi': ['-c', 'import mysite.asgi'],
+}
+
+
+def medir(argumentos, settings):
+    entorno = {**os.environ, 'DJANGO_SETTINGS_MODULE': settings}
+    inicio = time.perf_counter()
+    proceso = subprocess.run([sys.executable, '-X', 'importtime', *argumentos], cwd=PROYECTO, env=entorno,
+                             stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    segundos = time.perf_counter() - inicio
+    if proceso.returncode:
+        raise RuntimeError(f"{' '.join(argumentos)} terminó con código {proceso.returncode}:\n{proceso.stderr[-2000:]}")
+    modulos = []
+    for linea in proceso.stderr.splitlines():
+        if not linea.startswith('import time:') or 'cumulative' in linea:
+            continue
+        _, propio, acumulado, nombre = [parte.strip() for parte in linea.replace('import time:', '|').split('|')]
+        modulos.append((int(acumulado), int(propio), nombre))
+    return segundos, modulos
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--settings', nargs='+', default=['mysite.settings', 'mysite.settings_batch'])
+    parser.add_argument('--entradas', nargs='+', choices=list(ENTRADAS), default=list(ENTRADAS))
+    parser.add_argument('--repeticiones', type=int, default=5)
+    parser.add_argument('--detalle', type=int, default=10, help="Módulos de primer nivel más costosos a mostrar")
+    opciones = parser.parse_args()
+
+    print(f"{'Entrada':<18} {'Settings':<24} {'Mediana (ms)':>12} {'Mínimo (ms)':>12} {'Imports (ms)':>13} {'Módulos':>8}")
+    for entrada in opciones.entradas:
+        for settings in opciones.settings:
+            tiempos, modulos = [], []
+            for _ in range(opciones.repeticiones):
+                segundos, modulos = medir(ENTRADAS[entrada], settings)
+                tiempos.append(segundos * 1000)
+            # Los módulos de primer nivel no tienen sangría en la salida de importtime
+            importacion = sum(propio for _, propio, _ in modulos) / 1000
+            print(f"{entrada:<18} {settings:<24} {statistics.median(tiempos):>12.1f} {min(tiempos):>12.1f} "
+                  f"{importacion:>13.1f} {len(modulos):>8}")
+            if opciones.detalle:
+                raiz = sorted((m for m in modulos if not m[2].startswith(' ')), reverse=True)[:opciones.detalle]
+                for acumulado, _, nombre in raiz:
+                    print(f"{'':<44}{acumulado / 1000:>10.1f} ms  {nombre}")
+
+
+if __name__ == '__main__':
+    main()
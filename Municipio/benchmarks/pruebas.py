@@ -0,0 +1,73 @@
+"""
+Mide cuánto tarda en prepararse la base de pruebas: migraciones completas frente a la instantánea.
+
+Ejecutar desde el directorio del proyecto (junto a manage.py):
+
+    python benchmarks/pruebas.py --repeticiones 5
+"""
+import argparse
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+PROYECTO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+RUNNERS = {
+    'migraciones': 'django.test.runner.DiscoverRunner',
+    'instantanea': 'Municipio.pruebas.RunnerInstantanea',
+}
+
+
+def preparar(runner):
+    # Proceso hijo: arranque de Django, creación de la base de pruebas y destrucción, como "manage.py test"
+    inicio = time.perf_counter()
+    import django
+    from django.test.utils import get_runner
+    from django.conf import settings
+    django.setup()
+    arranque = time.perf_counter() - inicio
+    clase = get_runner(settings, runner)
+    instancia = clase(verbosity=0, interactive=False)
+    inicio = time.perf_counter()
+    configuracion = instancia.setup_databases(aliases={'default'})
+    from Municipio.models import TipoPersona
+    TipoPersona.objects.count()
+    preparacion = time.perf_counter() - inicio
+    instancia.teardown_databases(configuracion)
+    print(f"{arranque:.6f} {preparacion:.6f}")
+
+
+def medir(runner, directorio):
+    entorno = {**os.environ, 'DJANGO_SETTINGS_MODULE': 'mysite.settings_test', 'INSTANTANEAS_PRUEBAS': directorio}
+    salida = subprocess.run([sys.executable, os.path.abspath(__file__), '--hijo', runner], cwd=PROYECTO, env=entorno,
+                            check=True, capture_output=True, text=True).stdout
+    return [float(valor) * 1000 for valor in salida.split()[-2:]]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--repeticiones', type=int, default=5)
+    parser.add_argument('--hijo', help=argparse.SUPPRESS)
+    opciones = parser.parse_args()
+    if opciones.hijo:
+        sys.path.insert(0, PROYECTO)
+        return preparar(opciones.hijo)
+
+    directorio = tempfile.mkdtemp(prefix='instantaneas_')
+    try:
+        _, construccion = medir(RUNNERS['instantanea'], directorio)
+        print(f"Construcción de la instantánea (primera ejecución): {construccion:.1f} ms")
+        print(f"{'Modo':<14} {'Arranque (ms)':>14} {'Base de pruebas (ms)':>22}")
+        for modo, runner in RUNNERS.items():
+            tiempos = [medir(runner, directorio) for _ in range(opciones.repeticiones)]
+            print(f"{modo:<14} {statistics.median(t[0] for t in tiempos):>14.1f} {statistics.median(t[1] for t in tiempos):>22.1f}")
+    finally:
+        shutil.rmtree(directorio, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
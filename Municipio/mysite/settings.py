@@ -1,6 +1,5 @@
 import os
 from pathlib import Path
-from django.urls import path,include
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -75,6 +74,23 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/4.2/topics/cache/
+# LocMemCache desaloja por LRU. Cada proceso tiene su propia caché, pero las claves incluyen la versión
+# de Municipio.versiones, que está en la base: un cambio hecho en otro proceso también la invalida.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'municipio',
+        'TIMEOUT': None,
+        'OPTIONS': {
+            'MAX_ENTRIES': 5000,
+        },
+    }
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
 
@@ -0,0 +1,27 @@
+"""
+Perfil liviano para comandos por lotes y procesos trabajadores del proyecto Municipio.
+
+Carga solo la aplicación Municipio, sin admin, autenticación, sesiones ni mensajes.
+Uso: python manage.py <comando> --settings=mysite.settings_batch
+"""
+
+from .settings import *  # noqa: F401,F403
+
+INSTALLED_APPS = [
+    'Municipio',
+]
+
+MIDDLEWARE = []
+
+ROOT_URLCONF = 'Municipio.urls'
+
+# Sin procesadores de contexto de auth y messages; las plantillas de la aplicación siguen disponibles
+TEMPLATES = [
+    {
+        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'DIRS': [os.path.join(BASE_DIR, 'templates')],
+        'APP_DIRS': True,
+    },
+]
+
+AUTH_PASSWORD_VALIDATORS = []
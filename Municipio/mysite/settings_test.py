@@ -0,0 +1,30 @@
+"""
+Configuración para "manage.py test --settings=mysite.settings_test".
+
+La base de pruebas es SQLite y se crea copiando una instantánea ya migrada y con los fixtures cargados
+(ver Municipio/pruebas.py), en lugar de aplicar todas las migraciones en cada ejecución.
+"""
+
+import tempfile
+
+from .settings import *  # noqa: F401,F403
+
+# Directorio de las instantáneas; en CI puede apuntar a un directorio que se conserve entre ejecuciones
+INSTANTANEAS_PRUEBAS = os.environ.get('INSTANTANEAS_PRUEBAS', os.path.join(tempfile.gettempdir(), 'municipio_pruebas'))
+os.makedirs(INSTANTANEAS_PRUEBAS, exist_ok=True)
+
+# Solo la usan los comandos que se ejecuten con estos settings; las pruebas usan una base en memoria.
+# Fuera del proyecto, para que no quede un archivo suelto en el repositorio.
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.path.join(INSTANTANEAS_PRUEBAS, 'pruebas.sqlite3'),
+    }
+}
+
+TEST_RUNNER = 'Municipio.pruebas.RunnerInstantanea'
+
+# Fixtures que se cargan una vez en la instantánea y quedan disponibles en todas las pruebas
+FIXTURES_PRUEBAS = ['catalogos']
+
+PASSWORD_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']